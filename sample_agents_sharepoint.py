@@ -15,22 +15,41 @@ Prerequisites:
 - SharePoint Online site with documents
 
 Usage:
-    python sample_agents_sharepoint.py
+    python sample_agents_sharepoint.py            # wait for the full answer
+    python sample_agents_sharepoint.py --stream   # print the answer as it is generated
+    python sample_agents_sharepoint.py --no-cache # ignore cached answers and run the agent
 
 Note: SharePoint tool requires preview access. Contact azureagents-preview@microsoft.com
 """
 
 import os
+import sys
+from contextlib import ExitStack
 from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import SharepointTool
 from dotenv import load_dotenv
 from azure.core.exceptions import HttpResponseError
 import json
 
+from sharepoint_agent import TIMED_OUT, AgentPool, AnswerCache, cache_key, create_and_poll, get_credential
+from sharepoint_agent.cassette import client_options
+from sharepoint_agent.cache import DEFAULT_CACHE_PATH
+from sharepoint_agent.catalog import DEFAULT_CATALOG_PATH, DocumentCatalog
+from sharepoint_agent.tags import resource_tags
+from sharepoint_agent.config import DEFAULT_INSTRUCTIONS
+from sharepoint_agent.query import latest_answer, run_usage
+from sharepoint_agent.streaming import stream_query
+from sharepoint_agent.timing import QueryTimer, print_summary, record_run
+
 # Load environment variables from .env file
 load_dotenv()
 
+STREAM = "--stream" in sys.argv[1:]
+NO_CACHE = "--no-cache" in sys.argv[1:]
+
+# Answers to repeated questions are served from a local cache for an hour
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", DEFAULT_CACHE_PATH)
+
 print("=== SharePoint AI Agent Demo ===")
 print("Testing SharePoint document access with Azure AI Foundry")
 print()
@@ -48,18 +67,54 @@ print("✅ Environment variables loaded successfully")
 print(f"📁 Testing with document: {os.environ.get('DOCUMENT_NAME', 'default-document.docx')}")
 print()
 
+# Time every stage of this query; the summary is printed at the end
+timer = QueryTimer(mode="stream" if STREAM else "poll")
+
+# Build the query up front so a cached answer can skip the agent run entirely
+document_name = os.environ.get('DOCUMENT_NAME', 'your-document.docx')
+query_message = f"Please analyze and summarize the SharePoint document named '{document_name}'. If you can't access it, please list what documents are available in the SharePoint site."
+
+# With a fresh local catalog (python -m sharepoint_agent.catalog refresh ...) the question names
+# the document's exact path and drops the fallback listing, which saves the agent a search
+CATALOG_PATH = os.environ.get("SHAREPOINT_AGENT_CATALOG", DEFAULT_CATALOG_PATH)
+if os.path.exists(CATALOG_PATH):
+    with timer.phase("catalog.lookup"), DocumentCatalog(CATALOG_PATH) as catalog:
+        document = catalog.match(document_name) if catalog.is_fresh() else None
+    if document is not None:
+        query_message = f"Please analyze and summarize the SharePoint document at '{document.path}'."
+        print(f"📚 Found in the document catalog: {document.path}")
+
+answer_cache = AnswerCache(path=ANSWER_CACHE_PATH)
+answer_key = cache_key(
+    os.environ["SHAREPOINT_CONNECTION_ID"],
+    os.environ["MODEL_DEPLOYMENT_NAME"],
+    DEFAULT_INSTRUCTIONS,
+    query_message,
+)
+with timer.phase("cache.lookup"):
+    cached_answer = None if NO_CACHE else answer_cache.get(answer_key)
+
+if cached_answer is not None:
+    print(f"📝 Query: {query_message}")
+    print("⚡ Answer served from cache (run with --no-cache to query SharePoint again)")
+    print(f"🤖 Assistant: {cached_answer}")
+    print(f"📈 Cache stats: {answer_cache.stats()}")
+    print_summary([timer.finish("cached")])
+    answer_cache.close()
+    print("\n=== Demo Complete ===")
+    exit(0)
+
 # Create an Azure AI Client from a connection string, copied from your AI Studio project.
 # At the moment, it should be in the format "<HostName>;<AzureSubscriptionId>;<ResourceGroup>;<HubName>"
 # Customer needs to login to Azure subscription via Azure CLI and set the environment variables
 
 try:
-    project_client = AIProjectClient(
-        endpoint=os.environ["PROJECT_ENDPOINT"],
-        credential=DefaultAzureCredential(),
-    )
+    with timer.phase("client.create"):
+        project_client = AIProjectClient(**client_options(os.environ["PROJECT_ENDPOINT"], get_credential()))
     print("✅ Successfully created AI Project Client")
 except Exception as e:
     print(f"❌ Error creating AI Project Client: {e}")
+    answer_cache.close()
     exit(1)
 
 # Initialize SharePoint tool with connection id
@@ -68,69 +123,110 @@ try:
     print("✅ Successfully created SharePoint Tool")
 except Exception as e:
     print(f"❌ Error creating SharePoint Tool: {e}")
+    answer_cache.close()
     exit(1)
 
 # Create agent with Sharepoint tool and process agent run
-with project_client:
+# The pool hands out a shared agent and deletes it when the block exits; the cache is closed with it
+with project_client, answer_cache, AgentPool(project_client.agents) as pool, ExitStack() as lease:
     agents_client = project_client.agents
     
     try:
-        agent = agents_client.create_agent(
-            model=os.environ["MODEL_DEPLOYMENT_NAME"],
-            name="sharepoint-ai-agent",
-            instructions="You are a helpful SharePoint assistant that can access and analyze documents.",
-            tools=sharepoint.definitions,
-        )
+        with timer.phase("create_agent"):
+            # Handed back to the pool when the block exits
+            agent = lease.enter_context(pool.agent(
+                model=os.environ["MODEL_DEPLOYMENT_NAME"],
+                instructions=DEFAULT_INSTRUCTIONS,
+                tools=sharepoint.definitions,
+            ))
         print(f"✅ Created agent: {agent.id}")
     except Exception as e:
         print(f"❌ Error creating agent: {e}")
         exit(1)
 
     # Create thread for communication
-    thread = agents_client.threads.create()
+    with timer.phase("threads.create"):
+        thread = agents_client.threads.create(metadata=resource_tags())
     print(f"✅ Created thread: {thread.id}")
 
     # Create message to thread - Test with the document from env
-    document_name = os.environ.get('DOCUMENT_NAME', 'your-document.docx')
-    query_message = f"Please analyze and summarize the SharePoint document named '{document_name}'. If you can't access it, please list what documents are available in the SharePoint site."
-    
-    message = agents_client.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content=query_message,
-    )
+    with timer.phase("messages.create"):
+        message = agents_client.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=query_message,
+        )
     print(f"✅ Created message: {message.id}")
     print(f"📝 Query: {query_message}")
     print()
 
-    # Create and process agent run in thread with tools
-    print("🔄 Processing agent run...")
-    run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
-    print(f"📊 Run finished with status: {run.status}")
-
-    if run.status == "failed":
-        print(f"❌ Run failed: {run.last_error}")
-        print("\n💡 This is likely due to SharePoint tool requiring preview access.")
-        print("📧 Contact azureagents-preview@microsoft.com for whitelist access.")
-    elif run.status == "completed":
-        print("✅ Run completed successfully!")
+    if STREAM:
+        # Stream the run so the answer appears as soon as the first token arrives
+        print("🔄 Streaming agent run...")
+        print("🤖 Assistant: ", end="", flush=True)
+        with timer.phase("run"):
+            result = stream_query(agents_client, agent.id, thread.id)
+        print()
+        print(f"📊 Run finished with status: {result.status}")
+        if result.time_to_first_token is not None:
+            print(f"⚡ Time to first token: {result.time_to_first_token:.2f}s")
+        print(f"⏱️ Total time: {result.total_time:.2f}s")
+        if result.usage:
+            print(f"🪙 Tokens: {result.usage['prompt_tokens']} prompt + {result.usage['completion_tokens']} completion = {result.usage['total_tokens']}")
+
+        if result.status == "failed":
+            print(f"❌ Run failed: {result.error}")
+            print("\n💡 This is likely due to SharePoint tool requiring preview access.")
+            print("📧 Contact azureagents-preview@microsoft.com for whitelist access.")
+        elif result.status != "completed":
+            print(f"⏳ Run status: {result.status} {result.error or ''}")
+        elif result.answer and not NO_CACHE:
+            answer_cache.put(answer_key, result.answer)
+        run_status = result.status
+        if result.run_id:
+            with timer.phase("run_steps.list"):
+                record_run(timer, agents_client, thread.id, agents_client.runs.get(thread_id=thread.id, run_id=result.run_id), steps=True)
     else:
-        print(f"⏳ Run status: {run.status}")
-
-    # Fetch and log all messages
-    print("\n=== Conversation Messages ===")
-    messages = agents_client.messages.list(thread_id=thread.id)
-    for msg in messages:
-        role_icon = "👤" if msg.role == "user" else "🤖"
-        if msg.content:
-            for content in msg.content:
-                if hasattr(content, 'text') and content.text:
-                    print(f"{role_icon} {msg.role.title()}: {content.text.value}")
-                    break
-
-    # Clean up
-    agents_client.delete_agent(agent.id)
-    print(f"\n🧹 Cleaned up agent: {agent.id}")
+        # Create and poll agent run in thread with tools (cancelled after the deadline)
+        print("🔄 Processing agent run...")
+        with timer.phase("run"):
+            run = create_and_poll(agents_client, thread.id, agent.id)
+        print(f"📊 Run finished with status: {run.status}")
+        run_status = run.status
+        usage = run_usage(run)
+        if usage:
+            # The prompt side includes the document content injected by the SharePoint tool
+            print(f"🪙 Tokens: {usage['prompt_tokens']} prompt + {usage['completion_tokens']} completion = {usage['total_tokens']}")
+        with timer.phase("run_steps.list"):
+            record_run(timer, agents_client, thread.id, run, steps=True)
+
+        if run.status == "failed":
+            print(f"❌ Run failed: {run.last_error}")
+            print("\n💡 This is likely due to SharePoint tool requiring preview access.")
+            print("📧 Contact azureagents-preview@microsoft.com for whitelist access.")
+        elif run.status == TIMED_OUT:
+            print(f"⏰ Run timed out and was cancelled: {run.last_error['message']}")
+        elif run.status == "completed":
+            print("✅ Run completed successfully!")
+            with timer.phase("messages.list"):
+                answer = latest_answer(agents_client, thread.id, run_id=run.id)
+            if answer and not NO_CACHE:
+                answer_cache.put(answer_key, answer)
+
+            # Only the reply created by this run is fetched, not the whole thread
+            print("\n=== Conversation Messages ===")
+            print(f"👤 User: {query_message}")
+            if answer:
+                print(f"🤖 Assistant: {answer}")
+        else:
+            print(f"⏳ Run status: {run.status}")
+
+    # Clean up (the agent is deleted as the pool closes)
+    agents_client.threads.delete(thread.id)
+
+print(f"\n🧹 Cleaned up agent: {agent.id} and thread: {thread.id}")
+
+print_summary([timer.finish(run_status)])
 
 print("\n=== Demo Complete ===")
 print("For troubleshooting, run: python testing/diagnostic_sharepoint.py")
\ No newline at end of file
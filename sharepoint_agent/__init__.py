@@ -0,0 +1,54 @@
+"""
+Reusable building blocks for the SharePoint AI agent scripts.
+
+The scripts in the repository root and in ``testing/`` import from here so
+that expensive resources (agents, threads, clients) are shared instead of
+being recreated for every query.
+
+The names below are imported on first use, so importing one submodule (such
+as the stdlib-only :mod:`sharepoint_agent.daemon_client`) does not load the
+rest of the package.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "AgentPool": ".pool",
+    "AnswerCache": ".cache",
+    "Backend": ".router",
+    "BatchExecutor": ".batch",
+    "CachedCredential": ".credentials",
+    "CircuitBreaker": ".breaker",
+    "FakeAgentsClient": ".fake",
+    "LimitedAgentsClient": ".ratelimit",
+    "PollPolicy": ".polling",
+    "QueryResult": ".query",
+    "RateLimiter": ".ratelimit",
+    "Router": ".router",
+    "SessionManager": ".sessions",
+    "SingleFlight": ".coalesce",
+    "TIMED_OUT": ".polling",
+    "cache_key": ".cache",
+    "cached_run_query": ".cache",
+    "coalesced_run_query": ".coalesce",
+    "create_and_poll": ".polling",
+    "get_credential": ".credentials",
+    "run_batch": ".batch",
+    "routed_run_query": ".router",
+    "run_query": ".query",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
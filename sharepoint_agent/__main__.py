@@ -0,0 +1,7 @@
+"""``python -m sharepoint_agent``: see :mod:`sharepoint_agent.cli`."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Where the warm query daemon listens.
+
+Shared by :mod:`sharepoint_agent.daemon` and its thin client, which must stay
+cheap to import, so this module uses the standard library only.
+"""
+
+import os
+import socket
+
+ADDRESS_ENV = "SHAREPOINT_AGENT_DAEMON"
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sharepoint-agent", "daemon.sock")
+DEFAULT_TCP_ADDRESS = "127.0.0.1:8765"
+
+
+def default_address():
+    """Unix socket where supported, loopback TCP otherwise."""
+    if hasattr(socket, "AF_UNIX"):
+        return os.environ.get(ADDRESS_ENV, DEFAULT_SOCKET_PATH)
+    return os.environ.get(ADDRESS_ENV, DEFAULT_TCP_ADDRESS)
+
+
+def parse_address(address):
+    """Return ``(family, address)`` for a socket path or ``host:port`` string."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
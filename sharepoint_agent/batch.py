@@ -0,0 +1,109 @@
+"""
+Concurrent batch execution of SharePoint questions.
+
+Each question still gets its own thread + message + run pipeline, but up to
+``max_concurrency`` pipelines run at the same time on a bounded thread pool.
+``run`` returns results in submission order; ``stream`` yields them as they
+finish and only reads ahead a bounded number of queries, so memory stays flat
+for arbitrarily long inputs. A custom ``runner`` (e.g. one that routes each
+question to a different deployment) replaces the default :func:`run_query`.
+With a :class:`~sharepoint_agent.checkpoint.Checkpoint`, a restarted batch
+skips questions that already completed and re-attaches to runs still in
+flight.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .polling import DEFAULT_POLICY
+from .query import run_query
+
+DEFAULT_CONCURRENCY = 4
+
+
+class BatchExecutor:
+    """Run many questions against one agent with bounded concurrency."""
+
+    def __init__(self, agents_client, agent_id, max_concurrency=DEFAULT_CONCURRENCY, policy=DEFAULT_POLICY,
+                 trace_steps=False, runner=None, checkpoint=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.agents_client = agents_client
+        self.agent_id = agent_id
+        self.max_concurrency = max_concurrency
+        self.policy = policy
+        self.trace_steps = trace_steps
+        self.runner = runner
+        self.checkpoint = checkpoint
+
+    def run_one(self, query, query_id=None):
+        """Run a single question with this executor's settings.
+
+        With a checkpoint, ``query_id`` identifies the question in the log.
+        """
+        if self.checkpoint is not None and query_id is not None:
+            return self.checkpoint.run(query_id, query, self._ask, self.agents_client, policy=self.policy)
+        return self._ask(query)
+
+    def _ask(self, query, **kwargs):
+        # kwargs (on_run) are only passed when checkpointing, so plain runners need not accept them.
+        if self.runner is not None:
+            return self.runner(query, **kwargs)
+        return run_query(self.agents_client, self.agent_id, query, policy=self.policy,
+                         trace_steps=self.trace_steps, **kwargs)
+
+    def run(self, queries, on_result=None):
+        """Execute ``queries`` and return a list of :class:`QueryResult`.
+
+        ``on_result`` is called with ``(index, result)`` as each question
+        finishes, which may be out of order. The returned list is always in
+        the order the queries were given. A question's position in ``queries``
+        is its checkpoint id.
+        """
+        queries = list(queries)
+        results = [None] * len(queries)
+
+        def _run(index):
+            result = self.run_one(queries[index], index)
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            list(pool.map(_run, range(len(queries))))
+        return results
+
+    def stream(self, queries, read_ahead=None, keyed=False):
+        """Yield ``(index, result)`` pairs in completion order.
+
+        ``queries`` may be any iterable, including a lazily read file. At most
+        ``read_ahead`` queries (default ``2 * max_concurrency``) are pulled
+        from it before their results have been yielded. With ``keyed=True``
+        the items are ``(query_id, query)`` pairs and the id is used as the
+        checkpoint key; otherwise the index is.
+        """
+        read_ahead = read_ahead or 2 * self.max_concurrency
+        queries = enumerate(queries)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < read_ahead:
+                    try:
+                        index, query = next(queries)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    query_id, query = query if keyed else (index, query)
+                    future = pool.submit(self.run_one, query, query_id)
+                    pending[future] = index
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+
+def run_batch(agents_client, agent_id, queries, max_concurrency=DEFAULT_CONCURRENCY):
+    """Convenience wrapper around :class:`BatchExecutor`."""
+    return BatchExecutor(agents_client, agent_id, max_concurrency).run(queries)
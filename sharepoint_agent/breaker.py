@@ -0,0 +1,168 @@
+"""
+Circuit breaker for SharePoint tool runs.
+
+When the SharePoint connection is misconfigured, every run fails the same way
+(typically ``last_error = {"code": "server_error", "message": "Bad Request"}``),
+yet a batch keeps creating agents, threads and runs for every remaining
+question. ``CircuitBreaker`` watches run outcomes and sorts failures with
+:func:`classify`. After ``failure_threshold`` consecutive connection-level
+failures it opens, and new work is rejected straight away with the last
+diagnosis, before any API call is made. Once ``reset_timeout`` seconds have
+passed, the breaker goes half-open and lets one question through as a probe.
+If the probe completes, the breaker closes. If it fails the same way, the
+breaker opens again.
+
+Only connection-level failures count. Timeouts, throttling and failures
+specific to one question neither open the breaker nor reset the count.
+"""
+
+import threading
+import time
+
+from .polling import TIMED_OUT
+from .query import QueryResult
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+REJECTED = "rejected"
+
+CONNECTION = "connection"
+TRANSIENT = "transient"
+OTHER = "other"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 60.0
+
+# Lower-case fragments of last_error codes/messages that point at the SharePoint
+# connection or its credentials rather than at the question.
+CONNECTION_MARKERS = (
+    "bad request",
+    "unauthorized",
+    "forbidden",
+    "access denied",
+    "invalid connection",
+    "connection not found",
+    "tool_user_error",
+    "invalid_tool",
+)
+TRANSIENT_MARKERS = (TIMED_OUT, "rate_limit", "too many requests", "429", "timeout", "server is busy")
+
+DIAGNOSIS_HINT = ("Check the SharePoint connection in Azure AI Foundry: site URL, credentials and "
+                  "permissions (python testing/diagnostic_sharepoint.py).")
+
+
+def _error_text(error):
+    if error is None:
+        return ""
+    if isinstance(error, dict):
+        return f"{error.get('code', '')} {error.get('message', '')}"
+    code, message = getattr(error, "code", None), getattr(error, "message", None)
+    if code is not None or message is not None:
+        return f"{code or ''} {message or ''}"
+    return str(error)
+
+
+def classify(error):
+    """Sort a ``run.last_error`` (dict, model or text) into connection, transient or other."""
+    text = _error_text(error).lower()
+    if any(marker in text for marker in TRANSIENT_MARKERS):
+        return TRANSIENT
+    if any(marker in text for marker in CONNECTION_MARKERS):
+        return CONNECTION
+    return OTHER
+
+
+class CircuitOpenError(Exception):
+    """Raised by :meth:`CircuitBreaker.allow` while the breaker rejects work."""
+
+    def __init__(self, diagnosis, retry_in):
+        super().__init__(f"Circuit open, retry in {retry_in:.0f}s: {diagnosis}")
+        self.diagnosis = diagnosis
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by :class:`QueryResult` outcomes."""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.diagnosis = None
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Admit one question or raise :class:`CircuitOpenError`.
+
+        Every admitted question must be followed by :meth:`record`.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - self._clock()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.diagnosis, max(retry_in, 0.0))
+
+    def record(self, result):
+        """Feed back the outcome of an admitted question (``None`` if it never finished)."""
+        with self._lock:
+            probe, self._probing = self._probing, False
+            if result is None:
+                return
+            if result.ok:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                return
+            if result.status in ("failed", "error") and classify(result.error) == CONNECTION:
+                self.consecutive_failures += 1
+                self.diagnosis = f"{result.error} — {DIAGNOSIS_HINT}"
+                if probe or self.consecutive_failures >= self.failure_threshold:
+                    if self.state != OPEN:
+                        self.opened += 1
+                    self.state = OPEN
+                    self._opened_at = self._clock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "diagnosis": self.diagnosis,
+            }
+
+
+def guarded(breaker, runner):
+    """Wrap ``runner(query, **kwargs)`` so questions are rejected while ``breaker`` is open.
+
+    A rejected question comes back as a :class:`QueryResult` with status
+    ``rejected`` and the diagnosis as its error; nothing is sent to the
+    service.
+    """
+    def run(query, **kwargs):
+        try:
+            breaker.allow()
+        except CircuitOpenError as e:
+            return QueryResult(query=query, status=REJECTED, error=str(e))
+        result = None
+        try:
+            result = runner(query, **kwargs)
+            return result
+        finally:
+            breaker.record(result)
+
+    return run
@@ -0,0 +1,168 @@
+"""
+Answer cache for repeated SharePoint questions.
+
+Answers are keyed on (connection id, model deployment, instructions,
+normalized query), expire after ``ttl`` seconds and are evicted least recently
+used first once ``max_entries`` is reached. Passing ``path`` adds a SQLite
+backend so cached answers survive restarts and are shared between processes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .polling import DEFAULT_POLICY
+from .query import QueryResult, run_query
+
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_CACHE_PATH = os.path.join(".cache", "answers.db")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!. ").lower()
+
+
+def cache_key(connection_id, model, instructions, query):
+    """Return a stable key for a question asked of a given agent configuration."""
+    payload = json.dumps([connection_id, model, instructions, normalize_query(query)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Thread-safe TTL + LRU cache of answer text, optionally persisted to SQLite."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, path=None, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers "
+                "(key TEXT PRIMARY KEY, answer TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """Return the cached answer for ``key`` or ``None``."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = self._entries[key] = (row[0], row[1])
+                    # Rows promoted from the database count towards the in-memory cap too.
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            if entry is not None and now - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("UPDATE answers SET accessed = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, answer):
+        """Store ``answer`` under ``key``, evicting the least recently used entries."""
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (answer, now)
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answers (key, answer, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, answer, now, now),
+                )
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM answers WHERE key = ?", (oldest,))
+            if self._db is not None:
+                # Entries written by other processes count towards the cap as well.
+                self._db.execute(
+                    "DELETE FROM answers WHERE key NOT IN "
+                    "(SELECT key FROM answers ORDER BY accessed DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current in-memory size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._db.commit()
+
+
+def cached_run_query(cache, agents_client, agent_id, query, connection_id, model, instructions,
+                     bypass=False, policy=DEFAULT_POLICY, flight=None):
+    """:func:`run_query` with an answer cache in front of it.
+
+    With ``bypass=True`` the cache is neither read nor written. Only completed
+    runs with an answer are stored. Passing a
+    :class:`~sharepoint_agent.coalesce.SingleFlight` as ``flight`` makes
+    concurrent misses for the same question share one run.
+    """
+    key = cache_key(connection_id, model, instructions, query)
+    if not bypass:
+        answer = cache.get(key)
+        if answer is not None:
+            return QueryResult(query=query, status="completed", answer=answer, cached=True)
+
+    if flight is not None:
+        result = flight.do(key, run_query, agents_client, agent_id, query, policy=policy)
+    else:
+        result = run_query(agents_client, agent_id, query, policy=policy)
+    if not bypass and result.ok and result.answer:
+        cache.put(key, result.answer)
+    return result
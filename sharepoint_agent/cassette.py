@@ -0,0 +1,283 @@
+"""
+Record and replay of the HTTP traffic behind ``AIProjectClient``.
+
+Nothing in ``testing/`` runs without a Foundry project and SharePoint access.
+A cassette is a JSONL file with one line per HTTP exchange: method, path,
+status, the few response headers the SDK looks at, the body and how long the
+exchange took. Recording captures a real session, including every poll of a
+run. Replaying feeds the same responses back to the unchanged SDK, so polling,
+message parsing and answer extraction can be profiled and regression-tested
+offline.
+
+Both modes plug into the azure-core pipeline as a ``RequestsTransport`` whose
+``requests`` session has a recording or replaying adapter mounted. Requests
+are matched on method and path plus query. Repeated requests to the same URL,
+such as ``runs.get`` while polling, get their recorded responses in order. The
+last response is repeated if the client polls more often than the recording.
+Replay sleeps for the recorded time multiplied by ``time_scale``: ``1`` keeps
+the original timing, ``0.1`` compresses it ten times and ``0`` replays
+instantly.
+
+Set ``SHAREPOINT_AGENT_RECORD=session.jsonl`` to record a script's traffic, or
+``SHAREPOINT_AGENT_REPLAY=session.jsonl`` (optionally with
+``SHAREPOINT_AGENT_REPLAY_TIME_SCALE``) to replay it. Request headers are
+never written, so cassettes hold no tokens. Bodies are written as they are,
+so check a cassette before sharing it.
+
+Usage:
+    python -m sharepoint_agent.cassette session.jsonl   # summarize a cassette
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+RECORD_ENV = "SHAREPOINT_AGENT_RECORD"
+REPLAY_ENV = "SHAREPOINT_AGENT_REPLAY"
+TIME_SCALE_ENV = "SHAREPOINT_AGENT_REPLAY_TIME_SCALE"
+FORMAT_VERSION = 1
+
+# Response headers worth keeping: content type plus what retry and LRO policies read.
+KEPT_HEADERS = (
+    "content-type",
+    "retry-after",
+    "retry-after-ms",
+    "x-ms-retry-after-ms",
+    "location",
+    "operation-location",
+)
+
+
+class CassetteMiss(LookupError):
+    """A replayed request has no recorded response."""
+
+
+def request_key(method, url):
+    """Match key for a request: method plus path and sorted query (the host is ignored)."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {parts.path}" + (f"?{query}" if query else "")
+
+
+def _endpoint(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class Cassette:
+    """Recorded HTTP exchanges, appended to a JSONL file as they happen."""
+
+    def __init__(self, path, interactions=None, endpoint=None):
+        self.path = path
+        self.interactions = list(interactions or [])
+        self.endpoint = endpoint
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        header = records[0] if records and "version" in records[0] else {}
+        interactions = records[1:] if header else records
+        return cls(path, interactions, header.get("endpoint"))
+
+    def append(self, interaction, url):
+        """Add one exchange and write it to disk straight away."""
+        with self._lock:
+            lines = []
+            if not self.interactions and not os.path.exists(self.path):
+                self.endpoint = _endpoint(url)
+                lines.append({"version": FORMAT_VERSION, "endpoint": self.endpoint,
+                              "recorded_at": time.time()})
+            self.interactions.append(interaction)
+            lines.append(interaction)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    f.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def summary(self):
+        """Request counts per method and path template, plus total recorded time."""
+        counts = Counter(_template(item["key"]) for item in self.interactions)
+        return {
+            "interactions": len(self.interactions),
+            "recorded_s": sum(item.get("elapsed", 0.0) for item in self.interactions),
+            "requests": dict(counts.most_common()),
+        }
+
+
+def _template(key):
+    """``GET /threads/thread_abc/runs/run_1?api-version=…`` -> ``GET /threads/{id}/runs/{id}``."""
+    method, _, rest = key.partition(" ")
+    segments = rest.split("?", 1)[0].split("/")
+    return method + " " + "/".join("{id}" if "_" in s and s.split("_", 1)[0].isalpha() else s for s in segments)
+
+
+def _encode_body(content):
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(interaction):
+    if "body_b64" in interaction:
+        return base64.b64decode(interaction["body_b64"])
+    return interaction.get("body", "").encode("utf-8")
+
+
+def _adapters():
+    # requests ships with azure-core's RequestsTransport; import it only when a cassette is used.
+    from requests.adapters import HTTPAdapter
+
+    class RecordingAdapter(HTTPAdapter):
+        """Sends requests for real and appends each exchange to ``cassette``."""
+
+        def __init__(self, cassette):
+            super().__init__()
+            self.cassette = cassette
+
+        def send(self, request, **kwargs):
+            started = time.perf_counter()
+            response = super().send(request, **kwargs)
+            # Reading the body here also captures streamed (SSE) responses in full.
+            content = response.content
+            interaction = {
+                "key": request_key(request.method, request.url),
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+                "elapsed": round(time.perf_counter() - started, 4),
+            }
+            interaction.update(_encode_body(content))
+            self.cassette.append(interaction, request.url)
+            return response
+
+    class ReplayAdapter(HTTPAdapter):
+        """Answers requests from ``cassette`` without touching the network."""
+
+        def __init__(self, cassette, time_scale=1.0, sleep=time.sleep):
+            super().__init__()
+            self.time_scale = time_scale
+            self._sleep = sleep
+            self._queues = defaultdict(list)
+            self._last = {}
+            self._lock = threading.Lock()
+            for interaction in cassette.interactions:
+                self._queues[interaction["key"]].append(interaction)
+            for queue in self._queues.values():
+                queue.reverse()
+
+        def next_interaction(self, key):
+            with self._lock:
+                queue = self._queues.get(key)
+                if queue:
+                    self._last[key] = queue.pop()
+                    return self._last[key]
+                if key in self._last and key.startswith("GET "):
+                    return self._last[key]
+            raise CassetteMiss(f"No recorded response for {key}")
+
+        def remaining(self):
+            with self._lock:
+                return sum(len(queue) for queue in self._queues.values())
+
+        def send(self, request, **kwargs):
+            from urllib3 import HTTPResponse
+
+            interaction = self.next_interaction(request_key(request.method, request.url))
+            if self.time_scale:
+                self._sleep(interaction.get("elapsed", 0.0) * self.time_scale)
+            raw = HTTPResponse(
+                body=io.BytesIO(_decode_body(interaction)),
+                headers=interaction.get("headers", {}),
+                status=interaction["status"],
+                reason=interaction.get("reason"),
+                preload_content=False,
+                decode_content=False,
+            )
+            return self.build_response(request, raw)
+
+    return RecordingAdapter, ReplayAdapter
+
+
+def _transport(adapter):
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # The session outlives any one client: project_client.agents shares this transport.
+    transport = RequestsTransport(session=session, session_owner=False)
+    transport.adapter = adapter
+    return transport
+
+
+def recording_transport(path):
+    """azure-core transport that performs real requests and records them to ``path``."""
+    recording_adapter, _ = _adapters()
+    return _transport(recording_adapter(Cassette(path)))
+
+
+def replay_transport(path, time_scale=1.0):
+    """azure-core transport that serves the responses recorded in ``path``."""
+    _, replay_adapter = _adapters()
+    return _transport(replay_adapter(Cassette.load(path), time_scale))
+
+
+class ReplayCredential:
+    """``TokenCredential`` for replay: the cassette needs no real token."""
+
+    def get_token(self, *scopes, **kwargs):
+        from azure.core.credentials import AccessToken
+
+        return AccessToken("replay", int(time.time()) + 3600)
+
+    def close(self):
+        pass
+
+
+def client_options(endpoint, credential, environ=None):
+    """Keyword arguments for ``AIProjectClient``, with a cassette transport if one is configured.
+
+    In replay mode the credential is replaced, so no Azure sign-in or network
+    access is needed.
+    """
+    environ = os.environ if environ is None else environ
+    options = {"endpoint": endpoint, "credential": credential}
+    replay = environ.get(REPLAY_ENV)
+    record = environ.get(RECORD_ENV)
+    if replay:
+        options["credential"] = ReplayCredential()
+        options["transport"] = replay_transport(replay, float(environ.get(TIME_SCALE_ENV, "1")))
+    elif record:
+        options["transport"] = recording_transport(record)
+    if not replay and hasattr(credential, "on_response"):
+        # Lets a CachedCredential drop a token the service rejects with 401.
+        options["raw_response_hook"] = credential.on_response
+    return options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a recorded HTTP cassette.")
+    parser.add_argument("path", help="cassette file (JSONL)")
+    args = parser.parse_args(argv)
+
+    cassette = Cassette.load(args.path)
+    summary = cassette.summary()
+    print(f"📼 {args.path}: {summary['interactions']} requests to {cassette.endpoint}, "
+          f"{summary['recorded_s']:.2f}s recorded")
+    for template, count in summary["requests"].items():
+        print(f"   {count:>5}  {template}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""
+Local catalog of the SharePoint site's documents.
+
+Asking the agent "what documents are available?", or letting it search for a
+misspelled file name, costs a full run with the SharePoint tool.
+``DocumentCatalog`` keeps a SQLite index of the site's documents (name, path,
+library, modified time) so that:
+
+* listing questions ("list the files in Shared Documents", "find any Word
+  documents") are answered locally by :func:`answer_locally`;
+* questions about a named document are rewritten by :func:`rewrite_query` to
+  the document's exact path before the run, so the agent goes straight to it.
+
+The catalog is filled from a listing file (JSON, or the CSV that SharePoint's
+"Export to CSV" produces) or from one agent run that asks for the listing as
+JSON. Refreshes are incremental: only documents that are new or have a newer
+modified time are written. Only a full listing removes documents that have
+gone. Local answers are only given while the catalog is younger than
+``max_age``; after that, questions go to the agent as before.
+
+Usage:
+    python -m sharepoint_agent.catalog refresh --from testing/fixtures/sharepoint_documents.json
+    python -m sharepoint_agent.catalog refresh --agent          # one listing run against SharePoint
+    python -m sharepoint_agent.catalog search "doc to tset"
+    python -m sharepoint_agent.catalog ask "List all documents in the Shared Documents library."
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+
+from .polling import DEFAULT_POLICY
+from .query import QueryResult, run_query
+
+DEFAULT_CATALOG_PATH = os.path.join(".cache", "catalog.db")
+DEFAULT_MAX_AGE = 24 * 3600.0
+DEFAULT_CUTOFF = 0.75
+# A match must beat the runner-up by this much, or the name is too ambiguous to rewrite.
+MIN_SCORE_GAP = 0.05
+MAX_LISTED = 50
+
+LISTING_PROMPT = (
+    "List every document you can access in the SharePoint site{since}. Reply with only a JSON array, one "
+    'object per document: {{"name": ..., "path": ..., "library": ..., "modified": ISO 8601 time}}.'
+)
+
+_SEPARATORS = re.compile(r"[\s_\-.]+")
+_QUOTED = re.compile(r"""['"‘“]([^'"’”]{2,})['"’”]""")
+_LIBRARIES = re.compile(r"\blibraries\b", re.I)
+_WORDS = re.compile(r"[a-z0-9]+")
+_NUMBERS = re.compile(r"\d+")
+# A listing question may only be made of these words plus library names, file
+# types and one quoted name fragment. Any other word ("budget", "mentions",
+# "deadline", "modified") is a topic or filter the catalog cannot answer, so
+# the question goes to the agent.
+_LISTING_TRIGGERS = {"list", "show", "find", "search", "enumerate", "what", "which"}
+_LISTING_SUBJECTS = {"document", "documents", "file", "files", "library", "libraries"}
+_LISTING_VOCABULARY = _LISTING_TRIGGERS | _LISTING_SUBJECTS | {
+    "a", "access", "all", "an", "any", "are", "available", "called", "can", "could", "do", "does", "every",
+    "exist", "exists", "for", "from", "give", "have", "has", "i", "in", "is", "kept", "me", "my", "name",
+    "named", "of", "on", "our", "please", "sharepoint", "site", "stored", "that", "the", "there", "these",
+    "those", "to", "we", "with", "you",
+}
+_EXTENSIONS = {
+    ".docx": ("word", ".docx", "docx"),
+    ".xlsx": ("excel", ".xlsx", "spreadsheet"),
+    ".pptx": ("powerpoint", ".pptx", "presentation", "slides"),
+    ".pdf": ("pdf",),
+}
+
+
+@dataclass
+class Document:
+    """One file in a SharePoint document library."""
+
+    name: str
+    path: str
+    library: str = ""
+    modified: float = 0.0
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.name)[1].lower()
+
+
+def normalize_name(name):
+    """``Travel_Policy_v3.docx`` -> ``travel policy v3``."""
+    stem = os.path.splitext(name)[0] if re.search(r"\.\w{2,5}$", name) else name
+    return _SEPARATORS.sub(" ", stem).strip().lower()
+
+
+def _timestamp(value):
+    if value in (None, ""):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip().replace("Z", "+00:00")
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, "%m/%d/%Y %I:%M %p")):
+        try:
+            parsed = parse(value)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return 0.0
+
+
+def _document(item):
+    name = item.get("name") or item.get("Name") or os.path.basename(item.get("path") or item.get("Path") or "")
+    path = item.get("path") or item.get("Path") or item.get("Item Path") or name
+    if item.get("Item Path") and not path.endswith(name):
+        path = f"{path.rstrip('/')}/{name}"
+    library = item.get("library") or item.get("Library") or ""
+    if not library:
+        parts = [part for part in path.split("/") if part]
+        library = parts[-2] if len(parts) > 1 else ""
+    return Document(name, path, library, _timestamp(item.get("modified") or item.get("Modified")))
+
+
+def parse_listing(text):
+    """Documents from a JSON listing (array, or ``{"documents": [...]}``) or a SharePoint CSV export."""
+    text = text.strip().lstrip("\ufeff")
+    if text.startswith(("[", "{")):
+        data = json.loads(text)
+        items = data.get("documents", []) if isinstance(data, dict) else data
+    else:
+        items = list(csv.DictReader(text.splitlines()))
+    return [_document(item) for item in items if isinstance(item, dict)]
+
+
+def load_listing(path):
+    with open(path, encoding="utf-8") as f:
+        return parse_listing(f.read())
+
+
+def fetch_listing(agents_client, agent_id, since=None, policy=DEFAULT_POLICY):
+    """Ask the agent for the document listing (changes after ``since`` only, if given)."""
+    since_text = ""
+    if since:
+        since_text = f" that were modified after {datetime.fromtimestamp(since, timezone.utc).isoformat()}"
+    result = run_query(agents_client, agent_id, LISTING_PROMPT.format(since=since_text), policy=policy)
+    if not result.ok or not result.answer:
+        raise RuntimeError(f"Listing run {result.status}: {result.error}")
+    start, end = result.answer.find("["), result.answer.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("The agent did not return a JSON listing")
+    return parse_listing(result.answer[start:end + 1])
+
+
+class DocumentCatalog:
+    """SQLite-backed document index with fuzzy name search."""
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents "
+            "(path TEXT PRIMARY KEY, name TEXT NOT NULL, library TEXT NOT NULL, modified REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        self._db.commit()
+        self._load()
+
+    def _load(self):
+        rows = self._db.execute("SELECT name, path, library, modified FROM documents ORDER BY path").fetchall()
+        self._documents = [Document(*row) for row in rows]
+        self._keys = [normalize_name(document.name) for document in self._documents]
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def refreshed_at(self):
+        with self._lock:
+            return self._meta("refreshed_at")
+
+    @property
+    def high_water(self):
+        """Newest modified time seen; pass it as ``since`` for an incremental refresh."""
+        with self._lock:
+            return self._meta("high_water")
+
+    def is_fresh(self, max_age=DEFAULT_MAX_AGE):
+        refreshed = self.refreshed_at
+        return bool(self._documents) and refreshed is not None and self._clock() - refreshed <= max_age
+
+    def update(self, documents, complete=False):
+        """Merge ``documents`` into the index; ``complete=True`` also drops the ones not listed.
+
+        Returns ``{"added", "updated", "removed", "unchanged"}`` counts.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            known = dict(self._db.execute("SELECT path, modified FROM documents").fetchall())
+            for document in documents:
+                previous = known.get(document.path)
+                if previous is not None and previous >= document.modified:
+                    counts["unchanged"] += 1
+                    continue
+                counts["updated" if previous is not None else "added"] += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO documents (path, name, library, modified) VALUES (?, ?, ?, ?)",
+                    (document.path, document.name, document.library, document.modified),
+                )
+            if complete:
+                gone = set(known) - {document.path for document in documents}
+                self._db.executemany("DELETE FROM documents WHERE path = ?", [(path,) for path in gone])
+                counts["removed"] = len(gone)
+            newest = max([document.modified for document in documents] + [self._meta("high_water") or 0.0])
+            self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                 [("refreshed_at", self._clock()), ("high_water", newest)])
+            self._db.commit()
+            self._load()
+        return counts
+
+    def documents(self, library=None, extension=None, contains=None):
+        """Documents filtered by library, extension and a name substring (all case-insensitive)."""
+        with self._lock:
+            documents = list(self._documents)
+        if library:
+            documents = [d for d in documents if d.library.lower() == library.lower()]
+        if extension:
+            documents = [d for d in documents if d.extension == extension]
+        if contains:
+            documents = [d for d in documents if contains.lower() in d.name.lower()]
+        return documents
+
+    def libraries(self):
+        with self._lock:
+            return sorted({document.library for document in self._documents if document.library})
+
+    def search(self, text, limit=5, cutoff=DEFAULT_CUTOFF):
+        """Fuzzy name search: ``[(score, Document)]``, best first, scores from 0 to 1.
+
+        The score averages character similarity (which tolerates typos) with
+        the share of the searched words found in the name (which tells
+        "report q2" from "report q1").
+        """
+        wanted = normalize_name(text)
+        if not wanted:
+            return []
+        words = set(wanted.split())
+        with self._lock:
+            candidates = list(zip(self._keys, self._documents))
+        numbers = {int(number) for number in _NUMBERS.findall(wanted)}
+        scored = []
+        for key, document in candidates:
+            if key == wanted:
+                scored.append((1.0, document))
+                continue
+            # Years, quarters and versions must match exactly: "q3 2025" is never the Q1 2025 report.
+            if not numbers <= {int(number) for number in _NUMBERS.findall(key)}:
+                continue
+            recall = len(words & set(key.split())) / len(words)
+            # Character similarity alone contributes at most half the score.
+            if recall == 0 and cutoff > 0.5:
+                continue
+            similarity = SequenceMatcher(None, wanted, key).ratio()
+            if wanted in key:
+                similarity = max(similarity, 0.9 * len(wanted) / len(key) + 0.1)
+            score = (similarity + recall) / 2
+            if score >= cutoff:
+                scored.append((score, document))
+        scored.sort(key=lambda item: (-item[0], item[1].path))
+        return scored[:limit]
+
+    def match(self, name, cutoff=DEFAULT_CUTOFF):
+        """The best :meth:`search` hit for ``name``, or ``None`` if there is none or it is not clear-cut."""
+        hits = self.search(name, limit=2, cutoff=cutoff)
+        if not hits:
+            return None
+        if len(hits) > 1 and hits[0][0] < 1.0 and hits[0][0] - hits[1][0] < MIN_SCORE_GAP:
+            return None
+        return hits[0][1]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_listing_query(query, libraries=()):
+    """True for questions that only ask which documents exist.
+
+    Apart from library names in ``libraries``, file types and a quoted name
+    fragment, every word must be listing vocabulary ("list all Word documents
+    in Engineering"). Questions about content or with filters the catalog
+    does not know ("which files discuss Q2 revenue?") are not listings.
+    """
+    text = _QUOTED.sub(" ", query).lower()
+    for library in sorted(libraries, key=len, reverse=True):
+        text = text.replace(library.lower(), " ")
+    words = _WORDS.findall(text)
+    file_types = {word for names in _EXTENSIONS.values() for name in names for word in _WORDS.findall(name)}
+    if not (_LISTING_TRIGGERS & set(words) and _LISTING_SUBJECTS & set(words)):
+        return False
+    return all(word in _LISTING_VOCABULARY or word in file_types for word in words)
+
+
+def _format_listing(documents, catalog):
+    refreshed = datetime.fromtimestamp(catalog.refreshed_at or 0, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    if not documents:
+        return f"No matching documents in the local catalog (refreshed {refreshed})."
+    lines = [f"{len(documents)} matching document(s) (local catalog, refreshed {refreshed}):"]
+    for document in documents[:MAX_LISTED]:
+        modified = datetime.fromtimestamp(document.modified, timezone.utc).strftime("%Y-%m-%d")
+        lines.append(f"- {document.name} ({document.library}, modified {modified}): {document.path}")
+    if len(documents) > MAX_LISTED:
+        lines.append(f"... and {len(documents) - MAX_LISTED} more")
+    return "\n".join(lines)
+
+
+def answer_locally(catalog, query, max_age=DEFAULT_MAX_AGE):
+    """Answer a listing question from the catalog, or return ``None`` to ask the agent.
+
+    Library names, file types ("Word documents", ".pdf") and a quoted name
+    fragment in the question narrow the list.
+    """
+    if not catalog.is_fresh(max_age) or not is_listing_query(query, catalog.libraries()):
+        return None
+    lowered = query.lower()
+    if _LIBRARIES.search(query):
+        counts = {name: len(catalog.documents(name)) for name in catalog.libraries()}
+        answer = f"{len(counts)} document libraries (local catalog):\n" + "\n".join(
+            f"- {name} ({count} documents)" for name, count in counts.items())
+        return QueryResult(query=query, status="completed", answer=answer, cached=True)
+    library = next((name for name in catalog.libraries() if name.lower() in lowered), None)
+    extension = next((ext for ext, words in _EXTENSIONS.items()
+                      if any(re.search(rf"(?<!\w){re.escape(word)}\b", lowered) for word in words)), None)
+    quoted = _QUOTED.search(query)
+    documents = catalog.documents(library, extension, quoted.group(1) if quoted else None)
+    return QueryResult(query=query, status="completed", answer=_format_listing(documents, catalog), cached=True)
+
+
+def rewrite_query(catalog, query, document_name=None, cutoff=DEFAULT_CUTOFF):
+    """Point a question about a named document at its exact path.
+
+    The name is ``document_name`` or the first quoted string in ``query``.
+    Returns ``(query, document)``; the query is unchanged and ``document`` is
+    ``None`` when nothing in the catalog matches.
+    """
+    names = [document_name] if document_name else [match.group(1) for match in _QUOTED.finditer(query)]
+    for name in names:
+        document = catalog.match(name, cutoff=cutoff)
+        if document is not None:
+            if name in query:
+                return query.replace(name, document.path, 1), document
+            return f"{query} (Document path: {document.path})", document
+    return query, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain and query the local SharePoint document catalog.")
+    parser.add_argument("--catalog", default=os.environ.get("SHAREPOINT_AGENT_CATALOG", DEFAULT_CATALOG_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="update the catalog")
+    source = refresh.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from", dest="listing", help="JSON or CSV document listing")
+    source.add_argument("--agent", action="store_true", help="ask the SharePoint agent for the listing")
+    refresh.add_argument("--full", action="store_true", help="full listing: also remove documents not listed")
+    refresh.add_argument("--fake", action="store_true", help="with --agent, use the fake client and fixture")
+    search = commands.add_parser("search", help="fuzzy search by document name")
+    search.add_argument("text")
+    listing = commands.add_parser("list", help="list documents")
+    listing.add_argument("--library")
+    ask = commands.add_parser("ask", help="show how a question would be answered or rewritten")
+    ask.add_argument("query")
+    args = parser.parse_args(argv)
+
+    with DocumentCatalog(args.catalog) as catalog:
+        if args.command == "refresh":
+            started = time.perf_counter()
+            if args.listing:
+                counts = catalog.update(load_listing(args.listing), complete=True)
+            else:
+                since = None if args.full else catalog.high_water
+                counts = catalog.update(_agent_listing(args.fake, since), complete=args.full or since is None)
+            print(f"📚 {len(catalog)} documents ({counts['added']} added, {counts['updated']} updated, "
+                  f"{counts['removed']} removed) in {time.perf_counter() - started:.2f}s")
+        elif args.command == "search":
+            for score, document in catalog.search(args.text):
+                print(f"{score:5.2f}  {document.path}")
+        elif args.command == "list":
+            for document in catalog.documents(args.library):
+                print(f"{document.library:<20} {document.path}")
+        else:
+            local = answer_locally(catalog, args.query)
+            if local is not None:
+                print(f"⚡ Answered locally:\n{local.answer}")
+            else:
+                rewritten, document = rewrite_query(catalog, args.query)
+                print(f"🤖 Sent to the agent as: {rewritten}" if document else "🤖 Sent to the agent unchanged")
+    return 0
+
+
+def _agent_listing(fake, since):
+    from .pool import AgentPool
+
+    if fake:
+        from .fake import FakeAgentsClient
+
+        fixture = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "testing", "fixtures", "sharepoint_documents.json")
+        with open(fixture, encoding="utf-8") as f:
+            listing = f.read()
+        agents_client, model, tools, closer = FakeAgentsClient(responder=lambda query: listing), "fake-model", [], None
+    else:
+        from dotenv import load_dotenv
+
+        from .client import create_project_client, sharepoint_tool_definitions
+        from .config import load_settings
+
+        load_dotenv()
+        settings = load_settings()
+        closer = create_project_client(settings)
+        agents_client, model, tools = closer.agents, settings.model_deployment_name, sharepoint_tool_definitions(settings)
+    try:
+        with AgentPool(agents_client) as pool, \
+                pool.agent(model, "You list SharePoint documents as JSON.", tools) as agent:
+            return fetch_listing(agents_client, agent.id, since=since)
+    finally:
+        if closer is not None:
+            closer.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+On-disk checkpoints for resumable batches.
+
+A batch that crashes or is stopped partway through used to start again from
+the first question, paying again for every run that had already finished.
+``Checkpoint`` keeps an append-only JSONL log with two kinds of line:
+
+* ``{"id": ..., "query": ..., "thread_id": ..., "run_id": ...}`` when a run
+  is created;
+* ``{"id": ..., "result": {...}}`` when the question has finished.
+
+When a batch is restarted with the same log, completed questions are
+skipped and their logged results are returned. Questions whose run was still
+in flight are re-attached: their run id is polled instead of asking again.
+Everything else, including questions that finished without an answer, runs
+as normal.
+
+Only ids, an 8-byte hash of each question and file offsets are kept in
+memory; the query text, run ids and results are read back from the log when
+they are needed, so the log can cover very large batches. A line cut short by
+a crash is dropped when the log is opened.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+
+from .polling import DEFAULT_POLICY
+from .query import QueryResult, run_query
+
+
+def _digest(query):
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=8).digest()
+
+
+class Checkpoint:
+    """Append-only log of started runs and finished questions, keyed by query id."""
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped = 0
+        self.reattached = 0
+        # query id -> (question hash, offset of the line holding the details)
+        self._done = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, "ab")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb+") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write from a crash: drop it so the next append starts on a fresh line.
+                    f.truncate(offset)
+                    break
+                try:
+                    self._index(json.loads(line), offset)
+                except ValueError:
+                    pass
+                offset += len(line)
+
+    def _index(self, record, offset):
+        key = record["id"]
+        if "result" in record:
+            self._in_flight.pop(key, None)
+            if record["result"]["status"] == "completed":
+                self._done[key] = (_digest(record["result"]["query"]), offset)
+            else:
+                self._done.pop(key, None)
+        else:
+            self._in_flight[key] = (_digest(record["query"]), offset)
+
+    def _read(self, offset):
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _append(self, record):
+        line = (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(line)
+            self._file.flush()
+            self._index(record, offset)
+
+    def is_done(self, query_id, query):
+        """True if ``query`` already completed under ``query_id``."""
+        with self._lock:
+            done = self._done.get(str(query_id))
+        return done is not None and done[0] == _digest(query)
+
+    def result(self, query_id):
+        """The logged :class:`QueryResult` of a completed question (``cached`` is set)."""
+        with self._lock:
+            _, offset = self._done[str(query_id)]
+            data = self._read(offset)["result"]
+        data["cached"] = True
+        return QueryResult(**data)
+
+    def started(self, query_id, query, run):
+        """Record that ``run`` was created for ``query_id``."""
+        self._append({"id": str(query_id), "query": query, "thread_id": run.thread_id, "run_id": run.id})
+
+    def finished(self, query_id, result):
+        """Record the outcome of ``query_id`` (timings are left out to keep the log small)."""
+        data = asdict(result)
+        data.pop("timings", None)
+        self._append({"id": str(query_id), "result": data})
+
+    def run(self, query_id, query, runner, agents_client, policy=DEFAULT_POLICY):
+        """Return the result for ``query_id``, resuming from the log where possible.
+
+        ``runner(query, on_run=...)`` asks the question from scratch; it must
+        pass ``on_run`` on to :func:`run_query` so the new run is logged.
+        """
+        key = str(query_id)
+        if self.is_done(key, query):
+            with self._lock:
+                self.skipped += 1
+            return self.result(key)
+        attached = None
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None and in_flight[0] == _digest(query):
+                attached = self._read(in_flight[1])
+                self.reattached += 1
+        result = None
+        if attached is not None and attached["query"] == query:
+            result = run_query(agents_client, None, query, policy=policy,
+                               thread_id=attached["thread_id"], run_id=attached["run_id"])
+            if not result.ok:
+                # The run expired or was lost while we were away: ask again.
+                result = None
+        if result is None:
+            result = runner(query, on_run=lambda run: self.started(key, query, run))
+        self.finished(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"completed": len(self._done), "in_flight": len(self._in_flight),
+                    "skipped": self.skipped, "reattached": self.reattached}
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
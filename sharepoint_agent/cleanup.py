@@ -0,0 +1,235 @@
+"""
+Garbage collection of orphaned agents and threads.
+
+An exception between ``create_agent`` and ``delete_agent`` leaks the agent, and
+one-shot query threads are never deleted. Leaked resources slow down list
+calls and count against quota. Everything this package creates is tagged
+through :func:`~sharepoint_agent.tags.resource_tags`: a ``created_by``
+metadata key plus the creating host and process id. ``collect`` lists agents
+and threads page by page and deletes the stale ones concurrently with bounded
+parallelism.
+
+A resource is stale when it carries our tag (or, for agents created before
+tagging existed, its name starts with one of ``prefixes``), it is older than
+``max_age``, it was created on this host, and the process that created it is
+no longer running. The last two checks keep a long-running daemon's pooled
+agent and session threads alive. Whether a process on another host is still
+running cannot be checked, so resources from other hosts (and untagged ones,
+whose host is unknown) are only collected with ``all_hosts=True``
+(``--all-hosts``), by age alone.
+
+Usage:
+    python -m sharepoint_agent.cleanup --dry-run
+    python -m sharepoint_agent.cleanup --max-age 3600 --parallelism 8
+    python -m sharepoint_agent.cleanup --all-hosts --max-age 86400   # no daemon may be running anywhere
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List
+
+from .tags import CREATED_BY, CREATED_BY_KEY, hostname
+
+DEFAULT_PREFIXES = ("sharepoint-", "diagnostic-")
+DEFAULT_MAX_AGE = 3600.0
+DEFAULT_PARALLELISM = 8
+PAGE_SIZE = 100
+
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_INVALID_PARAMETER = 87
+_STILL_ACTIVE = 259
+
+
+def _created_at(item):
+    value = getattr(item, "created_at", None)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value) if value is not None else None
+
+
+def _windows_process_alive(pid):
+    # os.kill on Windows terminates the process whatever the signal, so ask the kernel instead.
+    import ctypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return False if ctypes.get_last_error() == _ERROR_INVALID_PARAMETER else None
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return None
+        return code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _process_alive(pid):
+    """True/False if process ``pid`` on this host is running or gone, ``None`` if that cannot be told."""
+    if os.name == "nt":
+        try:
+            return _windows_process_alive(pid)
+        except (ImportError, AttributeError, OSError):
+            return None
+    if os.name != "posix":
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:  # PermissionError: it exists but belongs to someone else
+        return True
+    return True
+
+
+def is_ours(item, prefixes=DEFAULT_PREFIXES):
+    """True if ``item`` was created by this package (tag, or legacy name prefix)."""
+    metadata = getattr(item, "metadata", None) or {}
+    if metadata.get(CREATED_BY_KEY) == CREATED_BY:
+        return True
+    name = getattr(item, "name", None) or ""
+    return bool(prefixes) and name.startswith(tuple(prefixes))
+
+
+def is_stale(item, max_age=DEFAULT_MAX_AGE, now=None, all_hosts=False):
+    """True if ``item`` is older than ``max_age`` and its creating process is gone.
+
+    Items from other hosts, or without a host tag, are never stale unless
+    ``all_hosts`` is set; then their age alone decides.
+    """
+    created = _created_at(item)
+    if created is None or (now or time.time()) - created < max_age:
+        return False
+    metadata = getattr(item, "metadata", None) or {}
+    if metadata.get("host") != hostname():
+        return all_hosts
+    pid = metadata.get("pid")
+    if not pid or not pid.isdigit():
+        return all_hosts
+    # A process we cannot check is treated as running.
+    return int(pid) != os.getpid() and _process_alive(int(pid)) is False
+
+
+@dataclass
+class CollectResult:
+    """What one collection pass found and removed."""
+
+    kind: str
+    scanned: int = 0
+    stale: int = 0
+    deleted: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _collect(kind, items, delete, prefixes, max_age, parallelism, dry_run, all_hosts):
+    result = CollectResult(kind)
+    now = time.time()
+    stale = []
+    for item in items:
+        result.scanned += 1
+        if is_ours(item, prefixes) and is_stale(item, max_age, now, all_hosts):
+            stale.append(item.id)
+    result.stale = len(stale)
+    if dry_run or not stale:
+        return result
+
+    def _delete(item_id):
+        try:
+            delete(item_id)
+            return None
+        except Exception as e:
+            return f"{item_id}: {e}"
+
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        for error in pool.map(_delete, stale):
+            if error is None:
+                result.deleted += 1
+            else:
+                result.errors.append(error)
+    return result
+
+
+def collect_agents(agents_client, prefixes=DEFAULT_PREFIXES, max_age=DEFAULT_MAX_AGE,
+                   parallelism=DEFAULT_PARALLELISM, dry_run=False, all_hosts=False):
+    """Delete stale agents created by this package."""
+    agents = agents_client.list_agents(limit=PAGE_SIZE, order="asc")
+    return _collect("agents", agents, agents_client.delete_agent, prefixes, max_age, parallelism, dry_run,
+                    all_hosts)
+
+
+def collect_threads(agents_client, max_age=DEFAULT_MAX_AGE, parallelism=DEFAULT_PARALLELISM, dry_run=False,
+                    all_hosts=False):
+    """Delete stale threads created by this package (threads have no name, so only tags count)."""
+    threads = agents_client.threads.list(limit=PAGE_SIZE, order="asc")
+    return _collect("threads", threads, agents_client.threads.delete, (), max_age, parallelism, dry_run,
+                    all_hosts)
+
+
+def collect(agents_client, prefixes=DEFAULT_PREFIXES, max_age=DEFAULT_MAX_AGE, parallelism=DEFAULT_PARALLELISM,
+            dry_run=False, threads=True, all_hosts=False):
+    """Collect agents and (optionally) threads; returns a list of :class:`CollectResult`."""
+    results = [collect_agents(agents_client, prefixes, max_age, parallelism, dry_run, all_hosts)]
+    if threads:
+        results.append(collect_threads(agents_client, max_age, parallelism, dry_run, all_hosts))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete orphaned SharePoint agents and threads.")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="minimum age in seconds")
+    parser.add_argument("--prefix", action="append", dest="prefixes",
+                        help=f"agent name prefix to treat as ours (default: {', '.join(DEFAULT_PREFIXES)})")
+    parser.add_argument("--parallelism", type=int, default=DEFAULT_PARALLELISM, help="concurrent deletes")
+    parser.add_argument("--no-threads", action="store_true", help="only collect agents")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    parser.add_argument("--all-hosts", action="store_true",
+                        help="also delete old resources created on other hosts or untagged (by age alone; "
+                             "this removes the agent of a daemon running elsewhere)")
+    parser.add_argument("--fake", action="store_true", help="run against the local fake agents client")
+    args = parser.parse_args(argv)
+
+    closer = None
+    if args.fake:
+        from .fake import FakeAgentsClient
+
+        agents_client = FakeAgentsClient()
+    else:
+        from dotenv import load_dotenv
+
+        from .client import create_project_client
+        from .config import load_settings
+
+        load_dotenv()
+        try:
+            settings = load_settings()
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        closer = create_project_client(settings)
+        agents_client = closer.agents
+
+    started = time.perf_counter()
+    try:
+        results = collect(agents_client, tuple(args.prefixes or DEFAULT_PREFIXES), args.max_age,
+                          args.parallelism, args.dry_run, threads=not args.no_threads, all_hosts=args.all_hosts)
+    finally:
+        if closer is not None:
+            closer.close()
+
+    verb = "would delete" if args.dry_run else "deleted"
+    for result in results:
+        count = result.stale if args.dry_run else result.deleted
+        print(f"🧹 {result.kind}: scanned {result.scanned}, stale {result.stale}, {verb} {count}")
+        for error in result.errors:
+            print(f"   ⚠️ {error}")
+    print(f"⏱️ Done in {time.perf_counter() - started:.2f}s")
+    return 1 if any(result.errors for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Single command-line entry point: ``python -m sharepoint_agent <command>``.
+
+The Azure SDK (``azure.ai.projects``, ``azure.ai.agents.models`` and
+``azure.identity``) takes around two seconds to import. The scripts import it
+before they even look at ``.env``, so a typo in a variable name, ``--help``
+and a cached answer all pay for it. Here ``.env`` is loaded and the required
+variables are checked before anything else. Settings, the cache key and the
+catalog lookup are worked out from the environment alone. The SDK is only
+imported once a command really has to call Azure, so ``--help``, ``check``
+and cached answers return in a fraction of a second.
+
+``--timing`` (always on for ``check``) prints how long startup, the SDK
+import and the whole command took. For a per-module breakdown, run
+``python -X importtime -m sharepoint_agent ...``.
+
+The long-running modes are available as subcommands too. Each is imported
+only when it is invoked.
+
+Usage:
+    python -m sharepoint_agent check
+    python -m sharepoint_agent ask "What documents are available?"
+    python -m sharepoint_agent --timing ask --fake "Summarize 'Doc to test.docx'"
+    python -m sharepoint_agent diagnose --run-timeout 60
+    python -m sharepoint_agent jsonl queries.jsonl -o results.jsonl   # any module below, same options
+"""
+
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from .config import REQUIRED_VARS, Settings, load_settings, missing_vars
+
+
+def _process_age():
+    """Seconds since the interpreter started, where the OS exposes it (Linux), else ``None``."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_PYTHON_STARTUP = _process_age()
+_STARTED = time.perf_counter()
+
+# Subcommands that hand over to a module's own main(); the module is imported on use.
+MODULES = {
+    "daemon": ("sharepoint_agent.daemon", "run the warm query daemon"),
+    "client": ("sharepoint_agent.daemon_client", "ask a running daemon"),
+    "jsonl": ("sharepoint_agent.jsonl", "run questions from a JSONL file"),
+    "loadtest": ("sharepoint_agent.loadtest", "ramp concurrency and measure throughput"),
+    "cleanup": ("sharepoint_agent.cleanup", "delete orphaned agents and threads"),
+    "catalog": ("sharepoint_agent.catalog", "refresh or query the local document catalog"),
+    "cassette": ("sharepoint_agent.cassette", "summarize a recorded HTTP cassette"),
+    "usage": ("sharepoint_agent.usage", "report token usage from a results file"),
+}
+
+
+class Startup:
+    """Wall-clock marks measured from process start (or from CLI import where that is unknown)."""
+
+    def __init__(self):
+        self.started = _STARTED - (_PYTHON_STARTUP or 0.0)
+        self.phases = {}
+        if _PYTHON_STARTUP is not None:
+            self.phases["python + package import"] = _PYTHON_STARTUP
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def mark(self, name):
+        """Record the time from start until now as ``name``."""
+        self.phases[name] = time.perf_counter() - self.started
+
+    def report(self, out=sys.stderr):
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.phases.items()]
+        parts.append(f"total {time.perf_counter() - self.started:.2f}s")
+        print(f"⏱️ {', '.join(parts)}", file=out)
+
+
+def _load_env(startup):
+    with startup.phase("dotenv"):
+        try:
+            from dotenv import load_dotenv
+        except ImportError:  # python-dotenv is optional when the variables are exported
+            return
+        load_dotenv()
+
+
+def _require_settings():
+    """Settings from the environment, or ``None`` after printing what is missing."""
+    missing = missing_vars()
+    if missing:
+        print(f"❌ Missing required environment variables: {missing}")
+        print("Please check your .env file and ensure all required variables are set.")
+        return None
+    return load_settings()
+
+
+def _fake_settings():
+    return Settings("https://fake.local", "fake-model", "fake-connection")
+
+
+def _check(args, startup):
+    """Validate the configuration without importing the SDK or touching the network."""
+    missing = missing_vars()
+    for var in REQUIRED_VARS:
+        print(f"{'❌' if var in missing else '✅'} {var}{' is not set' if var in missing else ''}")
+    if not missing:
+        settings = load_settings()
+        print(f"📁 DOCUMENT_NAME: {settings.document_name}")
+    from .cache import DEFAULT_CACHE_PATH
+    from .catalog import DEFAULT_CATALOG_PATH
+
+    for label, path in (("Answer cache", os.environ.get("ANSWER_CACHE_PATH", DEFAULT_CACHE_PATH)),
+                        ("Document catalog", os.environ.get("SHAREPOINT_AGENT_CATALOG", DEFAULT_CATALOG_PATH))):
+        print(f"{'📦' if os.path.exists(path) else '▫️'} {label}: {path}{'' if os.path.exists(path) else ' (none yet)'}")
+    return 1 if missing else 0
+
+
+def _ask(args, startup):
+    settings = _fake_settings() if args.fake else _require_settings()
+    if settings is None:
+        return 1
+    query = args.question
+
+    from .cache import DEFAULT_CACHE_PATH, AnswerCache
+    from .catalog import DEFAULT_CATALOG_PATH
+
+    catalog_path = os.environ.get("SHAREPOINT_AGENT_CATALOG", DEFAULT_CATALOG_PATH)
+    if os.path.exists(catalog_path):
+        from .catalog import DocumentCatalog, answer_locally, rewrite_query
+
+        with startup.phase("catalog"), DocumentCatalog(catalog_path) as catalog:
+            local = answer_locally(catalog, query)
+            if local is None and catalog.is_fresh():
+                query, _ = rewrite_query(catalog, query)
+        if local is not None:
+            print("📚 Answered from the local document catalog")
+            print(f"🤖 {local.answer}")
+            return 0
+
+    cache = None if args.no_cache else AnswerCache(path=os.environ.get("ANSWER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    try:
+        return _answer(args, startup, settings, query, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _answer(args, startup, settings, query, cache):
+    from .cache import cache_key
+
+    key = cache_key(settings.sharepoint_connection_id, settings.model_deployment_name, settings.instructions, query)
+    answer = cache.get(key) if cache is not None else None
+    if answer is not None:
+        print("⚡ Answer served from cache (use --no-cache to query SharePoint again)")
+        print(f"🤖 {answer}")
+        return 0
+
+    startup.mark("startup")
+    from .pool import AgentPool
+    from .query import run_query
+
+    closer = None
+    try:
+        if args.fake:
+            from .fake import FakeAgentsClient
+
+            agents_client, tools = FakeAgentsClient(latency=args.latency), None
+        else:
+            from .client import create_project_client, sharepoint_tool_definitions
+
+            with startup.phase("sdk import + client"):
+                closer = create_project_client(settings)
+                tools = sharepoint_tool_definitions(settings)
+            agents_client = closer.agents
+        print(f"🔄 Asking: {query}")
+        with startup.phase("agent run"), AgentPool(agents_client) as pool, \
+                pool.agent(settings.model_deployment_name, settings.instructions, tools) as agent:
+            result = run_query(agents_client, agent.id, query)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        if closer is not None:
+            closer.close()
+
+    if not result.ok:
+        print(f"❌ Run {result.status}: {result.error}")
+        return 1
+    if cache is not None and result.answer:
+        cache.put(key, result.answer)
+    print(f"🤖 {result.answer}")
+    if result.usage:
+        print(f"🪙 {result.usage['total_tokens']} tokens ({result.usage['prompt_tokens']} prompt)")
+    return 0
+
+
+def _diagnose(args, startup):
+    settings = _fake_settings() if args.fake else _require_settings()
+    if settings is None:
+        return 1
+    from .diagnostics import default_probes, print_diagnosis, print_report, run_probes
+
+    closer = None
+    startup.mark("startup")
+    if args.fake:
+        from .fake import FakeAgentsClient
+
+        probes = default_probes(FakeAgentsClient(latency=1.0), settings, timeout=args.timeout,
+                                run_timeout=args.run_timeout)
+    else:
+        from .client import create_project_client, sharepoint_tool_definitions
+        from .credentials import get_credential
+
+        with startup.phase("sdk import + client"):
+            try:
+                project_client = create_project_client(settings)
+            except Exception as e:
+                print(f"❌ Error creating AIProjectClient: {e}")
+                return 1
+        closer = project_client
+        probes = default_probes(project_client.agents, settings, project_client=project_client,
+                                credential=get_credential(), tools=lambda: sharepoint_tool_definitions(settings),
+                                timeout=args.timeout, run_timeout=args.run_timeout)
+
+    print(f"🔍 Running {len(probes)} probes in parallel...\n")
+    started = time.perf_counter()
+    try:
+        results = run_probes(probes)
+    finally:
+        if closer is not None:
+            closer.close()
+    healthy = print_report(results, time.perf_counter() - started)
+    print_diagnosis(results)
+    return 0 if healthy else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m sharepoint_agent",
+        description="SharePoint AI agent tools. The Azure SDK is only imported by commands that call Azure.",
+    )
+    parser.add_argument("--timing", action="store_true", help="print startup and SDK import time to stderr")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    check = commands.add_parser("check", help="validate .env without calling Azure")
+    check.set_defaults(handler=_check)
+
+    ask = commands.add_parser("ask", help="ask one question (cached answers skip the SDK entirely)")
+    ask.add_argument("question")
+    ask.add_argument("--no-cache", action="store_true", help="ignore cached answers and run the agent")
+    ask.add_argument("--fake", action="store_true", help="use the local fake agents client")
+    ask.add_argument("--latency", type=float, default=1.0, help="fake run latency in seconds")
+    ask.set_defaults(handler=_ask)
+
+    diagnose = commands.add_parser("diagnose", help="run the connection health probes in parallel")
+    diagnose.add_argument("--timeout", type=float, default=30.0, help="timeout for lookup probes (s)")
+    diagnose.add_argument("--run-timeout", type=float, default=90.0, help="timeout for run probes (s)")
+    diagnose.add_argument("--fake", action="store_true", help="probe the local fake agents client")
+    diagnose.set_defaults(handler=_diagnose)
+
+    for name, (_, description) in MODULES.items():
+        commands.add_parser(name, help=description, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    startup = Startup()
+    timing = "--timing" in argv[:1]
+    if timing:
+        argv = argv[1:]
+
+    if argv and argv[0] in MODULES:
+        import importlib
+
+        _load_env(startup)
+        with startup.phase("import"):
+            module = importlib.import_module(MODULES[argv[0]][0])
+        try:
+            return module.main(argv[1:])
+        finally:
+            if timing:
+                startup.report()
+
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        build_parser().print_help()
+        return 0
+    _load_env(startup)
+    try:
+        return args.handler(args, startup)
+    finally:
+        if timing or args.command == "check":
+            startup.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""
+Construction of the Azure client and SharePoint tool for long-running modes.
+
+The Azure SDK is imported inside these functions so that modules which only
+need the fake client (benchmarks, offline tests) never pay for it.
+"""
+
+from .cassette import client_options
+from .credentials import get_credential
+
+
+def create_project_client(settings):
+    """Return an ``AIProjectClient`` for ``settings`` using the shared credential.
+
+    Traffic is recorded or replayed when a cassette is configured (see
+    :mod:`sharepoint_agent.cassette`).
+    """
+    from azure.ai.projects import AIProjectClient
+
+    return AIProjectClient(**client_options(settings.project_endpoint, get_credential()))
+
+
+def sharepoint_tool_definitions(settings):
+    """Return the tool definitions for the configured SharePoint connection."""
+    return connection_tool_definitions(settings.sharepoint_connection_id)
+
+
+def connection_tool_definitions(connection_id):
+    """Return the SharePoint tool definitions for ``connection_id``."""
+    from azure.ai.agents.models import SharepointTool
+
+    return SharepointTool(connection_id=connection_id).definitions
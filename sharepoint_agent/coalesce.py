@@ -0,0 +1,86 @@
+"""
+Single-flight coalescing of identical in-flight queries.
+
+When many users ask the same question at the same moment, each request would
+start its own agent run against the same SharePoint document. ``SingleFlight``
+lets the first caller for a key do the work while concurrent callers with the
+same key wait for it and receive the same outcome, errors included. Once the
+call finishes the key is released, so later requests start a fresh run (put an
+:class:`~sharepoint_agent.cache.AnswerCache` in front to reuse answers for
+longer).
+"""
+
+import threading
+
+from .cache import normalize_query
+from .polling import DEFAULT_POLICY
+from .query import run_query
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return ``fn(*args, **kwargs)``, sharing one call among concurrent callers of ``key``.
+
+        Followers get the leader's return value (the same object) or have the
+        leader's exception raised in their own thread.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+def coalesced_run_query(flight, agents_client, agent_id, query, policy=DEFAULT_POLICY, key=None):
+    """:func:`run_query` that shares one run among concurrent identical questions.
+
+    ``key`` defaults to the agent id plus the normalized query text. Errors
+    are part of the returned :class:`QueryResult`, so followers see them too.
+    """
+    key = key or (agent_id, normalize_query(query))
+    return flight.do(key, run_query, agents_client, agent_id, query, policy=policy)
@@ -0,0 +1,40 @@
+"""
+Environment-driven settings shared by the scripts and long-running modes.
+"""
+
+import os
+from dataclasses import dataclass
+
+REQUIRED_VARS = ["PROJECT_ENDPOINT", "MODEL_DEPLOYMENT_NAME", "SHAREPOINT_CONNECTION_ID"]
+DEFAULT_INSTRUCTIONS = "You are a helpful SharePoint assistant that can access and analyze documents."
+
+
+@dataclass
+class Settings:
+    """The values the scripts read from ``.env``."""
+
+    project_endpoint: str
+    model_deployment_name: str
+    sharepoint_connection_id: str
+    document_name: str = "your-document.docx"
+    instructions: str = DEFAULT_INSTRUCTIONS
+
+
+def missing_vars(environ=None):
+    """Return the required variables that are unset or empty."""
+    environ = os.environ if environ is None else environ
+    return [var for var in REQUIRED_VARS if not environ.get(var)]
+
+
+def load_settings(environ=None):
+    """Build :class:`Settings` from the environment (after ``load_dotenv``)."""
+    environ = os.environ if environ is None else environ
+    missing = missing_vars(environ)
+    if missing:
+        raise KeyError(f"Missing required environment variables: {missing}")
+    return Settings(
+        project_endpoint=environ["PROJECT_ENDPOINT"],
+        model_deployment_name=environ["MODEL_DEPLOYMENT_NAME"],
+        sharepoint_connection_id=environ["SHAREPOINT_CONNECTION_ID"],
+        document_name=environ.get("DOCUMENT_NAME", "your-document.docx"),
+    )
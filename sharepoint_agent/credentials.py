@@ -0,0 +1,248 @@
+"""
+Shared Azure credential with a persistent access-token cache.
+
+Every script used to build its own ``DefaultAzureCredential()``, so each new
+process walked the whole credential chain and fetched a fresh token before
+doing any useful work. ``get_credential()`` instead:
+
+* resolves the working credential source once and remembers its name on disk,
+  so later processes construct that credential directly;
+* caches access tokens in a user-only file, keyed by credential source,
+  signed-in account, tenant and scope, and reuses them until they are within
+  ``refresh_margin`` seconds of expiry. Signing in as someone else (``az
+  login``, a different ``AZURE_CLIENT_ID``) therefore never reuses the
+  previous identity's token, and a token the service rejects with 401 is
+  dropped (see :meth:`CachedCredential.on_response`);
+* returns the same instance to every caller in the process.
+
+Set ``SHAREPOINT_AGENT_TOKEN_CACHE=0`` to disable the on-disk cache.
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_REFRESH_MARGIN = 300.0
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sharepoint-agent")
+
+# The DefaultAzureCredential sources used with this repo, in its order except that
+# managed identity comes last: off Azure its endpoint probe can take seconds, and
+# the source that works is remembered after the first run anyway.
+CREDENTIAL_SOURCES = (
+    "environment",
+    "workload_identity",
+    "azure_cli",
+    "azure_developer_cli",
+    "azure_powershell",
+    "managed_identity",
+)
+
+
+def _azure_cli_account():
+    """``(user, tenant)`` of the Azure CLI's default subscription, from its profile file."""
+    config_dir = os.environ.get("AZURE_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".azure")
+    try:
+        # The CLI writes this file with a byte order mark.
+        with open(os.path.join(config_dir, "azureProfile.json"), encoding="utf-8-sig") as f:
+            subscriptions = json.load(f).get("subscriptions", [])
+    except (OSError, ValueError, AttributeError):
+        return "", ""
+    for subscription in subscriptions:
+        if subscription.get("isDefault"):
+            return (subscription.get("user") or {}).get("name", ""), subscription.get("tenantId", "")
+    return "", ""
+
+
+def _account(source):
+    """``(account, tenant)`` that ``source`` signs in as, as far as it can be told without a token."""
+    env = os.environ
+    if source == "azure_cli":
+        return _azure_cli_account()
+    if source == "environment":
+        return env.get("AZURE_CLIENT_ID") or env.get("AZURE_USERNAME", ""), env.get("AZURE_TENANT_ID", "")
+    if source == "workload_identity":
+        return env.get("AZURE_CLIENT_ID", ""), env.get("AZURE_TENANT_ID", "")
+    if source == "managed_identity":
+        return env.get("AZURE_CLIENT_ID", "system-assigned"), ""
+    return "", ""
+
+
+def _build_source(name):
+    """Instantiate the azure-identity credential for a source name."""
+    import azure.identity as identity
+
+    factories = {
+        "environment": identity.EnvironmentCredential,
+        "workload_identity": identity.WorkloadIdentityCredential,
+        "azure_cli": identity.AzureCliCredential,
+        "azure_developer_cli": identity.AzureDeveloperCliCredential,
+        "azure_powershell": identity.AzurePowerShellCredential,
+        "managed_identity": identity.ManagedIdentityCredential,
+    }
+    return factories[name]()
+
+
+class CachedCredential:
+    """``TokenCredential`` that resolves its source once and caches tokens on disk."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, refresh_margin=DEFAULT_REFRESH_MARGIN,
+                 persist=True, sources=CREDENTIAL_SOURCES):
+        self.cache_dir = cache_dir
+        self.refresh_margin = refresh_margin
+        self.persist = persist
+        self.sources = sources
+        self.source = None
+        self.token_requests = 0
+        self._credential = None
+        self._tokens = {}
+        # _lock guards the cache itself and is never held during a network call;
+        # a lock per scope makes concurrent callers for the same token wait for one fetch.
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        if persist:
+            self._load()
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.cache_dir, "credential.json")
+
+    def get_token(self, *scopes, **kwargs):
+        """Return a cached token, refreshing it shortly before it expires."""
+        from azure.core.credentials import AccessToken
+
+        # Claims challenges (e.g. CAE) must always reach the real credential.
+        if kwargs.get("claims"):
+            return self._request(*scopes, **kwargs)[1]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault((tuple(sorted(scopes)), kwargs.get("tenant_id")),
+                                                      threading.Lock())
+        cached = self._cached(scopes, kwargs)
+        if cached is None:
+            with fetch_lock:
+                # Another caller may have fetched the token while this one waited.
+                cached = self._cached(scopes, kwargs)
+                if cached is None:
+                    source, token = self._request(*scopes, **kwargs)
+                    key = self._key(source, scopes, kwargs)
+                    with self._lock:
+                        self._tokens[key] = (token.token, token.expires_on)
+                        self._save()
+                    return token
+        return AccessToken(*cached)
+
+    def _cached(self, scopes, kwargs):
+        source = self.source
+        if source is None:
+            return None
+        key = self._key(source, scopes, kwargs)
+        with self._lock:
+            cached = self._tokens.get(key)
+        if cached and cached[1] - self.refresh_margin > time.time():
+            return cached
+        return None
+
+    @staticmethod
+    def _key(source, scopes, kwargs):
+        account, tenant = _account(source)
+        return "|".join((source, account, kwargs.get("tenant_id") or tenant, " ".join(sorted(scopes))))
+
+    def invalidate(self, token=None):
+        """Forget the cached ``token`` (a token string), or every cached token."""
+        with self._lock:
+            dropped = [key for key, value in self._tokens.items() if token is None or value[0] == token]
+            for key in dropped:
+                del self._tokens[key]
+            if dropped:
+                self._save()
+
+    def on_response(self, pipeline_response):
+        """``raw_response_hook`` for Azure clients: drop a token the service rejected with 401."""
+        if pipeline_response.http_response.status_code != 401:
+            return
+        authorization = pipeline_response.http_request.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            self.invalidate(authorization[len("Bearer "):])
+
+    def close(self):
+        if self._credential is not None and hasattr(self._credential, "close"):
+            self._credential.close()
+
+    def _request(self, *scopes, **kwargs):
+        """``(source, token)`` from the remembered source, or from the first source that works."""
+        with self._lock:
+            self.token_requests += 1
+            credential, source = self._credential, self.source
+        if credential is not None:
+            try:
+                return source, credential.get_token(*scopes, **kwargs)
+            except Exception:
+                # The remembered source stopped working (e.g. `az logout`); re-resolve.
+                with self._lock:
+                    if self._credential is credential:
+                        self._credential = None
+                        self.source = None
+
+        errors = []
+        for name in self.sources:
+            try:
+                credential = _build_source(name)
+                token = credential.get_token(*scopes, **kwargs)
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                continue
+            with self._lock:
+                self._credential = credential
+                self.source = name
+            return name, token
+
+        from azure.core.exceptions import ClientAuthenticationError
+
+        raise ClientAuthenticationError("No credential source succeeded:\n  " + "\n  ".join(errors))
+
+    def _load(self):
+        try:
+            with open(self._state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._tokens = {key: tuple(value) for key, value in state.get("tokens", {}).items()}
+        source = state.get("source")
+        if source in self.sources:
+            try:
+                self._credential = _build_source(source)
+                self.source = source
+            except Exception:
+                pass
+
+    def _save(self):
+        if not self.persist:
+            return
+        now = time.time()
+        state = {
+            "source": self.source,
+            "tokens": {key: list(value) for key, value in self._tokens.items() if value[1] > now},
+        }
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        tmp_path = f"{self._state_path}.{os.getpid()}.tmp"
+        # Tokens are secrets: the file is created readable by the current user only.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_credential():
+    """Return the process-wide :class:`CachedCredential`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            persist = os.environ.get("SHAREPOINT_AGENT_TOKEN_CACHE", "1") != "0"
+            cache_dir = os.environ.get("SHAREPOINT_AGENT_CACHE_DIR", DEFAULT_CACHE_DIR)
+            _shared = CachedCredential(cache_dir=cache_dir, persist=persist)
+        return _shared
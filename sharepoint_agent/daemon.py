@@ -0,0 +1,322 @@
+"""
+Warm, long-lived query daemon.
+
+A one-shot script pays for SDK imports, ``load_dotenv``, credential
+resolution, client construction and agent creation on every invocation. The
+daemon does all of that once and then answers questions over a local socket,
+so the per-query cost is the run itself.
+
+Protocol: newline-delimited JSON over a Unix socket (or ``host:port`` TCP on
+platforms without ``AF_UNIX``). Each request is one line::
+
+    {"op": "query", "query": "...", "stream": true, "no_cache": false, "session": "chat-42"}
+    {"op": "end_session", "session": "chat-42"}
+    {"op": "ping"} | {"op": "stats"} | {"op": "shutdown"}
+
+Queries with a ``session`` key are asked on that conversation's persistent
+thread, so follow-ups reuse the context the agent has already retrieved.
+While the SharePoint connection keeps failing, queries are answered with
+status ``rejected`` and the diagnosis instead of starting runs. With a
+document catalog, listing questions are answered locally and questions about
+a named document are rewritten to its exact path.
+
+Replies are one or more JSON lines; the last one always has
+``"event": "result"`` (or ``"error"``). With ``stream`` set, ``delta`` and
+``tool_call`` events are sent as the run progresses.
+
+Usage:
+    python -m sharepoint_agent.daemon [--address PATH|HOST:PORT] [--fake]
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import asdict
+
+from .address import default_address, parse_address
+from .breaker import REJECTED, CircuitBreaker, CircuitOpenError
+from .cache import DEFAULT_CACHE_PATH, AnswerCache, cache_key
+from .catalog import DEFAULT_CATALOG_PATH, DocumentCatalog, answer_locally, rewrite_query
+from .tags import resource_tags
+from .coalesce import SingleFlight
+from .client import create_project_client, sharepoint_tool_definitions
+from .config import Settings, load_settings
+from .polling import DEFAULT_POLICY
+from .pool import AgentPool
+from .query import QueryResult, run_query
+from .ratelimit import LimitedAgentsClient
+from .sessions import SessionManager
+from .streaming import stream_query
+
+
+class QueryService:
+    """Keeps one agents client, a warm agent pool and the answer cache alive."""
+
+    def __init__(self, agents_client, settings, tools=None, cache=None, policy=DEFAULT_POLICY, catalog=None):
+        self.agents_client = agents_client
+        self.settings = settings
+        self.tools = tools or []
+        self.cache = cache
+        self.catalog = catalog
+        self.local_answers = 0
+        self.policy = policy
+        self.pool = AgentPool(agents_client)
+        self.sessions = SessionManager(agents_client)
+        self.flight = SingleFlight()
+        self.breaker = CircuitBreaker()
+        self.started = time.time()
+        self.queries = 0
+
+    def warm(self):
+        """Create the agent up front so the first query does not pay for it."""
+        with self._agent():
+            pass
+
+    def handle(self, request, emit):
+        """Dispatch one request; ``emit`` sends a JSON-serialisable reply line."""
+        op = request.get("op", "query")
+        if op == "ping":
+            emit({"event": "result", "status": "ok"})
+        elif op == "stats":
+            emit({"event": "result", "status": "ok", **self.stats()})
+        elif op == "query":
+            self._query(request, emit)
+        elif op == "end_session":
+            ended = self.sessions.end(request.get("session"))
+            emit({"event": "result", "status": "ok" if ended else "not_found"})
+        else:
+            emit({"event": "error", "error": f"Unknown op: {op}"})
+
+    def stats(self):
+        stats = {
+            "uptime": time.time() - self.started,
+            "queries": self.queries,
+            "agents": len(self.pool),
+            "sessions": self.sessions.stats(),
+            "coalesced": self.flight.stats(),
+            "breaker": self.breaker.stats(),
+        }
+        if isinstance(self.agents_client, LimitedAgentsClient):
+            stats["rate_limit"] = self.agents_client.limiter.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if self.catalog is not None:
+            stats["catalog"] = {"documents": len(self.catalog), "local_answers": self.local_answers}
+        return stats
+
+    def close(self):
+        self.sessions.close()
+        self.pool.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.catalog is not None:
+            self.catalog.close()
+
+    def _agent(self):
+        return self.pool.agent(self.settings.model_deployment_name, self.settings.instructions, self.tools)
+
+    def _query(self, request, emit):
+        query = request.get("query")
+        if not query:
+            emit({"event": "error", "error": "Request has no query"})
+            return
+        self.queries += 1
+        session_key = request.get("session")
+        if self.catalog is not None and not session_key:
+            local = answer_locally(self.catalog, query)
+            if local is not None:
+                self.local_answers += 1
+                emit({"event": "result", **asdict(local)})
+                return
+            if self.catalog.is_fresh():
+                query, _ = rewrite_query(self.catalog, query)
+        # Within a conversation the answer depends on earlier turns, so it is not cached.
+        use_cache = self.cache is not None and not request.get("no_cache") and not session_key
+        key = cache_key(
+            self.settings.sharepoint_connection_id,
+            self.settings.model_deployment_name,
+            self.settings.instructions,
+            query,
+        )
+        if use_cache:
+            answer = self.cache.get(key)
+            if answer is not None:
+                emit({"event": "result", **asdict(QueryResult(query=query, status="completed", answer=answer, cached=True))})
+                return
+
+        try:
+            self.breaker.allow()
+        except CircuitOpenError as e:
+            emit({"event": "result", **asdict(QueryResult(query=query, status=REJECTED, error=str(e)))})
+            return
+        result = None
+        try:
+            with self._agent() as agent:
+                if session_key and request.get("stream"):
+                    with self.sessions.session(session_key) as session:
+                        result = self._stream(agent, query, emit, thread_id=session.thread_id)
+                elif session_key:
+                    result = self.sessions.ask(session_key, agent.id, query, policy=self.policy)
+                elif request.get("stream"):
+                    result = self._stream(agent, query, emit)
+                else:
+                    # Identical questions arriving together share one run (and its error, if any).
+                    result = self.flight.do(key, run_query, self.agents_client, agent.id, query,
+                                            policy=self.policy)
+        finally:
+            self.breaker.record(result)
+
+        if use_cache and result.ok and result.answer:
+            self.cache.put(key, result.answer)
+        emit({"event": "result", **asdict(result)})
+
+    def _stream(self, agent, query, emit, thread_id=None):
+        result = QueryResult(query=query, status="error")
+        try:
+            if thread_id is None:
+                thread_id = self.agents_client.threads.create(metadata=resource_tags()).id
+            result.thread_id = thread_id
+            self.agents_client.messages.create(thread_id=thread_id, role="user", content=query)
+        except Exception as e:
+            result.error = str(e)
+            return result
+
+        streamed = stream_query(
+            self.agents_client,
+            agent.id,
+            thread_id,
+            on_text=lambda text: emit({"event": "delta", "text": text}),
+            on_tool_call=lambda tool, status: emit({"event": "tool_call", "tool": tool, "status": status}),
+        )
+        result.status = streamed.status
+        result.answer = streamed.answer or None
+        result.error = streamed.error
+        result.run_id = streamed.run_id
+        result.elapsed = streamed.total_time
+        result.usage = streamed.usage
+        return result
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        lock = threading.Lock()
+
+        def emit(payload):
+            with lock:
+                self.wfile.write((json.dumps(payload) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                emit({"event": "error", "error": f"Invalid JSON: {e}"})
+                continue
+            if request.get("op") == "shutdown":
+                emit({"event": "result", "status": "ok"})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            try:
+                self.server.service.handle(request, emit)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                emit({"event": "error", "error": str(e)})
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(service, address=None):
+    """Serve ``service`` on ``address`` until a ``shutdown`` request arrives."""
+    family, bind_address = parse_address(address or default_address())
+    if family == socket.AF_UNIX:
+        directory = os.path.dirname(bind_address)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(bind_address):
+            os.remove(bind_address)
+        server = _UnixServer(bind_address, _RequestHandler)
+        os.chmod(bind_address, 0o600)
+    else:
+        server = _TCPServer(bind_address, _RequestHandler)
+    server.service = service
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.remove(bind_address)
+
+
+def build_service(settings, cache=None, catalog=None):
+    """Create the warm Azure client, SharePoint tool and :class:`QueryService`."""
+    project_client = create_project_client(settings)
+    tools = sharepoint_tool_definitions(settings)
+    return QueryService(LimitedAgentsClient(project_client.agents), settings, tools=tools, cache=cache,
+                        catalog=catalog)
+
+
+def build_fake_service(cache=None, latency=1.0, catalog=None):
+    """A :class:`QueryService` backed by :class:`FakeAgentsClient`, for local testing."""
+    from .fake import FakeAgentsClient
+
+    settings = Settings(
+        project_endpoint="https://fake.local",
+        model_deployment_name="fake-model",
+        sharepoint_connection_id="fake-connection",
+    )
+    return QueryService(FakeAgentsClient(latency=latency), settings, cache=cache, catalog=catalog)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the warm SharePoint query daemon.")
+    parser.add_argument("--address", default=None, help="Unix socket path or HOST:PORT")
+    parser.add_argument("--fake", action="store_true", help="serve a local fake agents client")
+    parser.add_argument("--no-cache", action="store_true", help="disable the answer cache")
+    parser.add_argument("--catalog", default=os.environ.get("SHAREPOINT_AGENT_CATALOG", DEFAULT_CATALOG_PATH),
+                        help="document catalog used when the file exists")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else AnswerCache(path=os.environ.get("ANSWER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    catalog = DocumentCatalog(args.catalog) if os.path.exists(args.catalog) else None
+    if args.fake:
+        service = build_fake_service(cache=cache, catalog=catalog)
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        try:
+            settings = load_settings()
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        service = build_service(settings, cache=cache, catalog=catalog)
+
+    started = time.perf_counter()
+    service.warm()
+    print(f"✅ Daemon ready in {time.perf_counter() - started:.2f}s on {args.address or default_address()}")
+    try:
+        serve(service, args.address)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        print("🧹 Daemon stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""
+Thin client for the warm query daemon.
+
+Only the standard library is imported, so asking a question costs a socket
+round trip plus the run itself.
+
+Usage:
+    python -m sharepoint_agent.daemon_client "What documents are available?"
+    python -m sharepoint_agent.daemon_client --no-stream --json "Summarize the report"
+    python -m sharepoint_agent.daemon_client --session report "Who wrote it?"
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+from .address import default_address, parse_address
+
+
+def request(payload, address=None, timeout=None):
+    """Send one request and yield every reply line as a dict."""
+    family, connect_address = parse_address(address or default_address())
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(connect_address)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                yield reply
+                if reply.get("event") in ("result", "error"):
+                    return
+
+
+def ask(query, address=None, stream=False, no_cache=False, timeout=None, session=None):
+    """Ask the daemon a question and return its final ``result`` reply."""
+    payload = {"op": "query", "query": query, "stream": stream, "no_cache": no_cache, "session": session}
+    for reply in request(payload, address, timeout):
+        if reply.get("event") in ("result", "error"):
+            return reply
+    return {"event": "error", "error": "Daemon closed the connection"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ask the SharePoint query daemon a question.")
+    parser.add_argument("query", nargs="?", help="question to ask (omit with --ping/--stats/--shutdown/--end-session)")
+    parser.add_argument("--address", default=None, help="Unix socket path or HOST:PORT")
+    parser.add_argument("--no-stream", action="store_true", help="wait for the full answer")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the daemon's answer cache")
+    parser.add_argument("--json", action="store_true", help="print the raw result as JSON")
+    parser.add_argument("--session", help="conversation key; follow-ups reuse the same thread")
+    parser.add_argument("--end-session", action="store_const", dest="op", const="end_session",
+                        help="end the --session conversation and delete its thread")
+    parser.add_argument("--ping", action="store_const", dest="op", const="ping")
+    parser.add_argument("--stats", action="store_const", dest="op", const="stats")
+    parser.add_argument("--shutdown", action="store_const", dest="op", const="shutdown")
+    args = parser.parse_args(argv)
+
+    if args.op:
+        payload = {"op": args.op, "session": args.session}
+    elif args.query:
+        payload = {"op": "query", "query": args.query, "stream": not args.no_stream, "no_cache": args.no_cache,
+                   "session": args.session}
+    else:
+        parser.error("a query or one of --ping/--stats/--shutdown is required")
+
+    try:
+        replies = list(_print_stream(request(payload, args.address), args.json))
+    except OSError as e:
+        print(f"❌ Cannot reach daemon at {args.address or default_address()}: {e}")
+        print("   Start it with: python -m sharepoint_agent.daemon")
+        return 1
+
+    result = replies[-1] if replies else {"event": "error", "error": "no reply"}
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif result.get("event") == "error":
+        print(f"❌ {result.get('error')}")
+    elif "answer" in result:
+        if not payload.get("stream") or result.get("cached"):
+            print(f"🤖 {result.get('answer') or ''}")
+        source = "cache" if result.get("cached") else f"{result.get('elapsed', 0):.2f}s"
+        print(f"📊 {result.get('status')} ({source})")
+        if result.get("error"):
+            print(f"❌ {result['error']}")
+    else:
+        print(json.dumps(result))
+    return 0 if result.get("event") == "result" else 1
+
+
+def _print_stream(replies, quiet):
+    printed = False
+    for reply in replies:
+        event = reply.get("event")
+        if not quiet and event == "delta":
+            if not printed:
+                print("🤖 ", end="")
+                printed = True
+            print(reply["text"], end="", flush=True)
+        elif not quiet and event == "tool_call":
+            print(f"\n🔧 Tool call: {reply['tool']} ({reply['status']})", flush=True)
+        yield reply
+    if printed:
+        print()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
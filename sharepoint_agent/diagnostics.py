@@ -0,0 +1,215 @@
+"""
+Parallel, timeout-bounded diagnostic probes.
+
+Each probe checks one thing (authentication, the model deployment, the
+SharePoint connection, a baseline agent run, a SharePoint tool run) and runs on
+its own thread with its own timeout. Because the probes are independent, a
+health check finishes in about the time of the slowest probe rather than the
+sum of all of them, and one hung call cannot block the rest of the report.
+
+A probe's ``check`` returns a short detail string on success and raises on
+failure; ``TimeoutError`` is reported as a timeout rather than a failure.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .tags import resource_tags
+from .polling import TIMED_OUT, PollPolicy, create_and_poll
+from .query import latest_answer, status_text
+
+PASS = "pass"
+FAIL = "fail"
+TIMEOUT = "timeout"
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RUN_TIMEOUT = 90.0
+TOKEN_SCOPE = "https://ai.azure.com/.default"
+
+_ICONS = {PASS: "✅", FAIL: "❌", TIMEOUT: "⏰"}
+
+
+@dataclass
+class Probe:
+    """A named, independent health check."""
+
+    name: str
+    check: Callable[[], Optional[str]]
+    timeout: float = DEFAULT_TIMEOUT
+    description: str = ""
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of one probe."""
+
+    name: str
+    status: str
+    detail: Optional[str] = None
+    elapsed: float = 0.0
+    description: str = ""
+
+    @property
+    def ok(self):
+        return self.status == PASS
+
+
+def _run_probe(probe, slot):
+    started = time.perf_counter()
+    try:
+        detail = probe.check()
+        slot.append(ProbeResult(probe.name, PASS, detail, time.perf_counter() - started, probe.description))
+    except TimeoutError as e:
+        slot.append(ProbeResult(probe.name, TIMEOUT, str(e), time.perf_counter() - started, probe.description))
+    except Exception as e:
+        slot.append(ProbeResult(probe.name, FAIL, str(e), time.perf_counter() - started, probe.description))
+
+
+def run_probes(probes):
+    """Run every probe concurrently and return their results in the given order.
+
+    Probes run on daemon threads, so a probe that exceeds its timeout is
+    reported as ``timeout`` and abandoned without keeping the process alive.
+    """
+    started = time.perf_counter()
+    running = []
+    for probe in probes:
+        slot = []
+        thread = threading.Thread(target=_run_probe, args=(probe, slot), name=f"probe-{probe.name}", daemon=True)
+        thread.start()
+        running.append((probe, thread, slot))
+
+    results = []
+    for probe, thread, slot in running:
+        thread.join(max(probe.timeout - (time.perf_counter() - started), 0))
+        if slot:
+            results.append(slot[0])
+        else:
+            results.append(ProbeResult(probe.name, TIMEOUT, f"No result after {probe.timeout:g}s",
+                                       probe.timeout, probe.description))
+    return results
+
+
+def auth_probe(credential, timeout=DEFAULT_TIMEOUT):
+    def check():
+        token = credential.get_token(TOKEN_SCOPE)
+        return f"token valid for {max(token.expires_on - time.time(), 0) / 60:.0f} min"
+
+    return Probe("auth", check, timeout, "Acquire an Azure AI token")
+
+
+def deployment_probe(project_client, deployment_name, timeout=DEFAULT_TIMEOUT):
+    def check():
+        deployment = project_client.deployments.get(deployment_name)
+        model = getattr(deployment, "model_name", None)
+        return f"{deployment_name} ({model})" if model else deployment_name
+
+    return Probe("model_deployment", check, timeout, "Look up the model deployment")
+
+
+def connection_probe(project_client, connection_id, timeout=DEFAULT_TIMEOUT):
+    def check():
+        # SHAREPOINT_CONNECTION_ID is a full resource id; the lookup takes its last segment.
+        connection = project_client.connections.get(connection_id.rstrip("/").rsplit("/", 1)[-1])
+        return f"{connection.name} ({status_text(connection.type)}) -> {connection.target}"
+
+    return Probe("connection", check, timeout, "Look up the SharePoint connection")
+
+
+def run_probe(name, agents_client, model, instructions, question, tools=None, timeout=DEFAULT_RUN_TIMEOUT,
+              description=""):
+    """A probe that creates a throwaway agent and thread, runs one question and cleans up.
+
+    The run's polling deadline is a little shorter than the probe timeout, so
+    a stuck run is cancelled on the service rather than left behind.
+    """
+    policy = PollPolicy(deadline=max(timeout - 5, timeout * 0.8))
+
+    def check():
+        agent = agents_client.create_agent(model=model, name=f"diagnostic-{name}", instructions=instructions,
+                                           tools=tools() if callable(tools) else (tools or []),
+                                           metadata=resource_tags())
+        thread = None
+        try:
+            thread = agents_client.threads.create(metadata=resource_tags())
+            agents_client.messages.create(thread_id=thread.id, role="user", content=question)
+            run = create_and_poll(agents_client, thread.id, agent.id, policy=policy)
+            if run.status == TIMED_OUT:
+                raise TimeoutError(run.last_error["message"])
+            if run.status != "completed":
+                raise RuntimeError(f"run {status_text(run.status)}: {run.last_error}")
+            answer = latest_answer(agents_client, thread.id, run_id=run.id) or ""
+            return answer if len(answer) <= 80 else answer[:77] + "..."
+        finally:
+            if thread is not None:
+                agents_client.threads.delete(thread.id)
+            agents_client.delete_agent(agent.id)
+
+    return Probe(name, check, timeout, description)
+
+
+def default_probes(agents_client, settings, project_client=None, credential=None, tools=None,
+                   timeout=DEFAULT_TIMEOUT, run_timeout=DEFAULT_RUN_TIMEOUT):
+    """The standard health check: auth, deployment, connection, baseline run and SharePoint run.
+
+    Probes that need ``project_client`` or ``credential`` are left out when
+    those are not given (e.g. against the fake client). ``tools`` may be a
+    callable so that building the SharePoint tool is itself part of the probe.
+    """
+    probes = []
+    if credential is not None:
+        probes.append(auth_probe(credential, timeout))
+    if project_client is not None:
+        probes.append(deployment_probe(project_client, settings.model_deployment_name, timeout))
+        probes.append(connection_probe(project_client, settings.sharepoint_connection_id, timeout))
+    probes.append(run_probe(
+        "baseline_run", agents_client, settings.model_deployment_name,
+        "You are a test agent without tools", "Hello, just say hi back",
+        timeout=run_timeout, description="Run an agent without tools",
+    ))
+    probes.append(run_probe(
+        "sharepoint_run", agents_client, settings.model_deployment_name,
+        "You are an agent with SharePoint access", "What documents do you have access to?",
+        tools=tools, timeout=run_timeout, description="Run an agent with the SharePoint tool",
+    ))
+    return probes
+
+
+def print_report(results, elapsed=None):
+    """Print a pass/fail table with per-probe latency; return ``True`` if every probe passed."""
+    print(f"   {'Probe':<18}{'Status':<10}{'Latency':>9}  Detail")
+    for result in results:
+        icon = _ICONS.get(result.status, "⚠️")
+        print(f"   {result.name:<18}{icon} {result.status:<7}{result.elapsed:>8.2f}s  {result.detail or ''}")
+    passed = sum(result.ok for result in results)
+    print(f"\n{'✅' if passed == len(results) else '❌'} {passed}/{len(results)} probes passed", end="")
+    if elapsed is not None:
+        print(f" in {elapsed:.2f}s (sequential would take ~{sum(r.elapsed for r in results):.2f}s)")
+    else:
+        print()
+    return passed == len(results)
+
+
+def print_diagnosis(results):
+    """Explain the failures we know how to fix."""
+    failed = {result.name: result for result in results if not result.ok}
+    if not failed:
+        print("🎉 All systems operational!")
+        return
+    print("\n🔧 REQUIRED ACTION:")
+    if "auth" in failed:
+        print("   - Sign in with `az login` (or configure a managed identity / service principal)")
+    if "model_deployment" in failed:
+        print("   - Check MODEL_DEPLOYMENT_NAME matches a deployment in your Azure AI Foundry project")
+    if "connection" in failed:
+        print("   - Check SHAREPOINT_CONNECTION_ID points to an existing connection in the project")
+    if "baseline_run" in failed:
+        print("   - Agents cannot run at all; check project permissions and model quota")
+    elif "sharepoint_run" in failed:
+        print("   The SharePoint connection needs to be properly configured in Azure AI Foundry with:")
+        print("   - Valid SharePoint site URL")
+        print("   - Proper authentication credentials")
+        print("   - Access permissions to SharePoint documents")
+        print("   📧 The SharePoint tool requires preview access: azureagents-preview@microsoft.com")
@@ -0,0 +1,424 @@
+"""
+In-process stand-in for the Azure AI Agents client.
+
+``FakeAgentsClient`` mirrors the parts of ``project_client.agents`` used in
+this repository (``create_agent``, ``threads``, ``messages``, ``runs``) so the
+shared helpers can be exercised without a Foundry project or SharePoint
+preview access. Runs complete after ``latency`` seconds (plus or minus
+``jitter`` as a fraction) and fail with probability ``failure_rate``. Every
+other call sleeps for ``api_latency`` seconds to mimic a control-plane round
+trip, and ``answer_size`` pads or trims answers to a fixed length. Follow-up
+runs on a thread that already has an answer skip the SharePoint tool step and
+take ``followup_factor`` of the usual latency, like an agent answering from
+context it has already retrieved.
+
+Finished runs report token ``usage`` estimated at four characters per token.
+The prompt counts the instructions, the thread so far and, unless the run is
+a follow-up, ``grounding_tokens`` of document content injected by the
+SharePoint tool.
+
+``rate_limit`` (calls per second) and ``max_active_runs`` make the fake answer
+with :class:`FakeHttpError` (status 429 with a ``Retry-After`` header) the way
+a throttled Foundry endpoint does. Like deployment quota, ``max_active_runs``
+applies to each agent model separately, and ``model_failure_rates`` overrides
+``failure_rate`` per model to simulate one unhealthy deployment.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete")
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count of ``text`` (about four characters per token)."""
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+def _text_content(value):
+    return SimpleNamespace(type="text", text=SimpleNamespace(value=value, annotations=[]))
+
+
+def _ordered(items, order):
+    items = sorted(items, key=lambda item: item.created_at)
+    if str(order) in ("desc", "ListSortOrder.DESCENDING"):
+        items.reverse()
+    return items
+
+
+def default_responder(query):
+    """Answer every query with a short canned SharePoint-style reply."""
+    return f"Based on the SharePoint documents, here is what I found about: {query}"
+
+
+class FakeHttpError(Exception):
+    """Mimics ``azure.core.exceptions.HttpResponseError`` for throttled calls."""
+
+    def __init__(self, status_code=429, retry_after=1.0, message="Too Many Requests"):
+        super().__init__(f"({status_code}) {message}")
+        self.status_code = status_code
+        self.reason = message
+        self.response = SimpleNamespace(status_code=status_code, headers={"Retry-After": f"{retry_after:g}"})
+
+
+class _Store:
+    def __init__(self, seed, api_latency=0.0, rate_limit=None, retry_after=1.0):
+        self.api_latency = api_latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.recent = deque()
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.random = random.Random(seed)
+        self.agents = {}
+        self.threads = {}
+        self.messages = {}
+        self.runs = {}
+        self.calls = {}
+
+    def new_id(self, prefix):
+        return f"{prefix}_{next(self.counter):06d}"
+
+    def record(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.rate_limit:
+                now = time.monotonic()
+                while self.recent and now - self.recent[0] >= 1.0:
+                    self.recent.popleft()
+                if len(self.recent) >= self.rate_limit:
+                    self.calls["throttled"] = self.calls.get("throttled", 0) + 1
+                    raise FakeHttpError(retry_after=self.retry_after)
+                self.recent.append(now)
+        if self.api_latency:
+            time.sleep(self.api_latency)
+
+
+class _FakeThreads:
+    def __init__(self, store):
+        self._store = store
+
+    def create(self, **kwargs):
+        self._store.record("threads.create")
+        with self._store.lock:
+            thread = SimpleNamespace(
+                id=self._store.new_id("thread"),
+                created_at=time.time(),
+                metadata=kwargs.get("metadata") or {},
+            )
+            self._store.threads[thread.id] = thread
+            self._store.messages[thread.id] = []
+        return thread
+
+    def list(self, limit=None, order="desc", before=None, **kwargs):
+        self._store.record("threads.list")
+        with self._store.lock:
+            return iter(_ordered(self._store.threads.values(), order))
+
+    def delete(self, thread_id, **kwargs):
+        self._store.record("threads.delete")
+        with self._store.lock:
+            self._store.threads.pop(thread_id, None)
+            self._store.messages.pop(thread_id, None)
+
+
+class _FakeMessages:
+    def __init__(self, store):
+        self._store = store
+
+    def create(self, thread_id, role, content, **kwargs):
+        self._store.record("messages.create")
+        return self._add(thread_id, role, content, run_id=None)
+
+    def list(self, thread_id, run_id=None, limit=None, order="desc", **kwargs):
+        self._store.record("messages.list")
+        with self._store.lock:
+            messages = list(self._store.messages.get(thread_id, []))
+        if run_id is not None:
+            messages = [msg for msg in messages if msg.run_id == run_id]
+        if str(order) in ("desc", "ListSortOrder.DESCENDING"):
+            messages.reverse()
+        if limit is not None:
+            messages = messages[:limit]
+        return iter(messages)
+
+    def _add(self, thread_id, role, text, run_id):
+        with self._store.lock:
+            return self._add_locked(thread_id, role, text, run_id)
+
+    def _add_locked(self, thread_id, role, text, run_id):
+        message = SimpleNamespace(
+            id=self._store.new_id("msg"),
+            thread_id=thread_id,
+            role=role,
+            run_id=run_id,
+            created_at=time.time(),
+            content=[_text_content(text)],
+        )
+        self._store.messages.setdefault(thread_id, []).append(message)
+        return message
+
+
+class _FakeRuns:
+    def __init__(self, client):
+        self._client = client
+        self._store = client._store
+
+    def create(self, thread_id, agent_id, **kwargs):
+        self._store.record("runs.create")
+        store = self._store
+        with store.lock:
+            agent = store.agents.get(agent_id)
+            model = agent.model if agent is not None else None
+            limit = self._client.max_active_runs
+            if limit is not None:
+                now = time.monotonic()
+                active = sum(1 for run in store.runs.values()
+                             if run._model == model and run.status not in TERMINAL_STATUSES
+                             and now < run._ready_at)
+                if active >= limit:
+                    store.calls["throttled"] = store.calls.get("throttled", 0) + 1
+                    raise FakeHttpError(retry_after=store.retry_after, message="Too many active runs")
+            question = next(
+                (msg.content[0].text.value for msg in reversed(store.messages.get(thread_id, []))
+                 if msg.role == "user"),
+                "",
+            )
+            history = store.messages.get(thread_id, [])
+            followup = any(msg.role == "assistant" for msg in history)
+            prompt_tokens = sum(estimate_tokens(msg.content[0].text.value) for msg in history)
+            prompt_tokens += estimate_tokens(agent.instructions if agent is not None else "")
+            if not followup:
+                prompt_tokens += self._client.grounding_tokens
+            fails = store.random.random() < self._client.model_failure_rates.get(model, self._client.failure_rate)
+            jitter = self._client.jitter
+            latency = self._client.latency * (1 + store.random.uniform(-jitter, jitter))
+            if followup:
+                latency *= self._client.followup_factor
+            now = time.time()
+            run = SimpleNamespace(
+                id=store.new_id("run"),
+                thread_id=thread_id,
+                agent_id=agent_id,
+                status="queued",
+                last_error=None,
+                usage=None,
+                created_at=now,
+                started_at=now,
+                completed_at=None,
+                failed_at=None,
+                cancelled_at=None,
+                _latency=latency,
+                _question=question,
+                _fails=fails,
+                _followup=followup,
+                _prompt_tokens=prompt_tokens,
+                _model=model,
+                _ready_at=time.monotonic() + latency,
+            )
+            store.runs[run.id] = run
+        return self._snapshot(run)
+
+    def get(self, thread_id, run_id, **kwargs):
+        self._store.record("runs.get")
+        run = self._store.runs[run_id]
+        self._advance(run)
+        return self._snapshot(run)
+
+    def cancel(self, thread_id, run_id, **kwargs):
+        self._store.record("runs.cancel")
+        run = self._store.runs[run_id]
+        with self._store.lock:
+            if run.status not in TERMINAL_STATUSES:
+                run.status = "cancelled"
+                run.cancelled_at = time.time()
+        return self._snapshot(run)
+
+    def create_and_process(self, thread_id, agent_id, polling_interval=1, **kwargs):
+        run = self.create(thread_id=thread_id, agent_id=agent_id, **kwargs)
+        delay = self._store.runs[run.id]._ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return self.get(thread_id=thread_id, run_id=run.id)
+
+    def stream(self, thread_id, agent_id, **kwargs):
+        self._store.record("runs.stream")
+        return _FakeRunStream(self, thread_id, agent_id)
+
+    def _advance(self, run):
+        with self._store.lock:
+            if run.status in TERMINAL_STATUSES:
+                return
+            if time.monotonic() < run._ready_at:
+                run.status = "in_progress"
+                return
+            finished_at = run.started_at + run._latency
+            if run._fails:
+                run.status = "failed"
+                run.failed_at = finished_at
+                run.last_error = {"code": "server_error", "message": "Bad Request"}
+                run.usage = _usage(run._prompt_tokens, 0)
+                return
+            run.status = "completed"
+            run.completed_at = finished_at
+            answer = self._client.answer(run._question)
+            run.usage = _usage(run._prompt_tokens, estimate_tokens(answer))
+            self._client.messages._add_locked(run.thread_id, "assistant", answer, run_id=run.id)
+
+    @staticmethod
+    def _snapshot(run):
+        return SimpleNamespace(**{k: v for k, v in vars(run).items() if not k.startswith("_")})
+
+
+def _usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+class _FakeRunSteps:
+    def __init__(self, store):
+        self._store = store
+
+    def list(self, thread_id, run_id, **kwargs):
+        """A SharePoint tool-call step followed by the message-creation step."""
+        self._store.record("run_steps.list")
+        run = self._store.runs[run_id]
+        end = run.completed_at or run.failed_at or run.cancelled_at
+        if end is None:
+            return iter([])
+        steps = []
+        tool_end = run.started_at
+        if not run._followup:
+            tool_end = run.started_at + (end - run.started_at) * 0.7
+            steps.append(SimpleNamespace(
+                id=f"step_{run.id}_1",
+                type="tool_calls",
+                status="failed" if run.failed_at else "completed",
+                created_at=run.started_at,
+                completed_at=tool_end,
+                step_details=SimpleNamespace(tool_calls=[SimpleNamespace(type="sharepoint_grounding")]),
+            ))
+        if run.completed_at:
+            steps.append(SimpleNamespace(
+                id=f"step_{run.id}_2",
+                type="message_creation",
+                status="completed",
+                created_at=tool_end,
+                completed_at=end,
+                step_details=SimpleNamespace(),
+            ))
+        return iter(steps)
+
+
+class _FakeRunStream:
+    """Context manager yielding ``(event_type, event_data, None)`` like ``AgentRunStream``."""
+
+    def __init__(self, runs, thread_id, agent_id):
+        self._runs = runs
+        self._thread_id = thread_id
+        self._agent_id = agent_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        runs = self._runs
+        run = runs.create(thread_id=self._thread_id, agent_id=self._agent_id)
+        yield "thread.run.created", run, None
+        stored = runs._store.runs[run.id]
+
+        tool_step = None
+        if not stored._followup:
+            tool_step = SimpleNamespace(
+                type="tool_calls",
+                status="in_progress",
+                step_details=SimpleNamespace(tool_calls=[SimpleNamespace(type="sharepoint_grounding")]),
+            )
+            yield "thread.run.step.created", tool_step, None
+
+        # Wait until the run would have finished, then replay its answer as deltas.
+        delay = stored._ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        run = runs.get(thread_id=self._thread_id, run_id=run.id)
+        if tool_step is not None:
+            tool_step.status = "failed" if run.status == "failed" else "completed"
+            yield f"thread.run.step.{tool_step.status}", tool_step, None
+
+        if run.status == "completed":
+            answer = runs._client.answer(stored._question)
+            for word in answer.split(" "):
+                yield "thread.message.delta", SimpleNamespace(text=word + " "), None
+        yield f"thread.run.{run.status}", run, None
+        yield "done", "[DONE]", None
+
+
+class FakeAgentsClient:
+    """Local, thread-safe imitation of ``AIProjectClient.agents``."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, responder=default_responder, seed=None,
+                 api_latency=0.0, jitter=0.0, answer_size=None, followup_factor=0.5, rate_limit=None,
+                 max_active_runs=None, retry_after=1.0, model_failure_rates=None, grounding_tokens=1500):
+        self.latency = latency
+        self.grounding_tokens = grounding_tokens
+        self.max_active_runs = max_active_runs
+        self.model_failure_rates = dict(model_failure_rates or {})
+        self.followup_factor = followup_factor
+        self.failure_rate = failure_rate
+        self.responder = responder
+        self.jitter = jitter
+        self.answer_size = answer_size
+        self._store = _Store(seed, api_latency, rate_limit, retry_after)
+        self.threads = _FakeThreads(self._store)
+        self.messages = _FakeMessages(self._store)
+        self.runs = _FakeRuns(self)
+        self.run_steps = _FakeRunSteps(self._store)
+
+    def answer(self, question):
+        """Produce the assistant reply for ``question``, honouring ``answer_size``."""
+        text = self.responder(question)
+        if self.answer_size is not None:
+            filler = " Lorem ipsum dolor sit amet."
+            while len(text) < self.answer_size:
+                text += filler
+            text = text[:self.answer_size]
+        return text
+
+    @property
+    def calls(self):
+        """Number of calls made per operation, e.g. ``calls["runs.create"]``."""
+        with self._store.lock:
+            return dict(self._store.calls)
+
+    def create_agent(self, model, name=None, instructions=None, tools=None, **kwargs):
+        self._store.record("create_agent")
+        with self._store.lock:
+            agent = SimpleNamespace(
+                id=self._store.new_id("asst"),
+                model=model,
+                name=name,
+                instructions=instructions,
+                tools=tools or [],
+                created_at=time.time(),
+                metadata=kwargs.get("metadata") or {},
+            )
+            self._store.agents[agent.id] = agent
+        return agent
+
+    def list_agents(self, limit=None, order="desc", before=None, **kwargs):
+        self._store.record("list_agents")
+        with self._store.lock:
+            return iter(_ordered(self._store.agents.values(), order))
+
+    def delete_agent(self, agent_id, **kwargs):
+        self._store.record("delete_agent")
+        with self._store.lock:
+            self._store.agents.pop(agent_id, None)
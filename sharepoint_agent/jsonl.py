@@ -0,0 +1,235 @@
+"""
+Streaming JSONL batch mode.
+
+Reads questions from a JSONL file (or stdin), runs them with bounded
+concurrency and writes one JSON result line per question as soon as it
+finishes. Input is read lazily and results are written immediately, so
+memory use stays flat for files with tens of thousands of queries.
+
+Each input line may be a JSON object with a ``query`` field (and optionally
+an ``id``), a JSON string, or plain text. An object without a ``query`` is
+written as an ``error`` result and the batch carries on. Output lines contain ``id``,
+``query``, ``status``, the full ``answer``, ``error``, ``run_id``,
+``thread_id``, ``elapsed``, per-phase ``timings`` and token ``usage``.
+
+With ``--checkpoint``, progress is logged to a file so that an interrupted
+batch can be restarted with the same command. Questions that already
+completed are written from the log (with ``cached`` set) instead of being
+asked again, and runs that were in flight are picked up where they were.
+
+After ``--failure-threshold`` SharePoint connection failures in a row, the
+remaining questions are written as ``rejected`` with the diagnosis instead of
+being run (see :mod:`sharepoint_agent.breaker`).
+
+Token usage is summed per query template and deployment and reported at the
+end. ``--tpm`` holds new questions back while the tokens spent in the last
+minute would exceed the budget (see :mod:`sharepoint_agent.usage`).
+
+Usage:
+    python -m sharepoint_agent.jsonl queries.jsonl -o results.jsonl --concurrency 8
+    python -m sharepoint_agent.jsonl queries.jsonl -o results.jsonl --checkpoint queries.ckpt
+    python -m sharepoint_agent.jsonl queries.jsonl -o results.jsonl --tpm 30000
+    cat queries.jsonl | python -m sharepoint_agent.jsonl - > results.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from .batch import DEFAULT_CONCURRENCY, BatchExecutor
+from .breaker import DEFAULT_FAILURE_THRESHOLD, CircuitBreaker, guarded
+from .checkpoint import Checkpoint
+from .config import Settings, load_settings
+from .pool import AgentPool
+from .query import QueryResult
+from .ratelimit import DEFAULT_REQUESTS_PER_SECOND, LimitedAgentsClient, RateLimiter
+from .router import STRATEGIES, Router, load_backends, routed_run_query
+from .usage import TokenBudget, UsageTracker, metered, print_report
+
+
+class InvalidLine(ValueError):
+    """An input line that holds no question."""
+
+    def __init__(self, query_id, message):
+        super().__init__(message)
+        self.query_id = query_id
+
+
+def parse_line(line, line_number):
+    """Return ``(id, query)`` for one input line, or ``None`` for blank lines.
+
+    Raises :class:`InvalidLine` for a JSON object without a text ``query``.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        item = json.loads(line)
+    except ValueError:
+        item = line
+    if isinstance(item, dict):
+        query_id = item.get("id", line_number)
+        query = item.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise InvalidLine(query_id, f'Line {line_number} has no "query" field')
+        return query_id, query
+    return line_number, str(item)
+
+
+def read_queries(lines, on_error=None):
+    """Lazily yield ``(id, query)`` pairs from an iterable of lines.
+
+    Invalid lines raise :class:`InvalidLine` unless ``on_error`` is given, in
+    which case it is called with the exception and the line is skipped.
+    """
+    for line_number, line in enumerate(lines, 1):
+        try:
+            parsed = parse_line(line, line_number)
+        except InvalidLine as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            continue
+        if parsed is not None:
+            yield parsed
+
+
+def run_jsonl(agents_client, agent_id, lines, out, max_concurrency=DEFAULT_CONCURRENCY, flush=True, runner=None,
+              checkpoint=None):
+    """Run every query in ``lines`` and write JSONL results to ``out``.
+
+    ``runner`` replaces the single-agent pipeline and ``checkpoint`` makes the
+    run resumable (see :class:`BatchExecutor`). Returns a ``{status: count}``
+    summary.
+    """
+    ids = {}
+    counts = {}
+
+    def write(query_id, result):
+        out.write(json.dumps({"id": query_id, **asdict(result)}, default=str) + "\n")
+        if flush:
+            out.flush()
+        counts[result.status] = counts.get(result.status, 0) + 1
+
+    def invalid(error):
+        # Called from the same thread as the result loop below, so writing here is safe.
+        write(error.query_id, QueryResult(query="", status="error", error=str(error)))
+
+    def queries():
+        # Only ids of in-flight queries are kept; they are dropped once written.
+        for index, (query_id, query) in enumerate(read_queries(lines, on_error=invalid)):
+            ids[index] = query_id
+            yield query_id, query
+
+    executor = BatchExecutor(agents_client, agent_id, max_concurrency=max_concurrency, runner=runner,
+                             checkpoint=checkpoint)
+    for index, result in executor.stream(queries(), keyed=True):
+        write(ids.pop(index), result)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run SharePoint questions from a JSONL file.")
+    parser.add_argument("input", help="JSONL file of queries, or - for stdin")
+    parser.add_argument("-o", "--output", help="results file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="max API requests per second (429 responses are retried)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=STRATEGIES[0],
+                        help="how to spread runs over SHAREPOINT_AGENT_BACKENDS")
+    parser.add_argument("--checkpoint", help="progress log; rerun with the same file to resume")
+    parser.add_argument("--failure-threshold", type=int, default=DEFAULT_FAILURE_THRESHOLD,
+                        help="reject remaining queries after this many connection failures in a row (0: never)")
+    parser.add_argument("--tpm", type=int, help="tokens-per-minute budget; questions wait while it is used up")
+    parser.add_argument("--fake", action="store_true", help="use the local fake agents client")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        from .fake import FakeAgentsClient
+
+        settings = Settings("https://fake.local", "fake-model", "fake-connection")
+        agents_client, tools_for, closer = FakeAgentsClient(latency=0.5), None, None
+    else:
+        from dotenv import load_dotenv
+
+        from .client import connection_tool_definitions, create_project_client
+
+        load_dotenv()
+        try:
+            settings = load_settings()
+        except KeyError as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            return 1
+        project_client = create_project_client(settings)
+        agents_client, closer = project_client.agents, project_client
+
+        def tools_for(backend):
+            return connection_tool_definitions(backend.sharepoint_connection_id)
+
+    try:
+        router = Router(load_backends(settings), strategy=args.strategy)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}", file=sys.stderr)
+        return 1
+
+    limiter = RateLimiter(args.rps, max_concurrent_runs=args.concurrency)
+    agents_client = LimitedAgentsClient(agents_client, limiter)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8")
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    breaker = CircuitBreaker(failure_threshold=args.failure_threshold)
+    tracker = UsageTracker()
+    budget = TokenBudget(args.tpm) if args.tpm else None
+    started = time.perf_counter()
+    try:
+        with AgentPool(agents_client) as pool:
+            # Failed runs are retried once on another backend, if there is one.
+            def runner(query, on_run=None):
+                return routed_run_query(router, pool, agents_client, query, settings.instructions, tools_for,
+                                        retries=min(1, len(router.backends) - 1), on_run=on_run)
+
+            if args.failure_threshold:
+                runner = guarded(breaker, runner)
+            runner = metered(runner, tracker, budget)
+            counts = run_jsonl(agents_client, None, source, out, max_concurrency=args.concurrency, runner=runner,
+                               checkpoint=checkpoint)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if closer is not None:
+            closer.close()
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    print(f"✅ {total} queries in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.2f} q/s): {counts}",
+          file=sys.stderr)
+    stats = limiter.stats()
+    print(f"🚦 {stats['requests']} requests, {stats['throttled']} throttled, {stats['retries']} retried",
+          file=sys.stderr)
+    print_report(tracker.report(), out=sys.stderr)
+    if budget is not None:
+        stats = budget.stats()
+        print(f"⏳ Token budget {args.tpm:,}/min: {stats['deferred']} questions deferred, "
+              f"{stats['wait_time']:.1f}s waiting", file=sys.stderr)
+    if breaker.rejected:
+        print(f"⛔ {breaker.rejected} queries rejected without a run: {breaker.diagnosis}", file=sys.stderr)
+    if checkpoint is not None:
+        stats = checkpoint.stats()
+        print(f"📌 Resumed: {stats['skipped']} already done, {stats['reattached']} re-attached runs",
+              file=sys.stderr)
+    if len(router.backends) > 1:
+        for name, backend in router.stats().items():
+            print(f"   {name}: {backend['requests']} runs, {backend['failures']} failed, "
+                  f"{backend['ejections']} ejections", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
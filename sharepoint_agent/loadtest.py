@@ -0,0 +1,274 @@
+"""
+Load test with a concurrency ramp.
+
+Answers "how many SharePoint questions per minute can this setup sustain?".
+Each step runs ``concurrency`` workers that keep asking questions through the
+sample flow (pooled agent, new thread, message, run, poll, answer) for
+``duration`` seconds, then waits for in-flight questions to finish. Every step
+reports throughput, p50/p95/p99 latency, the error rate (questions that did
+not complete), the throttle rate (API calls answered with 429) and token
+usage per question and per second.
+
+Throttled calls are not retried by default so that they show up in the
+numbers. Pass ``--retries`` to measure with client-side retries, as the batch
+modes run.
+
+Usage:
+    python -m sharepoint_agent.loadtest --steps 1,2,4,8 --duration 60 --json load.json
+    python -m sharepoint_agent.loadtest --fake --latency 2 --max-active-runs 4
+"""
+
+import argparse
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict
+
+from .config import Settings, load_settings
+from .jsonl import read_queries
+from .polling import DEFAULT_POLICY
+from .pool import AgentPool
+from .query import run_query
+from .ratelimit import LimitedAgentsClient, RateLimiter
+from .usage import tokens_used
+
+DEFAULT_STEPS = (1, 2, 4, 8)
+DEFAULT_DURATION = 30.0
+# Same question as sample_agents_sharepoint.py.
+DEFAULT_QUERY = ("Please analyze and summarize the SharePoint document named '{document}'. If you can't access "
+                 "it, please list what documents are available in the SharePoint site.")
+# Effectively unpaced: the limiter is only there to count throttled calls.
+UNPACED_REQUESTS_PER_SECOND = 1000.0
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of ``values`` (``pct`` from 0 to 100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class StepResult:
+    """Measurements for one concurrency level."""
+
+    concurrency: int
+    elapsed: float = 0.0
+    queries: int = 0
+    completed: int = 0
+    requests: int = 0
+    throttled: int = 0
+    tokens: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self):
+        """Completed questions per second."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def per_minute(self):
+        return self.throughput * 60
+
+    @property
+    def error_rate(self):
+        return 1 - self.completed / self.queries if self.queries else 0.0
+
+    @property
+    def throttle_rate(self):
+        return self.throttled / self.requests if self.requests else 0.0
+
+    @property
+    def tokens_per_query(self):
+        return self.tokens / self.queries if self.queries else 0.0
+
+    @property
+    def tokens_per_second(self):
+        return self.tokens / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        data = asdict(self)
+        data.update(throughput_qps=self.throughput, per_minute=self.per_minute,
+                    error_rate=self.error_rate, throttle_rate=self.throttle_rate,
+                    tokens_per_query=self.tokens_per_query, tokens_per_second=self.tokens_per_second)
+        return data
+
+
+def _delete_thread(agents_client, thread_id):
+    try:
+        agents_client.threads.delete(thread_id)
+    except Exception:
+        # Best effort: an orphan is left for ``python -m sharepoint_agent.cleanup``.
+        pass
+
+
+def run_step(agents_client, agent_id, queries, concurrency, duration, policy=DEFAULT_POLICY):
+    """Keep ``concurrency`` questions in flight for ``duration`` seconds.
+
+    ``queries`` is an endless iterator of question texts shared by all
+    workers. Each question's thread is deleted once it has finished, so a
+    ramp leaves no threads behind. If ``agents_client`` is a
+    :class:`LimitedAgentsClient`, its counters give the step's request and
+    throttle totals (including the deletes).
+    """
+    limiter = getattr(agents_client, "limiter", None)
+    before = limiter.stats() if limiter else {}
+    lock = threading.Lock()
+    latencies = []
+    statuses = Counter()
+    tokens = [0]
+    started = time.perf_counter()
+    deadline = started + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with lock:
+                query = next(queries)
+            result = None
+            try:
+                result = run_query(agents_client, agent_id, query, policy=policy)
+            finally:
+                if result is not None and result.thread_id:
+                    _delete_thread(agents_client, result.thread_id)
+            with lock:
+                statuses[result.status] += 1
+                tokens[0] += tokens_used(result)
+                if result.ok:
+                    latencies.append(result.elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+
+    step = StepResult(concurrency, elapsed=time.perf_counter() - started, tokens=tokens[0], statuses=dict(statuses))
+    step.queries = sum(statuses.values())
+    step.completed = statuses.get("completed", 0)
+    step.p50, step.p95, step.p99 = (percentile(latencies, pct) for pct in (50, 95, 99))
+    if limiter:
+        after = limiter.stats()
+        step.requests = after["requests"] - before["requests"]
+        step.throttled = after["throttled"] - before["throttled"]
+    return step
+
+
+def ramp(agents_client, agent_id, queries, steps=DEFAULT_STEPS, duration=DEFAULT_DURATION, policy=DEFAULT_POLICY,
+         max_error_rate=None, on_step=None):
+    """Run :func:`run_step` for each concurrency in ``steps``.
+
+    Stops early once a step's error rate exceeds ``max_error_rate``.
+    """
+    queries = itertools.cycle(list(queries))
+    results = []
+    for concurrency in steps:
+        step = run_step(agents_client, agent_id, queries, concurrency, duration, policy)
+        results.append(step)
+        if on_step:
+            on_step(step)
+        if max_error_rate is not None and step.error_rate > max_error_rate:
+            break
+    return results
+
+
+def print_table(steps, out=sys.stdout):
+    print(f"{'Conc':>5}{'Queries':>9}{'OK':>6}{'q/s':>8}{'q/min':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+          f"{'Errors':>8}{'429s':>7}{'tok/q':>8}{'tok/s':>8}", file=out)
+    print("-" * 91, file=out)
+    for step in steps:
+        print(f"{step.concurrency:>5}{step.queries:>9}{step.completed:>6}{step.throughput:>8.2f}"
+              f"{step.per_minute:>8.1f}{step.p50:>8.2f}{step.p95:>8.2f}{step.p99:>8.2f}"
+              f"{step.error_rate:>8.0%}{step.throttle_rate:>7.0%}{step.tokens_per_query:>8.0f}"
+              f"{step.tokens_per_second:>8.0f}", file=out)
+
+
+def _steps(value):
+    steps = [int(part) for part in value.split(",") if part.strip()]
+    if not steps or min(steps) < 1:
+        raise argparse.ArgumentTypeError("steps must be positive integers, e.g. 1,2,4,8")
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ramp concurrency and measure SharePoint question throughput.")
+    parser.add_argument("--steps", type=_steps, default=list(DEFAULT_STEPS), help="concurrency levels, e.g. 1,2,4,8")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds to hold each step")
+    parser.add_argument("--queries", help="JSONL or text file of questions (default: the sample question)")
+    parser.add_argument("--retries", type=int, default=0, help="retries for throttled (429) calls")
+    parser.add_argument("--max-error-rate", type=float, help="stop the ramp once a step exceeds this error rate")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    parser.add_argument("--fake", action="store_true", help="use the local fake agents client")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake run latency in seconds")
+    parser.add_argument("--max-active-runs", type=int, help="fake per-deployment active run quota")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        from .fake import FakeAgentsClient
+
+        settings = Settings("https://fake.local", "fake-model", "fake-connection")
+        client = FakeAgentsClient(latency=args.latency, jitter=0.2, api_latency=0.02,
+                                  max_active_runs=args.max_active_runs)
+        tools, closer = None, None
+    else:
+        from dotenv import load_dotenv
+
+        from .client import create_project_client, sharepoint_tool_definitions
+
+        load_dotenv()
+        try:
+            settings = load_settings()
+        except KeyError as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            return 1
+        closer = create_project_client(settings)
+        client, tools = closer.agents, sharepoint_tool_definitions(settings)
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [query for _, query in read_queries(f, on_error=lambda e: print(f"⚠️ Skipped: {e}",
+                                                                                    file=sys.stderr))]
+    else:
+        queries = [DEFAULT_QUERY.format(document=settings.document_name)]
+
+    limiter = RateLimiter(UNPACED_REQUESTS_PER_SECOND, max_concurrent_runs=None, max_retries=args.retries)
+    agents_client = LimitedAgentsClient(client, limiter)
+
+    def report(step):
+        print(f"📈 concurrency {step.concurrency}: {step.completed}/{step.queries} ok, "
+              f"{step.per_minute:.1f} q/min, p95 {step.p95:.2f}s, {step.throttled} throttled")
+
+    print(f"=== Load test: steps {args.steps}, {args.duration:.0f}s each, {len(queries)} distinct question(s) ===")
+    try:
+        with AgentPool(agents_client) as pool, \
+                pool.agent(settings.model_deployment_name, settings.instructions, tools) as agent:
+            steps = ramp(agents_client, agent.id, queries, args.steps, args.duration,
+                         max_error_rate=args.max_error_rate, on_step=report)
+    finally:
+        if closer is not None:
+            closer.close()
+
+    print()
+    print_table(steps)
+    best = max(steps, key=lambda step: step.throughput)
+    print(f"\n🏁 Best sustained rate: {best.per_minute:.1f} questions/min at concurrency {best.concurrency}")
+
+    if args.json_path:
+        config = {key: value for key, value in vars(args).items() if key != "json_path"}
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "steps": [step.to_dict() for step in steps]}, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
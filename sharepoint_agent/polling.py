@@ -0,0 +1,123 @@
+"""
+Adaptive run polling with a per-run deadline.
+
+``runs.create_and_process`` polls at a fixed interval and never gives up, so a
+hung SharePoint tool call blocks forever. ``create_and_poll`` polls quickly
+for the first few checks (most short runs finish there), then backs off
+exponentially with jitter. Once the deadline passes it calls ``runs.cancel``
+so the run stops consuming service capacity, and reports ``TIMED_OUT``.
+Setting an optional ``stop`` event cancels the run early, e.g. when another
+run has already produced the answer.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+TIMED_OUT = "timed_out"
+ACTIVE_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+@dataclass
+class PollPolicy:
+    """Timing knobs for :func:`wait_for_run`."""
+
+    initial_interval: float = 0.25
+    fast_polls: int = 4
+    multiplier: float = 1.6
+    max_interval: float = 5.0
+    jitter: float = 0.2
+    deadline: Optional[float] = 120.0
+
+    def intervals(self, rng=random):
+        """Yield successive sleep intervals (without regard to the deadline)."""
+        interval = self.initial_interval
+        attempt = 0
+        while True:
+            if attempt >= self.fast_polls:
+                interval = min(interval * self.multiplier, self.max_interval)
+            attempt += 1
+            spread = interval * self.jitter
+            yield max(0.0, interval + rng.uniform(-spread, spread))
+
+
+DEFAULT_POLICY = PollPolicy()
+
+
+class TimedOutRun:
+    """Stand-in for a run that was cancelled because it exceeded its deadline.
+
+    It exposes the same ``id`` / ``status`` / ``last_error`` attributes the
+    scripts read from a ``ThreadRun``; the last observed run is in ``run``.
+    """
+
+    def __init__(self, run, deadline):
+        self.run = run
+        self.id = run.id
+        self.thread_id = getattr(run, "thread_id", None)
+        self.status = TIMED_OUT
+        self.usage = getattr(run, "usage", None)
+        self.last_error = {"code": TIMED_OUT, "message": f"Run exceeded deadline of {deadline:g}s and was cancelled"}
+
+    def __repr__(self):
+        return f"TimedOutRun(id={self.id!r})"
+
+
+def _is_active(run):
+    return getattr(run.status, "value", run.status) in ACTIVE_STATUSES
+
+
+def wait_for_run(agents_client, thread_id, run, policy=DEFAULT_POLICY, sleep=time.sleep, clock=time.monotonic,
+                 stop=None):
+    """Poll ``run`` until it reaches a terminal status or the deadline passes.
+
+    Returns the final run, or a :class:`TimedOutRun` after cancelling it. If
+    the ``stop`` event is set the run is cancelled and the cancelled run is
+    returned.
+    """
+    if stop is not None:
+        sleep = stop.wait
+    started = clock()
+    intervals = policy.intervals()
+    while _is_active(run):
+        if stop is not None and stop.is_set():
+            try:
+                return agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
+            except Exception:
+                return run
+        remaining = None if policy.deadline is None else policy.deadline - (clock() - started)
+        if remaining is not None and remaining <= 0:
+            try:
+                agents_client.runs.cancel(thread_id=thread_id, run_id=run.id)
+            except Exception:
+                # The run may have finished in the meantime; either way we stop waiting.
+                pass
+            return TimedOutRun(run, policy.deadline)
+
+        delay = next(intervals)
+        if remaining is not None:
+            delay = min(delay, remaining)
+        sleep(delay)
+        run = agents_client.runs.get(thread_id=thread_id, run_id=run.id)
+    return run
+
+
+def create_and_poll(agents_client, thread_id, agent_id, policy=DEFAULT_POLICY, stop=None, on_created=None,
+                    **run_kwargs):
+    """Drop-in replacement for ``runs.create_and_process`` with adaptive polling.
+
+    ``on_created`` is called with the new run before polling starts. With a
+    :class:`~sharepoint_agent.ratelimit.LimitedAgentsClient`, the run's slot
+    is released once polling stops for any reason, including an error from
+    ``runs.get`` or a failed cancel.
+    """
+    run = agents_client.runs.create(thread_id=thread_id, agent_id=agent_id, **run_kwargs)
+    try:
+        if on_created is not None:
+            on_created(run)
+        return wait_for_run(agents_client, thread_id, run, policy=policy, stop=stop)
+    finally:
+        release = getattr(agents_client.runs, "release", None)
+        if release is not None:
+            release(run.id)
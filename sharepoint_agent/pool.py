@@ -0,0 +1,151 @@
+"""
+Agent pool for SharePoint queries.
+
+Creating and deleting an agent for every question costs two control-plane
+round trips. The pool keeps one agent per (model deployment, instructions,
+tool definitions) combination, creates it lazily on first use and retires it
+once it has been idle for longer than ``idle_timeout`` or the pool is closed.
+
+Agents are stateless on the service side (conversation state lives in
+threads), so a pooled agent can be shared by any number of concurrent runs.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from .tags import resource_tags
+
+DEFAULT_AGENT_NAME = "sharepoint-ai-agent"
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+def _definition_to_dict(definition):
+    """Return a JSON-serialisable view of a tool definition."""
+    if hasattr(definition, "as_dict"):
+        return definition.as_dict()
+    return definition
+
+
+def pool_key(model, instructions, tools=None):
+    """Build the hashable key used to look up pooled agents."""
+    tools_key = json.dumps(
+        [_definition_to_dict(tool) for tool in (tools or [])],
+        sort_keys=True,
+        default=str,
+    )
+    return (model, instructions, tools_key)
+
+
+class _PooledAgent:
+    def __init__(self):
+        self.agent = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class AgentPool:
+    """Lazily created, shareable agents keyed by model, instructions and tools."""
+
+    def __init__(self, agents_client, idle_timeout=DEFAULT_IDLE_TIMEOUT, name=DEFAULT_AGENT_NAME):
+        self.agents_client = agents_client
+        self.idle_timeout = idle_timeout
+        self.name = name
+        self.created = 0
+        self.retired = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model, instructions, tools=None):
+        """Return a ready agent for the given configuration, creating it if needed.
+
+        Every call must be paired with :meth:`release`.
+        """
+        self.reap()
+        key = pool_key(model, instructions, tools)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PooledAgent()
+            entry.in_use += 1
+
+        try:
+            # Creation happens under the per-entry lock so concurrent callers
+            # asking for the same configuration wait for a single agent.
+            with entry.lock:
+                if entry.agent is None:
+                    entry.agent = self.agents_client.create_agent(
+                        model=model,
+                        name=self.name,
+                        instructions=instructions,
+                        tools=tools or [],
+                        metadata=resource_tags(),
+                    )
+                    self.created += 1
+        except Exception:
+            with self._lock:
+                entry.in_use -= 1
+                if entry.agent is None and entry.in_use == 0:
+                    self._entries.pop(key, None)
+            raise
+        return entry.agent
+
+    def release(self, agent):
+        """Hand an agent back to the pool."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.agent is not None and entry.agent.id == agent.id:
+                    entry.in_use = max(entry.in_use - 1, 0)
+                    entry.last_used = time.monotonic()
+                    return
+
+    @contextmanager
+    def agent(self, model, instructions, tools=None):
+        """Context manager wrapper around :meth:`acquire` / :meth:`release`."""
+        agent = self.acquire(model, instructions, tools)
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def reap(self):
+        """Delete agents that have been idle longer than ``idle_timeout``."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.agent is not None
+                and entry.in_use == 0
+                and now - entry.last_used > self.idle_timeout
+            ]
+            retired = [self._entries.pop(key).agent for key in stale]
+        for agent in retired:
+            self._delete(agent)
+        return len(retired)
+
+    def close(self):
+        """Delete every pooled agent."""
+        with self._lock:
+            retired = [entry.agent for entry in self._entries.values() if entry.agent is not None]
+            self._entries.clear()
+        for agent in retired:
+            self._delete(agent)
+
+    def _delete(self, agent):
+        try:
+            self.agents_client.delete_agent(agent.id)
+            self.retired += 1
+        except Exception as e:
+            print(f"⚠️ Could not delete pooled agent {agent.id}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for entry in self._entries.values() if entry.agent is not None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,146 @@
+"""
+Single-question pipeline: thread -> message -> run -> answer.
+
+This is the flow every script in the repository repeats inline. Keeping it in
+one place lets the batch executor and later helpers share it.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .tags import resource_tags
+from .polling import DEFAULT_POLICY, TIMED_OUT, create_and_poll, wait_for_run
+from .timing import QueryTimer, record_run
+
+# A run normally posts a single assistant message; a small page keeps
+# retrieval to one request however long the thread is.
+ANSWER_PAGE_SIZE = 5
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+@dataclass
+class QueryResult:
+    """Outcome of one question sent to a SharePoint agent."""
+
+    query: str
+    status: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    thread_id: Optional[str] = None
+    run_id: Optional[str] = None
+    elapsed: float = 0.0
+    cached: bool = False
+    timings: Optional[dict] = None
+    usage: Optional[dict] = None
+
+    @property
+    def ok(self):
+        return self.status == "completed"
+
+
+def status_text(status):
+    """Return a run status as a plain string (``RunStatus`` members included)."""
+    return getattr(status, "value", status)
+
+
+def run_usage(run):
+    """Token counts of a finished run as ``{prompt_tokens, completion_tokens, total_tokens}``.
+
+    Returns ``None`` while the run is active or if the service reported no usage.
+    """
+    usage = getattr(run, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        counts = {key: int(usage.get(key) or 0) for key in USAGE_FIELDS}
+    else:
+        counts = {key: int(getattr(usage, key, None) or 0) for key in USAGE_FIELDS}
+    counts["total_tokens"] = counts["total_tokens"] or counts["prompt_tokens"] + counts["completion_tokens"]
+    return counts
+
+
+def message_text(message):
+    """Return the first text block of a message, or ``None``."""
+    for content in message.content or []:
+        text = getattr(content, "text", None)
+        if text:
+            return text.value
+    return None
+
+
+def assistant_messages(agents_client, thread_id, run_id=None, limit=ANSWER_PAGE_SIZE):
+    """Lazily yield assistant messages on a thread, newest first.
+
+    With ``run_id`` only the messages created by that run are requested, so
+    the cost does not grow with the length of the thread. ``limit`` is the
+    page size; further pages are only fetched if the caller keeps iterating.
+    """
+    messages = agents_client.messages.list(thread_id=thread_id, run_id=run_id, limit=limit, order="desc")
+    for message in messages:
+        if message.role == "assistant":
+            yield message
+
+
+def latest_answer(agents_client, thread_id, run_id=None):
+    """Return the text of the newest assistant message (of ``run_id``, if given)."""
+    for message in assistant_messages(agents_client, thread_id, run_id=run_id):
+        text = message_text(message)
+        if text:
+            return text
+    return None
+
+
+def run_query(agents_client, agent_id, query, policy=DEFAULT_POLICY, timer=None, trace_steps=False,
+              thread_id=None, stop=None, run_id=None, on_run=None):
+    """Ask ``query`` on a fresh thread (or ``thread_id``) and return a :class:`QueryResult`.
+
+    The run is driven by :func:`create_and_poll`, so it is cancelled and
+    reported as ``timed_out`` once ``policy.deadline`` passes. Each stage is
+    timed with ``timer`` (a new :class:`QueryTimer` by default) and the record
+    is returned in ``timings``; ``trace_steps`` also fetches run step details.
+    The run's token counts are returned in ``usage``.
+    Setting the ``stop`` event cancels the run early.
+
+    ``on_run`` is called with the run as soon as it has been created. Passing
+    an existing ``run_id`` (with its ``thread_id``) polls that run instead of
+    asking again, e.g. to re-attach to a run started before a restart.
+
+    Exceptions raised by the service are captured in ``error`` rather than
+    propagated, so a failing question never aborts a batch.
+    """
+    started = time.perf_counter()
+    timer = timer or QueryTimer(query=query, agent_id=agent_id)
+    result = QueryResult(query=query, status="error")
+    try:
+        if thread_id is None:
+            with timer.phase("threads.create"):
+                thread_id = agents_client.threads.create(metadata=resource_tags()).id
+        result.thread_id = thread_id
+        if run_id is None:
+            with timer.phase("messages.create"):
+                agents_client.messages.create(thread_id=thread_id, role="user", content=query)
+            with timer.phase("run"):
+                run = create_and_poll(agents_client, thread_id, agent_id, policy=policy, stop=stop,
+                                      on_created=on_run)
+        else:
+            with timer.phase("run"):
+                run = agents_client.runs.get(thread_id=thread_id, run_id=run_id)
+                run = wait_for_run(agents_client, thread_id, run, policy=policy, stop=stop)
+        result.run_id = run.id
+        result.status = status_text(run.status)
+        result.usage = run_usage(run)
+        for key, value in (result.usage or {}).items():
+            timer.set_attribute(key, value)
+        record_run(timer, agents_client, thread_id, run, steps=trace_steps)
+
+        if run.status == "completed":
+            with timer.phase("messages.list"):
+                result.answer = latest_answer(agents_client, thread_id, run_id=run.id)
+        elif run.status in ("failed", TIMED_OUT):
+            result.error = str(run.last_error)
+    except Exception as e:
+        result.error = str(e)
+    result.timings = timer.finish(result.status)
+    result.elapsed = time.perf_counter() - started
+    return result
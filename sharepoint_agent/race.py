@@ -0,0 +1,79 @@
+"""
+Race several phrasings of a question and keep the first good answer.
+
+Probing which prompt format the SharePoint tool accepts one variant at a time
+costs up to one full run latency per variant. ``race_queries`` submits every
+variant at once (at most ``max_concurrency`` runs at a time), takes the first
+successful answer and cancels the remaining runs with ``runs.cancel`` so they
+stop consuming service capacity. Variants that had not started yet are
+skipped.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .batch import DEFAULT_CONCURRENCY
+from .polling import DEFAULT_POLICY
+from .query import QueryResult, run_query
+
+SKIPPED = "skipped"
+CANCELLED_STATUSES = ("cancelled", "cancelling")
+
+
+def has_answer(result):
+    """Default acceptance test: the run completed and produced text."""
+    return result.ok and bool(result.answer)
+
+
+@dataclass
+class RaceResult:
+    """Winner of a race plus every variant's outcome, in submission order."""
+
+    winner: Optional[QueryResult] = None
+    results: List[QueryResult] = field(default_factory=list)
+    time_to_winner: Optional[float] = None
+    elapsed: float = 0.0
+
+    @property
+    def cancelled(self):
+        return sum(result.status in CANCELLED_STATUSES for result in self.results)
+
+    @property
+    def skipped(self):
+        return sum(result.status == SKIPPED for result in self.results)
+
+
+def race_queries(agents_client, agent_id, queries, max_concurrency=DEFAULT_CONCURRENCY, policy=DEFAULT_POLICY,
+                 accept=has_answer, trace_steps=False):
+    """Run ``queries`` concurrently, stop at the first result ``accept`` likes.
+
+    Returns a :class:`RaceResult`; ``winner`` is ``None`` if no variant was
+    accepted.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    queries = list(queries)
+    race = RaceResult()
+    stop = threading.Event()
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def _run(query):
+        if stop.is_set():
+            return QueryResult(query=query, status=SKIPPED)
+        result = run_query(agents_client, agent_id, query, policy=policy, trace_steps=trace_steps, stop=stop)
+        if accept(result):
+            with lock:
+                if race.winner is None:
+                    race.winner = result
+                    race.time_to_winner = time.perf_counter() - started
+                    stop.set()
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        race.results = list(pool.map(_run, queries))
+    race.elapsed = time.perf_counter() - started
+    return race
@@ -0,0 +1,363 @@
+"""
+Client-side rate limiting and 429-aware retries.
+
+Once queries run concurrently, the agents endpoint and the model deployment
+start answering with ``429 Too Many Requests``. ``RateLimiter`` paces every
+call through a shared token bucket (requests per second), caps how many runs
+are active at once, and retries throttled calls. It waits for the
+``Retry-After`` time when the service sends one, and otherwise backs off
+exponentially with jitter. A throttle response pauses the whole bucket, so
+other threads back off too instead of piling onto the same quota.
+
+``LimitedAgentsClient`` wraps ``project_client.agents`` (or the fake client) so
+every helper in this package goes through the limiter unchanged::
+
+    agents_client = LimitedAgentsClient(project_client.agents, RateLimiter(requests_per_second=10))
+
+``stats()`` exposes queue depth and throttle counters.
+
+An Azure SDK client also has azure-core's ``RetryPolicy``, which retries 429s
+by itself, honouring ``Retry-After``. With both layers, one throttle could turn
+into (core retries × limiter retries) requests, and the limiter would only see
+the 429s that got through the core retries. ``LimitedAgentsClient`` therefore
+turns off 429 retries in the wrapped client's ``RetryPolicy`` (see
+:func:`disable_throttle_retries`). The limiter is then the only layer that
+retries throttles, and its counters see every one. Other errors, such as
+5xx responses and connection failures, are still retried by azure-core. The
+wrapped client is changed in place, so wrap a client only if every caller
+goes through the limiter.
+
+A run slot is held from ``runs.create`` until the run is seen to finish, is
+cancelled (successfully or not) or is released with ``runs.release(run_id)``
+because the caller stopped tracking it. Waiting for a slot gives up after
+``run_slot_timeout`` seconds with :class:`RunSlotTimeout`, so a leaked slot
+cannot hang a worker forever.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from .polling import ACTIVE_STATUSES
+from .query import status_text
+
+THROTTLED_STATUS = 429
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MAX_CONCURRENT_RUNS = 8
+DEFAULT_MAX_RETRIES = 5
+# Longer than a run's default polling deadline (120s), so only a leak trips it.
+DEFAULT_RUN_SLOT_TIMEOUT = 300.0
+
+
+class RunSlotTimeout(TimeoutError):
+    """No run slot became free within ``run_slot_timeout`` seconds."""
+
+
+def is_throttled(error):
+    """True for ``HttpResponseError`` (or lookalikes) with status 429."""
+    return getattr(error, "status_code", None) == THROTTLED_STATUS
+
+
+def retry_after(error):
+    """Seconds the service asked us to wait, from the response headers, or ``None``."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available; return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                else:
+                    delay = (tokens - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def block(self, seconds):
+        """Hand out no tokens for the next ``seconds`` (e.g. after a 429)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self._tokens = 0.0
+
+
+class RateLimiter:
+    """Shared request pacing, run concurrency cap and 429 retry policy."""
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=None,
+                 max_concurrent_runs=DEFAULT_MAX_CONCURRENT_RUNS, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff=1.0, max_backoff=30.0, clock=time.monotonic, sleep=time.sleep,
+                 run_slot_timeout=DEFAULT_RUN_SLOT_TIMEOUT):
+        self.bucket = TokenBucket(requests_per_second, burst, clock=clock, sleep=sleep)
+        self.max_concurrent_runs = max_concurrent_runs
+        self.run_slot_timeout = run_slot_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_time = 0.0
+        self.queued = 0
+        self.runs_queued = 0
+        self.active_runs = 0
+        self._runs = threading.Semaphore(max_concurrent_runs) if max_concurrent_runs else None
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        """Call ``fn`` once a request token is free, retrying on 429."""
+        attempt = 0
+        while True:
+            with self._lock:
+                self.queued += 1
+            try:
+                waited = self.bucket.acquire()
+            finally:
+                with self._lock:
+                    self.queued -= 1
+            with self._lock:
+                self.requests += 1
+                self.wait_time += waited
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttled(e):
+                    raise
+                with self._lock:
+                    self.throttled += 1
+                    if attempt >= self.max_retries:
+                        self.failures += 1
+                        raise
+                    self.retries += 1
+                delay = retry_after(e)
+                if delay is None:
+                    delay = min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+                self.bucket.block(delay)
+                attempt += 1
+
+    def acquire_run(self):
+        """Wait for a free run slot (no-op without ``max_concurrent_runs``).
+
+        Raises :class:`RunSlotTimeout` after ``run_slot_timeout`` seconds.
+        """
+        if self._runs is None:
+            return
+        with self._lock:
+            self.runs_queued += 1
+        try:
+            acquired = self._runs.acquire(timeout=self.run_slot_timeout)
+        finally:
+            with self._lock:
+                self.runs_queued -= 1
+        if not acquired:
+            raise RunSlotTimeout(f"No run slot free after {self.run_slot_timeout:g}s "
+                                 f"({self.max_concurrent_runs} runs active)")
+        with self._lock:
+            self.active_runs += 1
+
+    def release_run(self):
+        if self._runs is None:
+            return
+        with self._lock:
+            self.active_runs -= 1
+        self._runs.release()
+
+    @contextmanager
+    def run_slot(self):
+        self.acquire_run()
+        try:
+            yield
+        finally:
+            self.release_run()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_time": self.wait_time,
+                "queue_depth": self.queued,
+                "runs_queued": self.runs_queued,
+                "active_runs": self.active_runs,
+            }
+
+
+class _Limited:
+    """Proxy whose methods go through ``limiter.call``."""
+
+    def __init__(self, target, limiter):
+        self._target = target
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def limited(*args, **kwargs):
+            return self._limiter.call(attr, *args, **kwargs)
+
+        return limited
+
+
+class _LimitedRuns(_Limited):
+    """Also holds a run slot from ``runs.create`` until the run is seen to finish."""
+
+    def __init__(self, target, limiter):
+        super().__init__(target, limiter)
+        self._active = set()
+        self._active_lock = threading.Lock()
+
+    def create(self, *args, **kwargs):
+        self._limiter.acquire_run()
+        try:
+            run = self._limiter.call(self._target.create, *args, **kwargs)
+        except Exception:
+            self._limiter.release_run()
+            raise
+        with self._active_lock:
+            self._active.add(run.id)
+        self._observe(run)
+        return run
+
+    def get(self, *args, **kwargs):
+        return self._observe(self._limiter.call(self._target.get, *args, **kwargs))
+
+    def cancel(self, *args, **kwargs):
+        run_id = kwargs.get("run_id", args[1] if len(args) > 1 else None)
+        try:
+            return self._limiter.call(self._target.cancel, *args, **kwargs)
+        finally:
+            # Whether or not the cancel went through, the caller has given up on the run.
+            self._finish(run_id)
+
+    def release(self, run_id):
+        """Give back the slot of a run the caller no longer tracks (no-op if already released)."""
+        self._finish(run_id)
+
+    def create_and_process(self, *args, **kwargs):
+        with self._limiter.run_slot():
+            return self._limiter.call(self._target.create_and_process, *args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return _SlotStream(self._limiter, lambda: self._limiter.call(self._target.stream, *args, **kwargs))
+
+    def _observe(self, run):
+        if status_text(run.status) not in ACTIVE_STATUSES:
+            self._finish(run.id)
+        return run
+
+    def _finish(self, run_id):
+        with self._active_lock:
+            if run_id not in self._active:
+                return
+            self._active.discard(run_id)
+        self._limiter.release_run()
+
+
+class _SlotStream:
+    """Holds a run slot for the lifetime of a ``runs.stream`` context."""
+
+    def __init__(self, limiter, open_stream):
+        self._limiter = limiter
+        self._open_stream = open_stream
+        self._stream = None
+
+    def __enter__(self):
+        self._limiter.acquire_run()
+        try:
+            self._stream = self._open_stream()
+            return self._stream.__enter__()
+        except Exception:
+            self._limiter.release_run()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            return self._stream.__exit__(*exc_info)
+        finally:
+            self._limiter.release_run()
+
+
+def disable_throttle_retries(agents_client):
+    """Stop azure-core's ``RetryPolicy`` in ``agents_client`` from retrying 429s.
+
+    Returns ``True`` if the client had a retry policy (fakes have none).
+    """
+    policy = getattr(getattr(agents_client, "_config", None), "retry_policy", None)
+    if policy is None or not hasattr(policy, "is_retry"):
+        return False
+    if getattr(policy, "_throttles_left_to_limiter", False):
+        return True
+    is_retry = policy.is_retry
+
+    def is_retry_unless_throttled(settings, response):
+        if response.http_response.status_code == THROTTLED_STATUS:
+            return False
+        return is_retry(settings, response)
+
+    policy.is_retry = is_retry_unless_throttled
+    policy._throttles_left_to_limiter = True
+    return True
+
+
+class LimitedAgentsClient(_Limited):
+    """An agents client whose calls are paced, capped and retried by ``limiter``.
+
+    Throttled calls are retried here only; see :func:`disable_throttle_retries`.
+    """
+
+    def __init__(self, agents_client, limiter=None):
+        self.limiter = limiter or RateLimiter()
+        disable_throttle_retries(agents_client)
+        super().__init__(agents_client, self.limiter)
+        self.threads = _Limited(agents_client.threads, self.limiter)
+        self.messages = _Limited(agents_client.messages, self.limiter)
+        self.runs = _LimitedRuns(agents_client.runs, self.limiter)
+        if hasattr(agents_client, "run_steps"):
+            self.run_steps = _Limited(agents_client.run_steps, self.limiter)
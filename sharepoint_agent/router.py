@@ -0,0 +1,214 @@
+"""
+Load balancing across model deployments and SharePoint connections.
+
+With one deployment, its quota is our ceiling and its outages take us down.
+``Router`` spreads runs over several backends (a deployment plus the
+SharePoint connection its agent uses, each with a weight). It picks the
+backend with the fewest outstanding runs relative to its weight, or uses
+smooth weighted round-robin. A backend is ejected for ``ejection_time``
+seconds after ``failure_threshold`` consecutive failures. If every backend is
+ejected, the one that is due back soonest is used rather than failing
+outright.
+
+Backends are configured with ``SHAREPOINT_AGENT_BACKENDS``, a JSON list::
+
+    [{"deployment": "gpt-4o", "weight": 3},
+     {"deployment": "gpt-4o-eu", "connection_id": "/subscriptions/.../connections/sp-eu", "weight": 1}]
+
+Entries without ``connection_id`` use ``SHAREPOINT_CONNECTION_ID``.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from .polling import DEFAULT_POLICY, TIMED_OUT
+from .query import QueryResult, run_query
+from .timing import QueryTimer
+
+BACKENDS_ENV = "SHAREPOINT_AGENT_BACKENDS"
+LEAST_OUTSTANDING = "least_outstanding"
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+STRATEGIES = (LEAST_OUTSTANDING, WEIGHTED_ROUND_ROBIN)
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_EJECTION_TIME = 30.0
+
+# Outcomes that say something about the backend rather than the question.
+_BACKEND_FAILURES = ("failed", "expired", TIMED_OUT, "error")
+
+
+@dataclass
+class Backend:
+    """One model deployment and the SharePoint connection its agent uses."""
+
+    model_deployment_name: str
+    sharepoint_connection_id: str
+    weight: float = 1.0
+    name: str = ""
+
+    def __post_init__(self):
+        if self.weight <= 0:
+            raise ValueError("weight must be positive")
+        self.name = self.name or self.model_deployment_name
+
+
+def load_backends(settings, environ=None):
+    """Backends from ``SHAREPOINT_AGENT_BACKENDS``, or the single one in ``settings``."""
+    environ = os.environ if environ is None else environ
+    spec = environ.get(BACKENDS_ENV)
+    if not spec:
+        return [Backend(settings.model_deployment_name, settings.sharepoint_connection_id)]
+    try:
+        entries = json.loads(spec)
+        return [
+            Backend(
+                entry["deployment"],
+                entry.get("connection_id", settings.sharepoint_connection_id),
+                float(entry.get("weight", 1)),
+                entry.get("name", ""),
+            )
+            for entry in entries
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise KeyError(f"Invalid {BACKENDS_ENV}: {e}") from None
+
+
+class _BackendState:
+    def __init__(self, backend):
+        self.backend = backend
+        self.outstanding = 0
+        self.current_weight = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+
+class Router:
+    """Pick a healthy backend for each run and track outstanding work and failures."""
+
+    def __init__(self, backends, strategy=LEAST_OUTSTANDING, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 ejection_time=DEFAULT_EJECTION_TIME, clock=time.monotonic):
+        if not backends:
+            raise ValueError("at least one backend is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self._clock = clock
+        self._states = [_BackendState(backend) for backend in backends]
+        self._lock = threading.Lock()
+
+    @property
+    def backends(self):
+        return [state.backend for state in self._states]
+
+    def acquire(self, exclude=()):
+        """Choose a backend and count a run as outstanding on it."""
+        with self._lock:
+            now = self._clock()
+            candidates = [state for state in self._states if state.backend.name not in exclude] or self._states
+            healthy = [state for state in candidates if state.ejected_until <= now]
+            if healthy:
+                state = self._choose(healthy)
+            else:
+                state = min(candidates, key=lambda s: s.ejected_until)
+            state.outstanding += 1
+            state.requests += 1
+            return state.backend
+
+    def release(self, backend, ok):
+        """Finish a run on ``backend``; ``ok=False`` counts towards ejection."""
+        with self._lock:
+            state = self._state(backend)
+            state.outstanding -= 1
+            if ok:
+                state.consecutive_failures = 0
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= self.failure_threshold:
+                state.ejected_until = self._clock() + self.ejection_time
+                state.ejections += 1
+                # One more failure after re-admission ejects it again.
+                state.consecutive_failures = self.failure_threshold - 1
+
+    @contextmanager
+    def lease(self, exclude=()):
+        """Context manager around :meth:`acquire`; an exception counts as a failure."""
+        backend = self.acquire(exclude)
+        outcome = {"ok": False}
+        try:
+            yield backend, outcome
+        finally:
+            self.release(backend, outcome["ok"])
+
+    def stats(self):
+        with self._lock:
+            now = self._clock()
+            return {
+                state.backend.name: {
+                    "weight": state.backend.weight,
+                    "outstanding": state.outstanding,
+                    "requests": state.requests,
+                    "failures": state.failures,
+                    "ejections": state.ejections,
+                    "ejected": state.ejected_until > now,
+                }
+                for state in self._states
+            }
+
+    def _choose(self, states):
+        if self.strategy == WEIGHTED_ROUND_ROBIN:
+            # Smooth weighted round-robin (as in nginx): no bursts on heavy backends.
+            total = sum(state.backend.weight for state in states)
+            for state in states:
+                state.current_weight += state.backend.weight
+            chosen = max(states, key=lambda s: s.current_weight)
+            chosen.current_weight -= total
+            return chosen
+        return min(states, key=lambda s: ((s.outstanding + 1) / s.backend.weight, s.requests))
+
+    def _state(self, backend):
+        for state in self._states:
+            if state.backend.name == backend.name:
+                return state
+        raise KeyError(backend.name)
+
+
+def routed_run_query(router, pool, agents_client, query, instructions, tools_for=None, policy=DEFAULT_POLICY,
+                     retries=1, trace_steps=False, on_run=None):
+    """Run ``query`` on a backend chosen by ``router``, failing over on backend errors.
+
+    ``pool`` is an :class:`~sharepoint_agent.pool.AgentPool` (one agent per
+    backend); ``tools_for(backend)`` returns the tool definitions for a
+    backend's connection. The chosen backend is recorded as the ``backend``
+    attribute of the result's timings. ``on_run`` is passed to
+    :func:`run_query` for every attempt. A backend whose agent cannot be
+    created counts as failed, and its error becomes an ``error`` result.
+    """
+    tried = []
+    result = None
+    for _ in range(retries + 1):
+        with router.lease(exclude=tried) as (backend, outcome):
+            tried.append(backend.name)
+            started = time.perf_counter()
+            try:
+                tools = tools_for(backend) if tools_for else None
+                with pool.agent(backend.model_deployment_name, instructions, tools) as agent:
+                    timer = QueryTimer(query=query, agent_id=agent.id, backend=backend.name)
+                    result = run_query(agents_client, agent.id, query, policy=policy, timer=timer,
+                                       trace_steps=trace_steps, on_run=on_run)
+            except Exception as e:
+                # No agent for this backend (e.g. a missing deployment or connection): try the next one.
+                result = QueryResult(query=query, status="error", error=f"Backend {backend.name}: {e}",
+                                     elapsed=time.perf_counter() - started)
+            outcome["ok"] = result.status not in _BACKEND_FAILURES
+        if outcome["ok"] or len(tried) >= len(router.backends):
+            break
+    return result
@@ -0,0 +1,169 @@
+"""
+Thread reuse for multi-turn document conversations.
+
+Every one-shot query starts on a new thread, so a follow-up question about the
+same document makes the agent query SharePoint again and rebuild its context.
+``SessionManager`` maps a conversation key (a user id, chat id, document name,
+...) to a persistent thread. Follow-up questions are posted to that thread, so
+the agent can answer from the documents it already retrieved instead of
+repeating the SharePoint tool call.
+
+Sessions expire after ``idle_timeout`` seconds without a question, and at most
+``max_sessions`` threads are kept alive; the least recently used idle session
+is evicted first. Threads are deleted on the service when their session ends.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .tags import resource_tags
+from .polling import DEFAULT_POLICY
+from .query import QueryResult, run_query
+
+DEFAULT_IDLE_TIMEOUT = 900.0
+DEFAULT_MAX_SESSIONS = 64
+
+
+class _Session:
+    def __init__(self, key, now):
+        self.key = key
+        self.thread_id = None
+        self.turns = 0
+        self.in_use = 0
+        self.last_used = now
+        # A thread accepts one active run at a time, so turns are serialised.
+        self.lock = threading.Lock()
+
+
+class SessionManager:
+    """Persistent threads keyed by conversation, with idle expiry and a size cap."""
+
+    def __init__(self, agents_client, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_sessions=DEFAULT_MAX_SESSIONS,
+                 clock=time.monotonic):
+        self.agents_client = agents_client
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, key):
+        """Hold the session for ``key`` (creating its thread if needed) for one turn."""
+        self.reap()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = _Session(key, self._clock())
+            self._sessions.move_to_end(key)
+            session.in_use += 1
+            dropped = self._evict_over_cap()
+        self._delete_threads(dropped, evicted=True)
+
+        try:
+            with session.lock:
+                if session.thread_id is None:
+                    session.thread_id = self.agents_client.threads.create(metadata=resource_tags()).id
+                    self.created += 1
+                else:
+                    self.reused += 1
+                yield session
+                session.turns += 1
+        finally:
+            with self._lock:
+                session.in_use -= 1
+                session.last_used = self._clock()
+                if session.thread_id is None and session.in_use == 0 and self._sessions.get(key) is session:
+                    del self._sessions[key]
+
+    def ask(self, key, agent_id, query, policy=DEFAULT_POLICY, trace_steps=False):
+        """Ask ``query`` on the conversation thread for ``key`` and return a :class:`QueryResult`."""
+        try:
+            with self.session(key) as session:
+                return run_query(self.agents_client, agent_id, query, policy=policy,
+                                 trace_steps=trace_steps, thread_id=session.thread_id)
+        except Exception as e:
+            return QueryResult(query=query, status="error", error=str(e))
+
+    def thread_id(self, key):
+        """Return the thread id of an existing session, or ``None``."""
+        with self._lock:
+            session = self._sessions.get(key)
+            return session.thread_id if session else None
+
+    def end(self, key):
+        """End a conversation and delete its thread. Returns ``True`` if it existed."""
+        with self._lock:
+            session = self._sessions.pop(key, None)
+        if session is None:
+            return False
+        self._delete_threads([session])
+        return True
+
+    def reap(self):
+        """End sessions that have been idle longer than ``idle_timeout``."""
+        now = self._clock()
+        with self._lock:
+            stale = [
+                key for key, session in self._sessions.items()
+                if session.in_use == 0 and now - session.last_used > self.idle_timeout
+            ]
+            expired = [self._sessions.pop(key) for key in stale]
+        self._delete_threads(expired, evicted=True)
+        return len(expired)
+
+    def close(self):
+        """End every session and delete its thread."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        self._delete_threads(sessions)
+
+    def stats(self):
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "sessions": active,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+    def _evict_over_cap(self):
+        """Pop least recently used idle sessions beyond ``max_sessions`` (lock held)."""
+        evicted = []
+        for key in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if self._sessions[key].in_use == 0:
+                evicted.append(self._sessions.pop(key))
+        return evicted
+
+    def _delete_threads(self, sessions, evicted=False):
+        for session in sessions:
+            self.evicted += evicted
+            if session.thread_id is None:
+                continue
+            try:
+                self.agents_client.threads.delete(session.thread_id)
+            except Exception as e:
+                print(f"⚠️ Could not delete session thread {session.thread_id}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._sessions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,113 @@
+"""
+Streaming run mode.
+
+Instead of blocking in ``runs.create_and_process`` and listing messages
+afterwards, ``stream_query`` consumes ``runs.stream`` and hands assistant text
+deltas and SharePoint tool-call events to callbacks as they arrive. It records
+time-to-first-token alongside the total run time, and the token usage
+reported with the finished run.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .query import run_usage, status_text
+
+MESSAGE_DELTA = "thread.message.delta"
+RUN_STEP_EVENTS = ("thread.run.step.created", "thread.run.step.completed", "thread.run.step.failed")
+RUN_FINISHED_EVENTS = {
+    "thread.run.completed": "completed",
+    "thread.run.failed": "failed",
+    "thread.run.cancelled": "cancelled",
+    "thread.run.expired": "expired",
+    "thread.run.incomplete": "incomplete",
+}
+
+
+@dataclass
+class StreamResult:
+    """Outcome of a streamed run."""
+
+    status: str = "error"
+    answer: str = ""
+    error: Optional[str] = None
+    run_id: Optional[str] = None
+    time_to_first_token: Optional[float] = None
+    total_time: float = 0.0
+    tool_calls: List[str] = field(default_factory=list)
+    usage: Optional[dict] = None
+
+
+def print_delta(text):
+    """Default text callback: write deltas to stdout without newlines."""
+    print(text, end="", flush=True)
+
+
+def print_tool_call(tool_type, status):
+    """Default tool-call callback."""
+    print(f"\n🔧 Tool call: {tool_type} ({status})", flush=True)
+
+
+def _tool_calls(step):
+    details = getattr(step, "step_details", None)
+    if getattr(step, "type", None) != "tool_calls" or details is None:
+        return []
+    return getattr(details, "tool_calls", None) or []
+
+
+def stream_query(agents_client, agent_id, thread_id, on_text=print_delta, on_tool_call=print_tool_call):
+    """Stream a run on ``thread_id`` and return a :class:`StreamResult`.
+
+    The thread must already contain the user message. ``on_text`` receives
+    each assistant text delta; ``on_tool_call`` receives ``(tool_type, status)``
+    for every tool-call run step (for example ``sharepoint_grounding``).
+    Either callback may be ``None``.
+    """
+    result = StreamResult()
+    started = time.perf_counter()
+    chunks = []
+    try:
+        with agents_client.runs.stream(thread_id=thread_id, agent_id=agent_id) as stream:
+            for event_type, event_data, _ in stream:
+                event_type = status_text(event_type)
+
+                if event_type == MESSAGE_DELTA:
+                    text = getattr(event_data, "text", "")
+                    if not text:
+                        continue
+                    if result.time_to_first_token is None:
+                        result.time_to_first_token = time.perf_counter() - started
+                    chunks.append(text)
+                    if on_text is not None:
+                        on_text(text)
+
+                elif event_type in RUN_STEP_EVENTS:
+                    for tool_call in _tool_calls(event_data):
+                        tool_type = status_text(getattr(tool_call, "type", "tool"))
+                        step_status = status_text(getattr(event_data, "status", ""))
+                        if event_type == "thread.run.step.created":
+                            result.tool_calls.append(tool_type)
+                        if on_tool_call is not None:
+                            on_tool_call(tool_type, step_status)
+
+                elif event_type in RUN_FINISHED_EVENTS:
+                    result.status = RUN_FINISHED_EVENTS[event_type]
+                    result.run_id = getattr(event_data, "id", result.run_id)
+                    result.usage = run_usage(event_data)
+                    if result.status == "failed":
+                        result.error = str(getattr(event_data, "last_error", None))
+
+                elif event_type == "thread.run.created":
+                    result.run_id = getattr(event_data, "id", None)
+
+                elif event_type == "error":
+                    result.status = "error"
+                    result.error = str(event_data)
+    except Exception as e:
+        result.status = "error"
+        result.error = str(e)
+
+    result.answer = "".join(chunks)
+    result.total_time = time.perf_counter() - started
+    return result
@@ -0,0 +1,23 @@
+"""
+Metadata tags that mark agents and threads as created by this package.
+
+``sharepoint_agent.cleanup`` uses them to find orphaned resources.
+"""
+
+import os
+import socket
+
+CREATED_BY_KEY = "created_by"
+CREATED_BY = "sharepoint-agent"
+
+
+def hostname():
+    # Metadata values are limited to 512 characters; host names are far shorter.
+    return socket.gethostname()[:64]
+
+
+def resource_tags(**extra):
+    """Metadata to attach to every agent and thread this package creates."""
+    tags = {CREATED_BY_KEY: CREATED_BY, "host": hostname(), "pid": str(os.getpid())}
+    tags.update({key: str(value) for key, value in extra.items()})
+    return tags
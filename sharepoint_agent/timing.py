@@ -0,0 +1,200 @@
+"""
+Per-phase latency instrumentation.
+
+``QueryTimer`` records how long each stage of a question took (client
+creation, ``create_agent``, ``threads.create``, ``messages.create``, the run's
+queued / in_progress phases, individual run steps such as the SharePoint tool
+call, and ``messages.list``). Every timer produces a JSON-serialisable record
+and, when the optional ``opentelemetry-api`` package is installed, mirrors the
+phases as child spans of a ``sharepoint.query`` span.
+
+Set ``SHAREPOINT_AGENT_TIMING_LOG`` to a file path to append one JSON record
+per query there.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # OpenTelemetry is optional
+    _otel_trace = None
+
+TIMING_LOG_ENV = "SHAREPOINT_AGENT_TIMING_LOG"
+
+_log_lock = threading.Lock()
+
+
+def _epoch(value):
+    """Convert SDK timestamps (datetime or epoch seconds) to epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _plain(value):
+    return getattr(value, "value", value)
+
+
+class QueryTimer:
+    """Collects phase durations for one query."""
+
+    def __init__(self, name="sharepoint.query", **attributes):
+        self.name = name
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.phases = []
+        self.steps = []
+        self.total = None
+        self._started = time.perf_counter()
+        self._tracer = _otel_trace.get_tracer("sharepoint_agent") if _otel_trace else None
+        self._span = self._tracer.start_span(name, attributes=self.attributes) if self._tracer else None
+
+    @contextmanager
+    def phase(self, name, **attributes):
+        """Time the enclosed block as phase ``name``."""
+        span = None
+        if self._tracer:
+            context = _otel_trace.set_span_in_context(self._span)
+            span = self._tracer.start_span(name, context=context, attributes=attributes)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "duration": time.perf_counter() - started, **attributes})
+            if span is not None:
+                span.end()
+
+    def add(self, name, start, end, **attributes):
+        """Record a phase measured by the service (epoch ``start`` / ``end``)."""
+        if start is None or end is None or end < start:
+            return
+        self.phases.append({"name": name, "duration": end - start, **attributes})
+        if self._tracer:
+            context = _otel_trace.set_span_in_context(self._span)
+            span = self._tracer.start_span(name, context=context, attributes=attributes,
+                                           start_time=int(start * 1e9))
+            span.end(end_time=int(end * 1e9))
+
+    def set_attribute(self, key, value):
+        if value is None:
+            return
+        self.attributes[key] = value
+        if self._span is not None:
+            self._span.set_attribute(key, value)
+
+    def finish(self, status=None):
+        """Close the timer and return its JSON-serialisable record."""
+        if self.total is None:
+            self.total = time.perf_counter() - self._started
+            self.set_attribute("status", status)
+            if self._span is not None:
+                self._span.end()
+            log_path = os.environ.get(TIMING_LOG_ENV)
+            if log_path:
+                write_record(self.as_dict(), log_path)
+        return self.as_dict()
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "attributes": dict(self.attributes),
+            "total": self.total if self.total is not None else time.perf_counter() - self._started,
+            "phases": list(self.phases),
+            "steps": list(self.steps),
+        }
+
+
+def record_run(timer, agents_client, thread_id, run, steps=False):
+    """Add the run's queued / in_progress phases and, optionally, its run steps.
+
+    Phase boundaries come from the service timestamps on the run, so they are
+    accurate regardless of the client's polling interval. Fetching steps costs
+    one extra ``run_steps.list`` call.
+    """
+    run = getattr(run, "run", run)  # unwrap TimedOutRun
+    created = _epoch(getattr(run, "created_at", None))
+    started = _epoch(getattr(run, "started_at", None))
+    finished = None
+    for field in ("completed_at", "failed_at", "cancelled_at"):
+        finished = _epoch(getattr(run, field, None))
+        if finished is not None:
+            break
+    timer.set_attribute("run_id", getattr(run, "id", None))
+    timer.add("run.queued", created, started)
+    timer.add("run.in_progress", started, finished)
+
+    if not steps or not hasattr(agents_client, "run_steps"):
+        return
+    try:
+        for step in agents_client.run_steps.list(thread_id=thread_id, run_id=run.id):
+            details = getattr(step, "step_details", None)
+            tools = [_plain(getattr(call, "type", "tool")) for call in (getattr(details, "tool_calls", None) or [])]
+            step_type = _plain(getattr(step, "type", "step"))
+            name = f"run.step.{tools[0]}" if tools else f"run.step.{step_type}"
+            start = _epoch(getattr(step, "created_at", None))
+            end = _epoch(getattr(step, "completed_at", None) or getattr(step, "failed_at", None))
+            timer.steps.append({
+                "id": getattr(step, "id", None),
+                "type": step_type,
+                "status": _plain(getattr(step, "status", None)),
+                "tools": tools,
+                "duration": (end - start) if start is not None and end is not None else None,
+            })
+            timer.add(name, start, end, step_id=getattr(step, "id", None))
+    except Exception as e:
+        timer.steps.append({"error": str(e)})
+
+
+def write_record(record, path):
+    """Append one timing record as a JSON line."""
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def summarize(records):
+    """Aggregate phase durations across timing records: ``{phase: [durations]}``."""
+    phases = {}
+    for record in records:
+        if not record:
+            continue
+        for phase in record["phases"]:
+            phases.setdefault(phase["name"], []).append(phase["duration"])
+    return phases
+
+
+def parent_phase(name, names):
+    """The phase ``name`` is nested in (``run`` for ``run.step.x``), or ``None`` for a top-level phase."""
+    parts = name.split(".")
+    for end in range(len(parts) - 1, 0, -1):
+        parent = ".".join(parts[:end])
+        if parent in names:
+            return parent
+    return None
+
+
+def print_summary(records, title="Where the time went"):
+    """Print a per-phase table (count, mean, max and share of total time).
+
+    Nested phases such as ``run.queued`` are indented under their parent and
+    get no share, since their time is already part of the parent's.
+    """
+    records = [record for record in records if record]
+    if not records:
+        return
+    total = sum(record["total"] for record in records)
+    print(f"\n⏱️ {title} ({len(records)} quer{'y' if len(records) == 1 else 'ies'}, {total:.2f}s total)")
+    print(f"   {'Phase':<34}{'Count':>6}{'Mean ms':>10}{'Max ms':>10}{'Share':>8}")
+    phases = summarize(records)
+    for name, durations in phases.items():
+        nested = parent_phase(name, phases) is not None
+        share = f"{sum(durations) / total if total else 0.0:>8.0%}" if not nested else ""
+        label = f"  {name}" if nested else name
+        print(f"   {label:<34}{len(durations):>6}{statistics.mean(durations) * 1000:>10.1f}"
+              f"{max(durations) * 1000:>10.1f}{share}")
@@ -0,0 +1,272 @@
+"""
+Token usage accounting and a tokens-per-minute budget.
+
+Every finished run reports ``usage`` (prompt, completion and total tokens).
+With SharePoint grounding, the prompt side includes the document content the
+tool injected, so it can be many times larger than the question.
+``UsageTracker`` adds up the usage of each :class:`QueryResult` and groups it
+by query template (the question with quoted names and numbers masked), by
+agent and by deployment. That shows which kinds of question cost the most.
+
+Model deployments are provisioned in tokens per minute, and batch work can use
+up that quota long before the request limit is reached. ``TokenBudget`` keeps
+a sliding one-minute window of tokens spent. Before each question it reserves
+the expected cost, which is a running average of recent runs. While the window
+plus outstanding reservations would go over the budget, new questions wait
+instead of being sent into a 429. :func:`metered` wraps a runner with both.
+
+Usage:
+    python -m sharepoint_agent.usage results.jsonl     # report on a jsonl batch output
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from .query import QueryResult
+
+WINDOW = 60.0
+# Expected cost of a question before any run has reported usage.
+DEFAULT_ESTIMATE = 2000
+# Weight of the newest run in the running estimate.
+ESTIMATE_SMOOTHING = 0.2
+MAX_TEMPLATE_LENGTH = 100
+GROUPS = ("template", "agent", "deployment")
+
+_QUOTED = re.compile(r"(?<!\w)(?:'[^'\n]*'|\"[^\"\n]*\"|“[^”\n]*”)(?!\w)")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def query_template(query):
+    """``Summarize 'Q3 report.docx'`` -> ``Summarize '…'``: the question with its specifics masked."""
+    text = _QUOTED.sub("'…'", query)
+    text = " ".join(_NUMBER.sub("#", text).split())
+    if len(text) > MAX_TEMPLATE_LENGTH:
+        text = text[:MAX_TEMPLATE_LENGTH - 1] + "…"
+    return text
+
+
+def tokens_used(result):
+    """Total tokens a result cost; cached and local answers cost none."""
+    if result is None or result.cached or not result.usage:
+        return 0
+    return result.usage.get("total_tokens", 0)
+
+
+class _Totals:
+    def __init__(self):
+        self.queries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.elapsed = 0.0
+
+    def add(self, usage, elapsed):
+        self.queries += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        self.total_tokens += usage.get("total_tokens", 0)
+        self.elapsed += elapsed
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "tokens_per_query": self.total_tokens / self.queries if self.queries else 0.0,
+            # Per-run rate: tokens divided by the time the runs themselves took.
+            "tokens_per_second": self.total_tokens / self.elapsed if self.elapsed else 0.0,
+        }
+
+
+class UsageTracker:
+    """Thread-safe token totals per query template, agent and deployment.
+
+    Without a ``clock`` no overall per-minute rate is reported.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.cached = 0
+        self.unreported = 0
+        self._clock = clock
+        self._started = None
+        self._total = _Totals()
+        self._groups = {group: {} for group in GROUPS}
+        self._lock = threading.Lock()
+
+    def record(self, result, agent=None, deployment=None):
+        """Add one result's usage.
+
+        The agent and deployment default to the ``agent_id`` and ``backend``
+        attributes of the result's timings (set by :func:`run_query` and
+        :func:`~sharepoint_agent.router.routed_run_query`).
+        """
+        attributes = (result.timings or {}).get("attributes", {})
+        keys = {
+            "template": query_template(result.query),
+            "agent": agent or attributes.get("agent_id") or "unknown",
+            "deployment": deployment or attributes.get("backend") or "unknown",
+        }
+        with self._lock:
+            if self._started is None and self._clock is not None:
+                self._started = self._clock() - result.elapsed
+            if result.cached:
+                self.cached += 1
+                return
+            if not result.usage:
+                self.unreported += 1
+                return
+            self._total.add(result.usage, result.elapsed)
+            for group, key in keys.items():
+                self._groups[group].setdefault(key, _Totals()).add(result.usage, result.elapsed)
+
+    def report(self):
+        """Totals plus one entry per template, agent and deployment, most tokens first."""
+        with self._lock:
+            total = self._total.as_dict()
+            wall = self._clock() - self._started if self._started is not None else 0.0
+            total.update(cached=self.cached, unreported=self.unreported, wall_time=wall,
+                         tokens_per_minute=self._total.total_tokens / wall * 60 if wall else 0.0)
+            report = {"total": total}
+            for group, entries in self._groups.items():
+                ranked = sorted(entries.items(), key=lambda item: item[1].total_tokens, reverse=True)
+                report[f"by_{group}"] = {key: totals.as_dict() for key, totals in ranked}
+            return report
+
+
+class TokenBudget:
+    """Sliding one-minute token budget shared by concurrent workers."""
+
+    def __init__(self, tokens_per_minute, estimate=DEFAULT_ESTIMATE, window=WINDOW, clock=time.monotonic,
+                 sleep=time.sleep):
+        if tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute must be positive")
+        self.tokens_per_minute = tokens_per_minute
+        self.estimate = estimate
+        self.window = window
+        self.deferred = 0
+        self.wait_time = 0.0
+        self._reserved = 0
+        self._spent = deque()
+        self._spent_total = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._spent and now - self._spent[0][0] >= self.window:
+            self._spent_total -= self._spent.popleft()[1]
+
+    def acquire(self):
+        """Reserve the expected cost of one question, waiting while the budget is used up.
+
+        Returns the reservation to pass to :meth:`settle`. A question is
+        always admitted when nothing else is spent or reserved, so one
+        question costing more than the whole budget cannot stall the batch.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._prune(now)
+                reservation = round(self.estimate)
+                committed = self._spent_total + self._reserved
+                if committed == 0 or committed + reservation <= self.tokens_per_minute:
+                    self._reserved += reservation
+                    if waited:
+                        self.deferred += 1
+                        self.wait_time += waited
+                    return reservation
+                # Wake up when the oldest spend leaves the window (or sooner, as reservations settle).
+                delay = self._spent[0][0] + self.window - now if self._spent else self.window
+                delay = min(max(delay, 0.01), 1.0)
+            self._sleep(delay)
+            waited += delay
+
+    def settle(self, reservation, tokens):
+        """Replace ``reservation`` with the ``tokens`` the question actually used."""
+        with self._lock:
+            self._reserved -= reservation
+            if tokens:
+                self._spent.append((self._clock(), tokens))
+                self._spent_total += tokens
+                self.estimate += (tokens - self.estimate) * ESTIMATE_SMOOTHING
+
+    def stats(self):
+        with self._lock:
+            self._prune(self._clock())
+            return {
+                "tokens_per_minute": self.tokens_per_minute,
+                "used": self._spent_total,
+                "reserved": self._reserved,
+                "estimate": round(self.estimate),
+                "deferred": self.deferred,
+                "wait_time": self.wait_time,
+            }
+
+
+def metered(runner, tracker=None, budget=None):
+    """Wrap ``runner(query, **kwargs)`` to record usage in ``tracker`` and pace it with ``budget``."""
+    def run(query, **kwargs):
+        reservation = budget.acquire() if budget is not None else 0
+        result = None
+        try:
+            result = runner(query, **kwargs)
+            return result
+        finally:
+            if budget is not None:
+                budget.settle(reservation, tokens_used(result))
+            if tracker is not None and result is not None:
+                tracker.record(result)
+
+    return run
+
+
+def print_report(report, top=5, out=sys.stdout):
+    total = report["total"]
+    print(f"🪙 {total['total_tokens']:,} tokens over {total['queries']} runs "
+          f"({total['prompt_tokens']:,} prompt, {total['completion_tokens']:,} completion): "
+          f"{total['tokens_per_query']:,.0f} per query, {total['tokens_per_second']:,.0f} per second of run time"
+          + (f", {total['tokens_per_minute']:,.0f} per minute overall" if total["wall_time"] else ""), file=out)
+    if total["cached"] or total["unreported"]:
+        print(f"   {total['cached']} cached answers (no tokens), {total['unreported']} runs without usage", file=out)
+    for group in GROUPS:
+        entries = report[f"by_{group}"]
+        if len(entries) < 2 and group != "template":
+            continue
+        print(f"   by {group}:", file=out)
+        for key, totals in list(entries.items())[:top]:
+            print(f"   {totals['total_tokens']:>10,} {totals['queries']:>6} runs {totals['tokens_per_query']:>8,.0f}/query"
+                  f" {totals['tokens_per_second']:>7,.0f}/s  {key}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report token usage from a jsonl batch output file.")
+    parser.add_argument("path", help="results file written by python -m sharepoint_agent.jsonl")
+    parser.add_argument("--top", type=int, default=10, help="entries to show per group")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    fields = set(QueryResult.__dataclass_fields__)
+    # The file holds no timestamps and its runs overlapped, so there is no overall per-minute rate.
+    tracker = UsageTracker(clock=None)
+    with open(args.path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                tracker.record(QueryResult(**{key: value for key, value in record.items() if key in fields}))
+    report = tracker.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, top=args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
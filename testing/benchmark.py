@@ -0,0 +1,286 @@
+"""
+Offline benchmark suite for the SharePoint agent flows.
+
+Runs the same agent/thread/message/run flows used by sample_agents_sharepoint.py
+and the testing/ scripts against the local FakeAgentsClient, so performance can
+be measured (and regressions caught in CI) without a Foundry project, network
+access or SharePoint preview access.
+
+Usage:
+    python testing/benchmark.py
+    python testing/benchmark.py --latency 0.5 --failure-rate 0.1 --json bench.json
+    python testing/benchmark.py --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharepoint_agent import AgentPool, AnswerCache, Backend, BatchExecutor, FakeAgentsClient, LimitedAgentsClient
+from sharepoint_agent import PollPolicy, RateLimiter, Router, SessionManager, SingleFlight, cached_run_query
+from sharepoint_agent import coalesced_run_query, create_and_poll, routed_run_query, run_query
+from sharepoint_agent.config import DEFAULT_INSTRUCTIONS
+from sharepoint_agent.query import latest_answer
+from sharepoint_agent.timing import QueryTimer, record_run, summarize as summarize_phases
+
+MODEL = "fake-model"
+CONNECTION_ID = "fake-connection"
+
+# Same shape of questions as testing/test_document_access.py
+QUERIES = [
+    "Can you find and summarize the document named 'Doc to test.docx'?",
+    "Please list all documents in the Shared Documents library.",
+    "What files are available in the Documents library?",
+    "Show me documents in /Shared Documents/",
+    "List files in the root folder.",
+    "Search for documents containing 'test' in the name.",
+    "Find any Word documents (.docx files).",
+    "What SharePoint content can you access?",
+    "Show me the available document libraries.",
+]
+
+
+def make_client(args, **overrides):
+    options = dict(
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        api_latency=args.api_latency,
+        jitter=args.jitter,
+        answer_size=args.answer_size,
+    )
+    options.update(overrides)
+    return FakeAgentsClient(**options)
+
+
+def queries_for(args):
+    return [QUERIES[i % len(QUERIES)] + ("" if i < len(QUERIES) else f" (#{i})") for i in range(args.queries)]
+
+
+def summarize(name, latencies, total, client, failures=0):
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "queries": len(latencies),
+        "failures": failures,
+        "total_s": total,
+        "throughput_qps": len(latencies) / total if total else 0.0,
+        "p50_s": statistics.median(ordered) if ordered else 0.0,
+        "max_s": ordered[-1] if ordered else 0.0,
+        "api_calls": sum(client.calls.values()),
+    }
+
+
+def bench_sample_flow(args, policy):
+    """One question per iteration, exactly like sample_agents_sharepoint.py."""
+    client = make_client(args)
+    records = []
+    failures = 0
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        timer = QueryTimer(scenario="sample_flow")
+        with timer.phase("create_agent"):
+            agent = client.create_agent(model=MODEL, name="sharepoint-ai-agent", instructions=DEFAULT_INSTRUCTIONS)
+        with timer.phase("threads.create"):
+            thread = client.threads.create()
+        with timer.phase("messages.create"):
+            client.messages.create(thread_id=thread.id, role="user", content=QUERIES[0])
+        with timer.phase("run"):
+            run = create_and_poll(client, thread.id, agent.id, policy=policy)
+        record_run(timer, client, thread.id, run, steps=True)
+        with timer.phase("messages.list"):
+            latest_answer(client, thread.id, run_id=run.id)
+        with timer.phase("delete_agent"):
+            client.delete_agent(agent.id)
+        failures += run.status != "completed"
+        records.append(timer.finish(run.status))
+    result = summarize("sample_flow", [r["total"] for r in records], time.perf_counter() - started, client, failures)
+    result["phases"] = {name: statistics.mean(values) for name, values in summarize_phases(records).items()}
+    return result
+
+
+def bench_agent_per_query(args, policy):
+    """The original test_document_access.py pattern: a new agent for every query."""
+    client = make_client(args)
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    for query in queries_for(args):
+        begin = time.perf_counter()
+        agent = client.create_agent(model=MODEL, name="sharepoint-test-agent", instructions=DEFAULT_INSTRUCTIONS)
+        result = run_query(client, agent.id, query, policy=policy)
+        client.delete_agent(agent.id)
+        failures += not result.ok
+        latencies.append(time.perf_counter() - begin)
+    return summarize("agent_per_query", latencies, time.perf_counter() - started, client, failures)
+
+
+def bench_pooled(args, policy, concurrency):
+    """Pooled agent, queries run through BatchExecutor."""
+    client = make_client(args)
+    started = time.perf_counter()
+    with AgentPool(client) as pool, pool.agent(MODEL, DEFAULT_INSTRUCTIONS) as agent:
+        results = BatchExecutor(client, agent.id, max_concurrency=concurrency, policy=policy).run(queries_for(args))
+    name = "pooled_sequential" if concurrency == 1 else f"pooled_concurrent_{concurrency}"
+    return summarize(name, [r.elapsed for r in results], time.perf_counter() - started, client,
+                     sum(not r.ok for r in results))
+
+
+def bench_session(args, policy):
+    """Follow-up questions on one conversation thread via SessionManager."""
+    client = make_client(args)
+    agent = client.create_agent(model=MODEL, instructions=DEFAULT_INSTRUCTIONS)
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    with SessionManager(client) as sessions:
+        for query in queries_for(args):
+            result = sessions.ask("benchmark", agent.id, query, policy=policy)
+            failures += not result.ok
+            latencies.append(result.elapsed)
+    return summarize("session_followups", latencies, time.perf_counter() - started, client, failures)
+
+
+def bench_burst(args, policy, coalesce):
+    """Everyone asks the same question at the same moment."""
+    client = make_client(args)
+    agent = client.create_agent(model=MODEL, instructions=DEFAULT_INSTRUCTIONS)
+    flight = SingleFlight()
+
+    def ask(_):
+        if coalesce:
+            return coalesced_run_query(flight, client, agent.id, QUERIES[0], policy=policy)
+        return run_query(client, agent.id, QUERIES[0], policy=policy)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.queries) as pool:
+        results = list(pool.map(ask, range(args.queries)))
+    name = "burst_coalesced" if coalesce else "burst"
+    return summarize(name, [r.elapsed for r in results], time.perf_counter() - started, client,
+                     sum(not r.ok for r in results))
+
+
+def bench_routed(args, policy, deployments):
+    """Concurrent batch against deployments that each allow half the concurrency in active runs."""
+    quota = max(1, args.concurrency // 2)
+    fake = make_client(args, max_active_runs=quota, retry_after=args.latency / 4)
+    client = LimitedAgentsClient(fake, RateLimiter(requests_per_second=1000, max_concurrent_runs=None,
+                                                   max_retries=100))
+    router = Router([Backend(f"{MODEL}-{i}", CONNECTION_ID) for i in range(deployments)])
+    started = time.perf_counter()
+    with AgentPool(client) as pool:
+        def runner(query):
+            return routed_run_query(router, pool, client, query, DEFAULT_INSTRUCTIONS, policy=policy, retries=0)
+
+        results = BatchExecutor(client, None, max_concurrency=args.concurrency, runner=runner).run(queries_for(args))
+    name = f"quota_routed_{deployments}"
+    return summarize(name, [r.elapsed for r in results], time.perf_counter() - started, fake,
+                     sum(not r.ok for r in results))
+
+
+def bench_cached(args, policy):
+    """Warm answer cache: every query has been answered once already."""
+    client = make_client(args)
+    cache = AnswerCache()
+    agent = client.create_agent(model=MODEL, instructions=DEFAULT_INSTRUCTIONS)
+    queries = queries_for(args)
+    for query in queries:
+        cached_run_query(cache, client, agent.id, query, CONNECTION_ID, MODEL, DEFAULT_INSTRUCTIONS, policy=policy)
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        begin = time.perf_counter()
+        cached_run_query(cache, client, agent.id, query, CONNECTION_ID, MODEL, DEFAULT_INSTRUCTIONS, policy=policy)
+        latencies.append(time.perf_counter() - begin)
+    return summarize("cached", latencies, time.perf_counter() - started, client)
+
+
+def print_report(results):
+    print(f"{'Scenario':<24}{'Queries':>8}{'Fail':>6}{'Total s':>10}{'q/s':>9}{'p50 s':>9}{'max s':>9}{'API calls':>11}")
+    print("-" * 86)
+    for r in results:
+        print(f"{r['scenario']:<24}{r['queries']:>8}{r['failures']:>6}{r['total_s']:>10.3f}"
+              f"{r['throughput_qps']:>9.2f}{r['p50_s']:>9.3f}{r['max_s']:>9.3f}{r['api_calls']:>11}")
+    for r in results:
+        if "phases" in r:
+            print(f"\n⏱️ Per-phase mean for {r['scenario']}:")
+            for name, value in r["phases"].items():
+                print(f"   {name:<34}{value * 1000:>10.1f} ms")
+
+
+def check_regressions(results, baseline_path, max_regression):
+    """Return scenarios whose throughput fell more than ``max_regression`` below the baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        before = baseline.get(r["scenario"])
+        # Sub-50ms scenarios (e.g. cache hits) are dominated by timer noise.
+        if not before or before["total_s"] < 0.05:
+            continue
+        if r["throughput_qps"] < before["throughput_qps"] * (1 - max_regression):
+            regressions.append((r["scenario"], before["throughput_qps"], r["throughput_qps"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the SharePoint agent flows.")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake run latency in seconds")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="fake control-plane call latency")
+    parser.add_argument("--jitter", type=float, default=0.1, help="run latency jitter as a fraction")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a run fails")
+    parser.add_argument("--answer-size", type=int, default=2000, help="answer length in characters")
+    parser.add_argument("--queries", type=int, default=len(QUERIES), help="queries per batch scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrency for the batch scenario")
+    parser.add_argument("--iterations", type=int, default=3, help="iterations of the sample flow")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here")
+    parser.add_argument("--baseline", help="results JSON from a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed throughput drop versus the baseline (fraction)")
+    args = parser.parse_args(argv)
+
+    # Poll the fake service quickly so the measurement reflects the flow, not the sleep floor.
+    policy = PollPolicy(initial_interval=min(0.05, args.latency / 10 or 0.01), max_interval=0.25, deadline=60)
+
+    print("=== SharePoint Agent Offline Benchmark ===")
+    print(f"Run latency {args.latency}s ±{args.jitter:.0%}, API latency {args.api_latency}s, "
+          f"failure rate {args.failure_rate:.0%}, answer size {args.answer_size} chars")
+    print()
+
+    results = [
+        bench_sample_flow(args, policy),
+        bench_agent_per_query(args, policy),
+        bench_pooled(args, policy, 1),
+        bench_pooled(args, policy, args.concurrency),
+        bench_session(args, policy),
+        bench_burst(args, policy, coalesce=False),
+        bench_burst(args, policy, coalesce=True),
+        bench_routed(args, policy, 1),
+        bench_routed(args, policy, 2),
+        bench_cached(args, policy),
+    ]
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results written to {args.json_path}")
+
+    if args.baseline:
+        regressions = check_regressions(results, args.baseline, args.max_regression)
+        if regressions:
+            print("\n❌ Throughput regressions:")
+            for name, before, after in regressions:
+                print(f"   {name}: {before:.2f} -> {after:.2f} q/s")
+            return 1
+        print("\n✅ No throughput regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,118 +1,84 @@
+"""
+SharePoint connection diagnostic.
+
+Runs every health check at once (auth, model deployment, connection lookup,
+baseline agent run, SharePoint tool run), each with its own timeout, and
+prints a pass/fail report with per-probe latency.
+
+Usage:
+    python testing/diagnostic_sharepoint.py
+    python testing/diagnostic_sharepoint.py --timeout 20 --run-timeout 60
+    python testing/diagnostic_sharepoint.py --fake   # exercise the probes offline
+"""
+import argparse
 import os
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
-from azure.ai.agents.models import SharepointTool
+import sys
+import time
 from dotenv import load_dotenv
-from azure.core.exceptions import HttpResponseError
-import json
 
-# Load environment variables from .env file
-load_dotenv()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharepoint_agent.config import load_settings
+from sharepoint_agent.diagnostics import (DEFAULT_RUN_TIMEOUT, DEFAULT_TIMEOUT, default_probes, print_diagnosis,
+                                          print_report, run_probes)
 
-print("=== SharePoint Connection Diagnostic ===")
-print()
 
-# Create AI Project Client
-try:
-    project_client = AIProjectClient(
-        endpoint=os.environ["PROJECT_ENDPOINT"],
-        credential=DefaultAzureCredential(),
-    )
-    print("✅ Successfully created AIProjectClient")
-except Exception as e:
-    print(f"❌ Error creating AIProjectClient: {e}")
-    exit(1)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnose the SharePoint agent setup.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="timeout for lookup probes (s)")
+    parser.add_argument("--run-timeout", type=float, default=DEFAULT_RUN_TIMEOUT, help="timeout for run probes (s)")
+    parser.add_argument("--fake", action="store_true", help="probe the local fake agents client")
+    args = parser.parse_args(argv)
 
-# Test SharePoint tool creation
-conn_id = os.environ["SHAREPOINT_CONNECTION_ID"]
-try:
-    sharepoint = SharepointTool(connection_id=conn_id)
-    print("✅ Successfully created SharepointTool")
-    print(f"   Connection ID: {conn_id}")
-except Exception as e:
-    print(f"❌ Error creating SharepointTool: {e}")
-    exit(1)
+    # Load environment variables from .env file
+    load_dotenv()
 
-# Test agent creation without SharePoint tool (baseline test)
-print("\n=== Testing Agent Creation (Without SharePoint) ===")
-with project_client:
-    agents_client = project_client.agents
-    
-    try:
-        test_agent = agents_client.create_agent(
-            model=os.environ["MODEL_DEPLOYMENT_NAME"],
-            name="test-agent-no-tools",
-            instructions="You are a test agent without tools",
-            tools=[]  # No tools
-        )
-        print(f"✅ Successfully created test agent: {test_agent.id}")
-        
-        # Test basic conversation
-        thread = agents_client.threads.create()
-        message = agents_client.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content="Hello, just say hi back"
+    print("=== SharePoint Connection Diagnostic ===")
+    print()
+
+    closer = None
+    if args.fake:
+        from sharepoint_agent import FakeAgentsClient
+        from sharepoint_agent.config import Settings
+
+        settings = Settings("https://fake.local", "fake-model", "fake-connection")
+        probes = default_probes(FakeAgentsClient(latency=1.0), settings,
+                                timeout=args.timeout, run_timeout=args.run_timeout)
+    else:
+        from sharepoint_agent import get_credential
+        from sharepoint_agent.client import create_project_client, sharepoint_tool_definitions
+
+        try:
+            settings = load_settings()
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        try:
+            project_client = create_project_client(settings)
+            print("✅ Successfully created AIProjectClient")
+        except Exception as e:
+            print(f"❌ Error creating AIProjectClient: {e}")
+            return 1
+        closer = project_client
+        probes = default_probes(
+            project_client.agents,
+            settings,
+            project_client=project_client,
+            credential=get_credential(),
+            tools=lambda: sharepoint_tool_definitions(settings),
+            timeout=args.timeout,
+            run_timeout=args.run_timeout,
         )
-        
-        run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=test_agent.id)
-        print(f"✅ Test conversation status: {run.status}")
-        
-        # Clean up
-        agents_client.delete_agent(test_agent.id)
-        print("✅ Test agent deleted")
-        
-    except Exception as e:
-        print(f"❌ Error with test agent: {e}")
 
-# Test agent creation with SharePoint tool
-print("\n=== Testing Agent Creation (With SharePoint Tool) ===")
-try:
-    sp_agent = agents_client.create_agent(
-        model=os.environ["MODEL_DEPLOYMENT_NAME"],
-        name="sharepoint-test-agent",
-        instructions="You are an agent with SharePoint access",
-        tools=sharepoint.definitions
-    )
-    print(f"✅ Successfully created SharePoint agent: {sp_agent.id}")
-    
-    # Test simple message creation (don't run yet)
-    thread = agents_client.threads.create()
-    message = agents_client.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content="What documents do you have access to?"
-    )
-    print(f"✅ Created thread and message successfully")
-    
-    # Try to run and capture detailed error
-    print("🔍 Attempting to run SharePoint query...")
-    try:
-        run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=sp_agent.id)
-        print(f"   Run status: {run.status}")
-        
-        if run.status == "failed":
-            print(f"   Error details: {run.last_error}")
-    except Exception as e:
-        print(f"   Exception during run: {e}")
-    
-    # Clean up
-    agents_client.delete_agent(sp_agent.id)
-    print("✅ SharePoint agent deleted")
-    
-except Exception as e:
-    print(f"❌ Error creating SharePoint agent: {e}")
+    print(f"🔍 Running {len(probes)} probes in parallel...\n")
+    started = time.perf_counter()
+    results = run_probes(probes)
+    healthy = print_report(results, time.perf_counter() - started)
+    print_diagnosis(results)
+
+    if closer is not None:
+        closer.close()
+    return 0 if healthy else 1
+
 
-print("\n=== Diagnostic Summary ===")
-print("✅ Authentication: Working")
-print("✅ AI Project Client: Working") 
-print("✅ Model Deployment: Working")
-print("✅ SharePoint Tool Creation: Working")
-print("❌ SharePoint Tool Execution: FAILING")
-print()
-print("🔧 REQUIRED ACTION:")
-print("   The SharePoint connection 'sharepoint-documents-new' needs to be")
-print("   properly configured in Azure AI Foundry with:")
-print("   - Valid SharePoint site URL")
-print("   - Proper authentication credentials")
-print("   - Access permissions to SharePoint documents")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,59 +1,80 @@
 import os
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharepoint_agent import create_and_poll, get_credential
+from sharepoint_agent.cassette import client_options
+from sharepoint_agent.tags import resource_tags
+from sharepoint_agent.query import latest_answer
+from sharepoint_agent.timing import QueryTimer, print_summary, record_run
+
 # Load environment variables
 load_dotenv()
 
 print("=== Testing Basic AI Agent (No SharePoint) ===")
 
+# Check the configuration before paying for the Azure SDK import (~2s)
+missing = [var for var in ("PROJECT_ENDPOINT", "MODEL_DEPLOYMENT_NAME") if not os.environ.get(var)]
+if missing:
+    print(f"❌ Missing required environment variables: {missing}")
+    sys.exit(1)
+
+from azure.ai.projects import AIProjectClient
+
+timer = QueryTimer(script="test_basic_agent")
+
 try:
-    project_client = AIProjectClient(
-        endpoint=os.environ["PROJECT_ENDPOINT"],
-        credential=DefaultAzureCredential(),
-    )
+    with timer.phase("client.create"):
+        project_client = AIProjectClient(**client_options(os.environ["PROJECT_ENDPOINT"], get_credential()))
     print("✅ Successfully created AIProjectClient")
     
     with project_client:
         agents_client = project_client.agents
         
         # Create a basic agent without SharePoint tools
-        agent = agents_client.create_agent(
-            model=os.environ["MODEL_DEPLOYMENT_NAME"],
-            name="basic-test-agent",
-            instructions="You are a helpful assistant.",
-            tools=[]  # No tools
-        )
+        with timer.phase("create_agent"):
+            agent = agents_client.create_agent(
+                model=os.environ["MODEL_DEPLOYMENT_NAME"],
+                name="basic-test-agent",
+                instructions="You are a helpful assistant.",
+                tools=[],  # No tools
+                metadata=resource_tags(),
+            )
         print(f"✅ Created basic agent: {agent.id}")
         
         # Test basic conversation
-        thread = agents_client.threads.create()
-        message = agents_client.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content="Hello! Please tell me about Azure AI services."
-        )
+        with timer.phase("threads.create"):
+            thread = agents_client.threads.create(metadata=resource_tags())
+        with timer.phase("messages.create"):
+            message = agents_client.messages.create(
+                thread_id=thread.id,
+                role="user",
+                content="Hello! Please tell me about Azure AI services."
+            )
         
-        run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
+        with timer.phase("run"):
+            run = create_and_poll(agents_client, thread.id, agent.id)
+        record_run(timer, agents_client, thread.id, run, steps=True)
         print(f"✅ Basic conversation status: {run.status}")
         
         if run.status == "completed":
-            messages = agents_client.messages.list(thread_id=thread.id)
-            for msg in messages.data:
-                if msg.role == "assistant" and msg.content:
-                    print(f"\n🤖 Assistant Response:")
-                    for content in msg.content:
-                        if hasattr(content, 'text') and content.text:
-                            print(f"   {content.text.value}")
+            with timer.phase("messages.list"):
+                answer = latest_answer(agents_client, thread.id, run_id=run.id)
+            if answer:
+                print(f"\n🤖 Assistant Response:")
+                print(f"   {answer}")
         
         # Clean up
-        agents_client.delete_agent(agent.id)
+        with timer.phase("delete_agent"):
+            agents_client.delete_agent(agent.id)
         print("✅ Test completed successfully")
 
 except Exception as e:
     print(f"❌ Error: {e}")
 
+print_summary([timer.finish()])
+
 print("\n=== Summary ===")
 print("✅ Your Azure AI Foundry setup is working perfectly!")
 print("❌ Only the SharePoint connection target URL needs to be fixed.")
@@ -2,11 +2,24 @@
 Test specific document access patterns for SharePoint connector
 """
 import os
+import sys
 from dotenv import load_dotenv
 from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import SharepointTool
-from azure.ai.projects.models import CodeInterpreterTool, FunctionTool, BingGroundingTool
-from azure.identity import DefaultAzureCredential
+from azure.ai.agents.models import SharepointTool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharepoint_agent import AgentPool, BatchExecutor, CircuitBreaker, LimitedAgentsClient, RateLimiter, get_credential
+from sharepoint_agent.breaker import REJECTED, guarded
+from sharepoint_agent.cassette import client_options
+from sharepoint_agent.checkpoint import Checkpoint
+from sharepoint_agent.query import run_query
+from sharepoint_agent.timing import print_summary
+
+# Number of queries allowed to run against the service at the same time
+MAX_CONCURRENCY = 4
+
+# API requests per second; throttled (429) calls are retried after Retry-After
+REQUESTS_PER_SECOND = 5
 
 # Load environment variables
 load_dotenv()
@@ -28,14 +41,11 @@ def test_document_access():
     
     try:
         # Create AI Project Client
-        ai_project_client = AIProjectClient.from_connection_string(
-            conn_str=project_endpoint, 
-            credential=DefaultAzureCredential()
-        )
+        ai_project_client = AIProjectClient(**client_options(project_endpoint, get_credential()))
         print("✅ AI Project Client created successfully")
         
         # Create SharePoint tool
-        sharepoint_tool = SharepointTool(sharepoint_connection_id=sharepoint_connection_id)
+        sharepoint_tool = SharepointTool(connection_id=sharepoint_connection_id)
         print("✅ SharePoint Tool created successfully")
         
         # Test different query patterns
@@ -60,55 +70,57 @@ def test_document_access():
             "Show me the available document libraries.",
         ]
         
-        for i, query in enumerate(test_queries, 1):
-            print(f"\n--- Test {i}: {query} ---")
+        instructions = "You are a helpful assistant that can access SharePoint documents. Be specific about what you can and cannot access."
+        
+        # One pooled agent serves every query; it is deleted when the pool closes
+        agents_client = LimitedAgentsClient(
+            ai_project_client.agents,
+            RateLimiter(REQUESTS_PER_SECOND, max_concurrent_runs=MAX_CONCURRENCY),
+        )
+        with ai_project_client, AgentPool(agents_client, name="sharepoint-test-agent") as pool:
             
-            try:
-                # Create agent with SharePoint tool
-                agent = ai_project_client.agents.create_agent(
-                    model=model_deployment_name,
-                    name=f"SharePoint Test Agent {i}",
-                    instructions="You are a helpful assistant that can access SharePoint documents. Be specific about what you can and cannot access.",
-                    tools=[sharepoint_tool]
-                )
-                
-                # Create thread and run
-                thread = ai_project_client.agents.create_thread()
-                message = ai_project_client.agents.create_message(
-                    thread_id=thread.id,
-                    role="user",
-                    content=query
-                )
-                
-                run = ai_project_client.agents.create_and_process_run(
-                    thread_id=thread.id,
-                    assistant_id=agent.id
-                )
-                
-                print(f"Status: {run.status}")
+            # Run the queries concurrently; results come back in submission order.
+            # With SHAREPOINT_AGENT_CHECKPOINT set, a rerun skips queries that already completed.
+            checkpoint_path = os.getenv("SHAREPOINT_AGENT_CHECKPOINT")
+            checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+            # Once the connection fails the same way a few times, the remaining queries are rejected
+            breaker = CircuitBreaker()
+            with pool.agent(model_deployment_name, instructions, sharepoint_tool.definitions) as agent:
+                def ask(query, **kwargs):
+                    return run_query(agents_client, agent.id, query, trace_steps=True, **kwargs)
+
+                executor = BatchExecutor(agents_client, agent.id, max_concurrency=MAX_CONCURRENCY,
+                                         runner=guarded(breaker, ask), checkpoint=checkpoint)
+                try:
+                    results = executor.run(test_queries)
+                finally:
+                    if checkpoint is not None:
+                        checkpoint.close()
+            
+            for i, result in enumerate(results, 1):
+                print(f"\n--- Test {i}: {result.query} ---")
+                print(f"Status: {result.status} ({result.elapsed:.1f}s)")
                 
-                if run.status == "completed":
-                    messages = ai_project_client.agents.list_messages(thread_id=thread.id)
-                    if hasattr(messages, 'data') and messages.data:
-                        for msg in messages.data:
-                            if msg.role == "assistant":
-                                for content in msg.content:
-                                    if content.type == "text":
-                                        print(f"✅ Response: {content.text.value[:200]}...")
-                                        break
-                                break
+                if result.status == "completed":
+                    if result.answer:
+                        print(f"✅ Response: {result.answer[:200]}...")
                     else:
                         print("❌ No response data available")
-                elif run.status == "failed":
-                    print(f"❌ Failed: {run.last_error}")
+                elif result.status == "failed":
+                    print(f"❌ Failed: {result.error}")
+                elif result.status == "error":
+                    print(f"❌ Exception: {result.error}")
+                elif result.status == REJECTED:
+                    print("⛔ Skipped: the SharePoint connection is failing")
                 else:
-                    print(f"⚠️ Incomplete status: {run.status}")
-                
-                # Cleanup
-                ai_project_client.agents.delete_agent(agent.id)
-                
-            except Exception as e:
-                print(f"❌ Exception: {str(e)}")
+                    print(f"⚠️ Incomplete status: {result.status}")
+            
+            if breaker.rejected:
+                print(f"\n⛔ {breaker.rejected} queries skipped. {breaker.diagnosis}")
+            print(f"\n🧹 Agents created: {pool.created}")
+            stats = agents_client.limiter.stats()
+            print(f"🚦 {stats['requests']} requests, {stats['throttled']} throttled, {stats['retries']} retried")
+            print_summary([result.timings for result in results])
                 
     except Exception as e:
         print(f"❌ Setup failed: {str(e)}")
@@ -1,10 +1,29 @@
 # Test based on the official Azure sample format
+#
+# Usage:
+#   python testing/test_official_sample_format.py                  # race all variants, keep the first answer
+#   python testing/test_official_sample_format.py --concurrency 2  # at most 2 runs at a time
+#   python testing/test_official_sample_format.py --sequential     # one variant at a time
+import argparse
 import os
+import sys
 from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import SharepointTool
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sharepoint_agent import TIMED_OUT, create_and_poll, get_credential
+from sharepoint_agent.cassette import client_options
+from sharepoint_agent.tags import resource_tags
+from sharepoint_agent.query import latest_answer
+from sharepoint_agent.race import race_queries
+from sharepoint_agent.timing import QueryTimer, print_summary, record_run
+
+parser = argparse.ArgumentParser(description="Find which prompt format the SharePoint tool accepts.")
+parser.add_argument("--sequential", action="store_true", help="try the variants one after another")
+parser.add_argument("--concurrency", type=int, default=6, help="max runs at the same time when racing")
+args = parser.parse_args()
+
 # Load environment variables
 load_dotenv()
 
@@ -12,10 +31,7 @@ print("=== Testing Official Sample Format ===")
 print()
 
 # Create client exactly like the official sample
-project_client = AIProjectClient(
-    endpoint=os.environ["PROJECT_ENDPOINT"],
-    credential=DefaultAzureCredential(),
-)
+project_client = AIProjectClient(**client_options(os.environ["PROJECT_ENDPOINT"], get_credential()))
 
 conn_id = os.environ["SHAREPOINT_CONNECTION_ID"]
 
@@ -42,6 +58,8 @@ test_queries = [
     "List available SharePoint resources"
 ]
 
+timings = []
+
 with project_client:
     agents_client = project_client.agents
     
@@ -51,52 +69,79 @@ with project_client:
         name="my-agent",
         instructions="You are a helpful agent",
         tools=sharepoint.definitions,
+        metadata=resource_tags(),
     )
     print(f"✅ Created agent, ID: {agent.id}")
     
-    for i, query in enumerate(test_queries, 1):
-        print(f"\n--- Test {i}: {query} ---")
+    if not args.sequential:
+        # Submit every variant at once; the first good answer wins and the other runs are cancelled
+        print(f"\n🏁 Racing {len(test_queries)} variants (max {args.concurrency} at a time)...")
+        race = race_queries(agents_client, agent.id, test_queries, max_concurrency=args.concurrency)
+        for i, result in enumerate(race.results, 1):
+            marker = "🏆" if result is race.winner else "  "
+            print(f"{marker} Test {i}: {result.status:<10} {result.elapsed:>6.2f}s  {result.query}")
+            if result.error and result.status == "failed":
+                print(f"      ❌ {result.error}")
+        if race.winner:
+            print(f"\n✅ SUCCESS in {race.time_to_winner:.2f}s with: {race.winner.query}")
+            print(f"📝 Assistant: {race.winner.answer[:300]}...")
+        else:
+            print("\n❌ No variant produced an answer")
+        print(f"🛑 Cancelled {race.cancelled} run(s), skipped {race.skipped} variant(s)")
+        timings = [result.timings for result in race.results]
+
+    else:
+        for i, query in enumerate(test_queries, 1):
+            print(f"\n--- Test {i}: {query} ---")
+            timer = QueryTimer(query=query)
+            run = None
         
-        try:
-            # Create thread for communication
-            thread = agents_client.threads.create()
-            print(f"Created thread, ID: {thread.id}")
+            try:
+                # Create thread for communication
+                with timer.phase("threads.create"):
+                    thread = agents_client.threads.create(metadata=resource_tags())
+                print(f"Created thread, ID: {thread.id}")
             
-            # Create message to thread
-            message = agents_client.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=query,
-            )
-            print(f"Created message, ID: {message.id}")
+                # Create message to thread
+                with timer.phase("messages.create"):
+                    message = agents_client.messages.create(
+                        thread_id=thread.id,
+                        role="user",
+                        content=query,
+                    )
+                print(f"Created message, ID: {message.id}")
             
-            # Create and process agent run in thread with tools
-            run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
-            print(f"Run finished with status: {run.status}")
+                # Create and poll agent run in thread with tools (cancelled after the deadline)
+                with timer.phase("run"):
+                    run = create_and_poll(agents_client, thread.id, agent.id)
+                record_run(timer, agents_client, thread.id, run, steps=True)
+                print(f"Run finished with status: {run.status}")
             
-            if run.status == "failed":
-                print(f"❌ Run failed: {run.last_error}")
-            elif run.status == "completed":
-                print("✅ SUCCESS!")
+                if run.status == "failed":
+                    print(f"❌ Run failed: {run.last_error}")
+                elif run.status == TIMED_OUT:
+                    print(f"⏰ Run timed out and was cancelled")
+                elif run.status == "completed":
+                    print("✅ SUCCESS!")
                 
-                # Fetch and log all messages
-                messages = agents_client.messages.list(thread_id=thread.id)
-                for msg in messages:
-                    if msg.role == "assistant" and msg.content:
-                        for content in msg.content:
-                            if hasattr(content, 'text') and content.text:
-                                print(f"📝 Assistant: {content.text.value[:300]}...")
-                                break
-                # If we get a successful result, we can stop testing
-                break
-            else:
-                print(f"⏳ Status: {run.status}")
+                    # Fetch and log all messages
+                    with timer.phase("messages.list"):
+                        answer = latest_answer(agents_client, thread.id, run_id=run.id)
+                    if answer:
+                        print(f"📝 Assistant: {answer[:300]}...")
+                    # If we get a successful result, we can stop testing
+                    timings.append(timer.finish(run.status))
+                    break
+                else:
+                    print(f"⏳ Status: {run.status}")
                 
-        except Exception as e:
-            print(f"❌ Exception: {e}")
+            except Exception as e:
+                print(f"❌ Exception: {e}")
+            timings.append(timer.finish(run.status if run else "error"))
     
     # Delete the agent when done
     agents_client.delete_agent(agent.id)
     print(f"\n✅ Deleted agent: {agent.id}")
 
+print_summary(timings)
 print("\n=== Test Complete ===")
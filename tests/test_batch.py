@@ -0,0 +1,51 @@
+import threading
+import time
+
+from sharepoint_agent import BatchExecutor, FakeAgentsClient, PollPolicy, QueryResult, run_batch
+
+
+def _slow_runner(delays, active=None):
+    """Answers ``query`` after ``delays[query]`` seconds, tracking how many run at once."""
+    lock = threading.Lock()
+
+    def run(query, **kwargs):
+        if active is not None:
+            with lock:
+                active.append(active[-1] + 1 if active else 1)
+        time.sleep(delays[query])
+        if active is not None:
+            with lock:
+                active.append(active[-1] - 1)
+        return QueryResult(query=query, status="completed", answer=query.upper())
+
+    return run
+
+
+def test_run_returns_results_in_input_order():
+    queries = ["slow", "medium", "fast"]
+    finished = []
+    executor = BatchExecutor(None, None, max_concurrency=3,
+                             runner=_slow_runner({"slow": 0.15, "medium": 0.08, "fast": 0.01}))
+    results = executor.run(queries, on_result=lambda index, result: finished.append(index))
+    assert [result.answer for result in results] == ["SLOW", "MEDIUM", "FAST"]
+    assert finished == [2, 1, 0]
+
+
+def test_stream_yields_in_completion_order_with_bounded_concurrency():
+    active = []
+    delays = {f"q{i}": 0.01 * (6 - i) for i in range(6)}
+    executor = BatchExecutor(None, None, max_concurrency=2, runner=_slow_runner(delays, active))
+    streamed = list(executor.stream(iter(delays), keyed=False))
+    assert sorted(index for index, _ in streamed) == list(range(6))
+    assert max(active) <= 2
+    assert all(result.answer == f"Q{index}" for index, result in streamed)
+
+
+def test_run_batch_against_fake_client():
+    fake = FakeAgentsClient(latency=0.02)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    queries = [f"Question {i}" for i in range(5)]
+    results = BatchExecutor(fake, agent.id, max_concurrency=3, policy=PollPolicy(initial_interval=0.01)).run(queries)
+    assert [result.query for result in results] == queries
+    assert all(result.ok and result.answer for result in results)
+    assert run_batch(fake, agent.id, []) == []
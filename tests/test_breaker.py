@@ -0,0 +1,78 @@
+import pytest
+
+from sharepoint_agent import CircuitBreaker, QueryResult
+from sharepoint_agent.breaker import CLOSED, CONNECTION, HALF_OPEN, OPEN, OTHER, REJECTED, TRANSIENT, \
+    CircuitOpenError, classify, guarded
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+BAD = QueryResult(query="q", status="failed", error={"code": "tool_user_error", "message": "Bad Request"})
+OK = QueryResult(query="q", status="completed", answer="fine")
+
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.allow()
+        breaker.record(BAD)
+
+
+def test_classify():
+    assert classify({"code": "tool_user_error", "message": "Bad Request"}) == CONNECTION
+    assert classify("429 Too Many Requests") == TRANSIENT
+    assert classify("The model could not answer") == OTHER
+
+
+def test_closed_open_half_open_closed():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+    _fail(breaker, 1)
+    assert breaker.state == OPEN and breaker.opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    clock.now = 61
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time while half-open.
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(OK)
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+    assert breaker.rejected == 2
+
+
+def test_failed_probe_reopens():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    _fail(breaker, 1)
+    clock.now = 11
+    _fail(breaker, 1)
+    assert breaker.state == OPEN and breaker.opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_transient_failures_do_not_open():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.allow()
+    breaker.record(QueryResult(query="q", status="timed_out", error="timed_out"))
+    assert breaker.state == CLOSED
+
+
+def test_guarded_rejects_without_calling_runner():
+    breaker = CircuitBreaker(failure_threshold=1, clock=Clock())
+    calls = []
+    run = guarded(breaker, lambda query, **kwargs: calls.append(query) or BAD)
+    assert run("first").status == "failed"
+    rejected = run("second")
+    assert rejected.status == REJECTED and "Bad Request" in rejected.error
+    assert calls == ["first"]
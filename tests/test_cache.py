@@ -0,0 +1,83 @@
+from sharepoint_agent import AnswerCache, FakeAgentsClient, cache_key, cached_run_query
+from sharepoint_agent.cache import normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_normalisation():
+    assert normalize_query("  What   documents are\tavailable?? ") == "what documents are available"
+    key = cache_key("conn", "gpt-4o", "Be brief.", "What documents are available?")
+    assert key == cache_key("conn", "gpt-4o", "Be brief.", "what documents  are available")
+    assert key != cache_key("conn", "gpt-4o-mini", "Be brief.", "What documents are available?")
+    assert key != cache_key("other", "gpt-4o", "Be brief.", "What documents are available?")
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = AnswerCache(ttl=60, clock=clock)
+    cache.put("k", "answer")
+    clock.now += 59
+    assert cache.get("k") == "answer"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0}
+
+
+def test_lru_eviction():
+    cache = AnswerCache(max_entries=2, clock=Clock())
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # "b" is now least recently used
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+
+
+def test_sqlite_persists_across_instances(tmp_path):
+    clock, path = Clock(), str(tmp_path / "cache" / "answers.db")
+    first = AnswerCache(path=path, clock=clock)
+    first.put("k", "persisted")
+    first.close()
+
+    second = AnswerCache(path=path, clock=clock)
+    assert second.get("k") == "persisted"
+    clock.now += 2 * second.ttl
+    assert second.get("k") is None
+    second.close()
+    third = AnswerCache(path=path, clock=clock)
+    assert third.get("k") is None  # the expired row was deleted from the database too
+    third.close()
+
+
+def test_database_hits_respect_the_memory_cap(tmp_path):
+    clock, path = Clock(), str(tmp_path / "answers.db")
+    writer = AnswerCache(max_entries=10, path=path, clock=clock)
+    for i in range(10):
+        writer.put(f"k{i}", f"answer {i}")
+    writer.close()
+
+    reader = AnswerCache(max_entries=3, path=path, clock=clock)
+    for i in range(10):
+        assert reader.get(f"k{i}") == f"answer {i}"
+    assert reader.stats()["entries"] == 3
+    reader.close()
+
+
+def test_cached_run_query_only_runs_once():
+    fake = FakeAgentsClient()
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    cache = AnswerCache()
+    args = (cache, fake, agent.id, "What documents are available?", "conn", "fake-model", "")
+    first = cached_run_query(*args)
+    second = cached_run_query(*args)
+    assert first.ok and not first.cached
+    assert second.cached and second.answer == first.answer
+    assert fake.calls["runs.create"] == 1
+    cached_run_query(*args, bypass=True)
+    assert fake.calls["runs.create"] == 2
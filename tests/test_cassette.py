@@ -0,0 +1,99 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from azure.core import PipelineClient
+from azure.core.exceptions import ServiceRequestError
+from azure.core.rest import HttpRequest
+
+from sharepoint_agent.cassette import Cassette, CassetteMiss, main, recording_transport, replay_transport
+
+
+class _Service(BaseHTTPRequestHandler):
+    """A run that is in progress on the first poll and completed afterwards."""
+
+    polls = 0
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        _Service.polls += 1
+        self._reply(200, {"id": "run_1", "status": "in_progress" if _Service.polls == 1 else "completed"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._reply(201, {"id": "thread_1", "echo": json.loads(self.rfile.read(length) or b"null")},
+                    headers=[("Retry-After", "1"), ("X-Secret", "dropped")])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Service.polls = 0
+    httpd = HTTPServer(("127.0.0.1", 0), _Service)
+    worker = threading.Thread(target=httpd.serve_forever, daemon=True)
+    worker.start()
+
+    def stop():
+        if worker.is_alive():
+            httpd.shutdown()
+            httpd.server_close()
+
+    yield f"http://127.0.0.1:{httpd.server_port}", stop
+    stop()
+
+
+RUN = "/threads/thread_1/runs/run_1?api-version=v1"
+
+
+def _session(client, base):
+    responses = [client.send_request(HttpRequest("POST", base + "/threads?api-version=v1", json={"q": "hi"}))]
+    responses += [client.send_request(HttpRequest("GET", base + RUN)) for _ in range(2)]
+    return [(response.status_code, response.json()) for response in responses]
+
+
+def test_record_then_replay_offline(server, tmp_path, capsys):
+    server, stop = server
+    path = str(tmp_path / "session.jsonl")
+    recorded = _session(PipelineClient(server, transport=recording_transport(path)), server)
+    assert [body.get("status") for _, body in recorded] == [None, "in_progress", "completed"]
+
+    cassette = Cassette.load(path)
+    assert cassette.endpoint == server and len(cassette.interactions) == 3
+    assert cassette.interactions[0]["headers"] == {"content-type": "application/json", "retry-after": "1"}
+
+    # Stop the server: replay must not touch the network.
+    stop()
+    dead = server
+    with pytest.raises(ServiceRequestError):
+        PipelineClient(dead).send_request(HttpRequest("GET", dead + RUN))
+    offline = PipelineClient(dead, transport=replay_transport(path, time_scale=0))
+    assert _session(offline, dead) == recorded
+
+    # Polling more often than the recording repeats the last GET; other methods do not repeat.
+    again = offline.send_request(HttpRequest("GET", dead + RUN))
+    assert again.json()["status"] == "completed"
+    with pytest.raises(CassetteMiss):
+        offline.send_request(HttpRequest("POST", dead + "/threads?api-version=v1", json={"q": "hi"}))
+
+    assert main([path]) == 0
+    out = capsys.readouterr().out
+    assert "3 requests" in out
+    assert "2  GET /threads/{id}/runs/{id}" in out and "1  POST /threads" in out
+
+
+def test_query_order_does_not_matter():
+    from sharepoint_agent.cassette import request_key
+
+    assert request_key("get", "https://a/x?b=2&a=1") == request_key("GET", "https://b/x?a=1&b=2") == "GET /x?a=1&b=2"
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from sharepoint_agent.catalog import DocumentCatalog, answer_locally, is_listing_query, load_listing, rewrite_query
+
+FIXTURE = os.path.join(os.path.dirname(__file__), os.pardir, "testing", "fixtures", "sharepoint_documents.json")
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with DocumentCatalog(str(tmp_path / "catalog.db")) as catalog:
+        catalog.update(load_listing(FIXTURE), complete=True)
+        yield catalog
+
+
+@pytest.mark.parametrize("query", [
+    "What is in the Budget file?",
+    "Which document mentions the budget deadline?",
+    "Which files discuss Q2 revenue?",
+    "What is the deadline in the travel policy document?",
+    "Summarize the document named 'Doc to test.docx'",
+    "List the documents modified in 2024",
+    "List the budget files",
+])
+def test_content_questions_go_to_the_agent(catalog, query):
+    assert answer_locally(catalog, query) is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What documents are available?", 12),
+    ("List all Word documents in Engineering", 2),
+    ("Find any PDF files", 2),
+    ("List all documents in the Shared Documents library.", 7),
+    ("Show me the files named 'guidelines'", 2),
+])
+def test_listing_questions_are_answered_locally(catalog, query, expected):
+    result = answer_locally(catalog, query)
+    assert result is not None and result.ok and result.cached
+    assert result.answer.startswith(f"{expected} matching document(s)")
+
+
+def test_library_question_lists_libraries(catalog):
+    result = answer_locally(catalog, "What document libraries are there?")
+    assert result.answer.startswith("3 document libraries")
+
+
+def test_listing_detection_ignores_library_names():
+    assert is_listing_query("List the files in Site Assets", ["Site Assets"])
+    assert not is_listing_query("List the files in Site Assets", [])
+
+
+def test_stale_catalog_answers_nothing(tmp_path):
+    now = [1000.0]
+    with DocumentCatalog(str(tmp_path / "catalog.db"), clock=lambda: now[0]) as catalog:
+        catalog.update(load_listing(FIXTURE), complete=True)
+        now[0] += 2 * 24 * 3600
+        assert answer_locally(catalog, "What documents are available?") is None
+
+
+@pytest.mark.parametrize("name, path", [
+    ("doc to tset", "/sites/Demo/Shared Documents/Doc to test.docx"),
+    ("Quarterly report q2 2025.docx", "/sites/Demo/Shared Documents/Reports/Quarterly Report Q2 2025.docx"),
+    ("travel policy v3", "/sites/Demo/Shared Documents/HR/Travel_Policy_v3.docx"),
+])
+def test_match_finds_named_document(catalog, name, path):
+    assert catalog.match(name).path == path
+
+
+@pytest.mark.parametrize("name", [
+    "Quarterly report q3 2025.docx",
+    "Budget 2024.xlsx",
+    "Travel policy v2",
+    "Quarterly report 2025",
+])
+def test_match_rejects_wrong_numbers_and_ambiguous_names(catalog, name):
+    assert catalog.match(name) is None
+
+
+def test_rewrite_leaves_unknown_documents_alone(catalog):
+    query = "Please analyze 'Quarterly report q3 2025.docx'"
+    assert rewrite_query(catalog, query) == (query, None)
+
+
+def test_rewrite_points_at_exact_path(catalog):
+    query, document = rewrite_query(catalog, "Please analyze 'doc to tset'")
+    assert document.name == "Doc to test.docx"
+    assert query == "Please analyze '/sites/Demo/Shared Documents/Doc to test.docx'"
+
+
+def test_incremental_update_counts(catalog):
+    documents = load_listing(FIXTURE)
+    assert catalog.update(documents[:5]) == {"added": 0, "updated": 0, "removed": 0, "unchanged": 5}
+    assert catalog.update(documents[:5], complete=True)["removed"] == 7
+    assert len(catalog) == 5
@@ -0,0 +1,66 @@
+from sharepoint_agent import FakeAgentsClient, PollPolicy, run_query
+from sharepoint_agent.checkpoint import Checkpoint
+
+POLICY = PollPolicy(initial_interval=0.01)
+
+
+def _setup(tmp_path):
+    fake = FakeAgentsClient(latency=0.02)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    asked = []
+
+    def runner(query, **kwargs):
+        asked.append(query)
+        return run_query(fake, agent.id, query, policy=POLICY, **kwargs)
+
+    return fake, agent, runner, asked, str(tmp_path / "batch.ckpt")
+
+
+def test_resume_skips_completed_and_reattaches_in_flight(tmp_path):
+    fake, agent, runner, asked, path = _setup(tmp_path)
+    with Checkpoint(path) as checkpoint:
+        first = checkpoint.run("a", "question a", runner, fake, policy=POLICY)
+        # "b" was started but the batch died before it finished.
+        thread = fake.threads.create()
+        fake.messages.create(thread_id=thread.id, role="user", content="question b")
+        checkpoint.started("b", "question b", fake.runs.create(thread_id=thread.id, agent_id=agent.id))
+    assert first.ok and asked == ["question a"]
+
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.stats()["completed"] == 1 and checkpoint.stats()["in_flight"] == 1
+        resumed = checkpoint.run("a", "question a", runner, fake, policy=POLICY)
+        reattached = checkpoint.run("b", "question b", runner, fake, policy=POLICY)
+        stats = checkpoint.stats()
+    assert resumed.cached and resumed.answer == first.answer
+    assert reattached.ok and reattached.run_id is not None
+    assert asked == ["question a"]
+    assert (stats["skipped"], stats["reattached"], stats["completed"], stats["in_flight"]) == (1, 1, 2, 0)
+
+
+def test_changed_question_runs_again(tmp_path):
+    fake, _, runner, asked, path = _setup(tmp_path)
+    with Checkpoint(path) as checkpoint:
+        checkpoint.run("a", "question a", runner, fake, policy=POLICY)
+    with Checkpoint(path) as checkpoint:
+        result = checkpoint.run("a", "a different question", runner, fake, policy=POLICY)
+    assert not result.cached and asked == ["question a", "a different question"]
+
+
+def test_only_hashes_and_offsets_are_kept_in_memory(tmp_path):
+    fake, _, runner, _, path = _setup(tmp_path)
+    with Checkpoint(path) as checkpoint:
+        checkpoint.run("a", "question a", runner, fake, policy=POLICY)
+        entries = list(checkpoint._done.values()) + list(checkpoint._in_flight.values())
+    assert entries and all(isinstance(h, bytes) and len(h) == 8 and isinstance(o, int) for h, o in entries)
+
+
+def test_torn_line_is_dropped(tmp_path):
+    fake, _, runner, _, path = _setup(tmp_path)
+    with Checkpoint(path) as checkpoint:
+        checkpoint.run("a", "question a", runner, fake, policy=POLICY)
+    with open(path, "ab") as f:
+        f.write(b'{"id":"b","que')
+    with Checkpoint(path) as checkpoint:
+        assert checkpoint.is_done("a", "question a")
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"\n")
@@ -0,0 +1,61 @@
+import os
+import time
+from types import SimpleNamespace
+
+from sharepoint_agent import cleanup
+from sharepoint_agent.tags import resource_tags
+
+OLD = time.time() - 2 * cleanup.DEFAULT_MAX_AGE
+DEAD_PID = 999999
+
+
+def _item(pid=DEAD_PID, **tags):
+    metadata = resource_tags(**tags)
+    metadata["pid"] = str(pid)
+    return SimpleNamespace(id="asst_1", name="sharepoint-agent", created_at=OLD, metadata=metadata)
+
+
+def test_process_alive_posix():
+    assert cleanup._process_alive(os.getpid()) is True
+    assert cleanup._process_alive(DEAD_PID) is False
+
+
+def test_dead_local_process_is_stale():
+    assert cleanup.is_stale(_item())
+
+
+def test_live_or_young_items_are_kept():
+    assert not cleanup.is_stale(_item(pid=os.getpid()))
+    young = _item()
+    young.created_at = time.time()
+    assert not cleanup.is_stale(young)
+
+
+def test_unknown_liveness_keeps_item(monkeypatch):
+    monkeypatch.setattr(cleanup, "_process_alive", lambda pid: None)
+    assert not cleanup.is_stale(_item())
+
+
+def test_other_host_is_kept_unless_all_hosts():
+    remote = _item(pid=os.getpid())
+    remote.metadata["host"] = "another-host"
+    assert not cleanup.is_stale(remote)
+    assert cleanup.is_stale(remote, all_hosts=True)
+
+
+def test_untagged_legacy_agent_needs_all_hosts():
+    legacy = SimpleNamespace(id="asst_2", name="sharepoint-old", created_at=OLD, metadata={})
+    assert cleanup.is_ours(legacy)
+    assert not cleanup.is_stale(legacy)
+    assert cleanup.is_stale(legacy, all_hosts=True)
+
+
+def test_collect_keeps_remote_daemon_resources():
+    local, remote = _item(), _item(pid=os.getpid())
+    local.id, remote.id = "asst_local", "asst_remote"
+    remote.metadata["host"] = "another-host"
+    deleted = []
+    result = cleanup._collect("agents", [local, remote], deleted.append, cleanup.DEFAULT_PREFIXES,
+                              cleanup.DEFAULT_MAX_AGE, 2, dry_run=False, all_hosts=False)
+    assert (result.scanned, result.stale, result.deleted) == (2, 1, 1)
+    assert deleted == ["asst_local"]
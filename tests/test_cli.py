@@ -0,0 +1,39 @@
+import pytest
+
+from sharepoint_agent import cache, cli, query
+
+
+@pytest.fixture
+def closes(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANSWER_CACHE_PATH", str(tmp_path / "answers.db"))
+    monkeypatch.setenv("SHAREPOINT_AGENT_CATALOG", str(tmp_path / "no-catalog.db"))
+    closed = []
+    close = cache.AnswerCache.close
+
+    def tracking_close(self):
+        closed.append(self.path)
+        close(self)
+
+    monkeypatch.setattr(cache.AnswerCache, "close", tracking_close)
+    return closed
+
+
+def test_ask_then_cached_answer_close_the_cache(closes, capsys):
+    assert cli.main(["ask", "--fake", "--latency", "0", "What documents are available?"]) == 0
+    assert cli.main(["ask", "--fake", "What documents are available?"]) == 0
+    assert "served from cache" in capsys.readouterr().out
+    assert len(closes) == 2
+
+
+def test_failed_ask_closes_the_cache(closes, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("service unavailable")
+
+    monkeypatch.setattr(query, "run_query", broken)
+    assert cli.main(["ask", "--fake", "--latency", "0", "What documents are available?"]) == 1
+    assert len(closes) == 1
+
+
+def test_no_cache_opens_nothing(closes):
+    assert cli.main(["ask", "--fake", "--no-cache", "--latency", "0", "What documents are available?"]) == 0
+    assert closes == []
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from sharepoint_agent import FakeAgentsClient, PollPolicy, SingleFlight, coalesced_run_query
+
+CALLERS = 6
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _crowd(flight, fn, key="k"):
+    """CALLERS threads released together by a barrier, all calling ``flight.do(key, fn)``."""
+    barrier = threading.Barrier(CALLERS)
+    outcomes = [None] * CALLERS
+
+    def call(index):
+        barrier.wait()
+        try:
+            outcomes[index] = ("ok", flight.do(key, fn))
+        except Exception as e:
+            outcomes[index] = ("error", e)
+
+    workers = [threading.Thread(target=call, args=(i,)) for i in range(CALLERS)]
+    for worker in workers:
+        worker.start()
+    return workers, outcomes
+
+
+def _join(workers):
+    for worker in workers:
+        worker.join(5)
+        assert not worker.is_alive()
+
+
+def test_followers_share_the_leaders_result():
+    flight, calls = SingleFlight(), []
+
+    def work():
+        calls.append(1)
+        # Hold the call open until every other caller has joined as a follower.
+        _wait_for(lambda: flight.stats()["shared"] == CALLERS - 1)
+        return object()
+
+    workers, outcomes = _crowd(flight, work)
+    _join(workers)
+    assert len(calls) == 1
+    assert {kind for kind, _ in outcomes} == {"ok"}
+    assert len({id(value) for _, value in outcomes}) == 1
+    assert flight.stats() == {"leaders": 1, "shared": CALLERS - 1, "in_flight": 0}
+
+
+def test_followers_see_the_leaders_exception():
+    flight = SingleFlight()
+    error = RuntimeError("service unavailable")
+
+    def work():
+        _wait_for(lambda: flight.stats()["shared"] == CALLERS - 1)
+        raise error
+
+    workers, outcomes = _crowd(flight, work)
+    _join(workers)
+    assert all(kind == "error" and value is error for kind, value in outcomes)
+    assert flight.in_flight() == 0
+
+
+def test_key_is_released_after_completion():
+    flight, calls = SingleFlight(), []
+    assert flight.do("k", lambda: calls.append(1) or "first") == "first"
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("k", lambda: calls.append(1) or "third") == "third"
+    assert len(calls) == 2 and flight.stats() == {"leaders": 3, "shared": 0, "in_flight": 0}
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight, release = SingleFlight(), threading.Event()
+    blocked = threading.Thread(target=lambda: flight.do("slow", release.wait))
+    blocked.start()
+    _wait_for(lambda: flight.in_flight() == 1)
+    assert flight.do("fast", lambda: "done") == "done"
+    release.set()
+    blocked.join(5)
+
+
+def test_identical_questions_share_one_run():
+    fake = FakeAgentsClient(latency=0.2)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    flight, results = SingleFlight(), []
+    barrier = threading.Barrier(4)
+
+    def ask(query):
+        barrier.wait()
+        results.append(coalesced_run_query(flight, fake, agent.id, query, policy=PollPolicy(initial_interval=0.01)))
+
+    workers = [threading.Thread(target=ask, args=(query,)) for query in
+               ("What documents are available?", "what documents are available", "  What documents are available? ",
+                "Who wrote it?")]
+    for worker in workers:
+        worker.start()
+    _join(workers)
+    assert all(result.ok for result in results)
+    assert fake.calls["runs.create"] == 2
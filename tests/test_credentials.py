@@ -0,0 +1,89 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from sharepoint_agent import credentials
+from sharepoint_agent.credentials import CachedCredential
+
+SCOPE = "https://ai.azure.com/.default"
+
+
+class _Source:
+    """Stands in for an azure-identity credential that issues a new token on every call."""
+
+    issued = 0
+
+    def get_token(self, *scopes, **kwargs):
+        _Source.issued += 1
+        return AccessToken(f"token-{_Source.issued}", int(time.time()) + 3600)
+
+
+@pytest.fixture
+def credential(tmp_path, monkeypatch):
+    monkeypatch.setattr(credentials, "_build_source", lambda name: _Source())
+    monkeypatch.setenv("AZURE_CLIENT_ID", "client-a")
+    monkeypatch.setenv("AZURE_TENANT_ID", "tenant-a")
+    return CachedCredential(cache_dir=str(tmp_path), sources=("environment",))
+
+
+def test_token_is_cached_and_persisted(credential, tmp_path):
+    first = credential.get_token(SCOPE)
+    assert credential.get_token(SCOPE).token == first.token
+    assert credential.token_requests == 1
+    reloaded = CachedCredential(cache_dir=str(tmp_path), sources=("environment",))
+    assert reloaded.get_token(SCOPE).token == first.token
+    assert reloaded.token_requests == 0
+
+
+def test_other_account_or_tenant_never_reuses_token(credential, monkeypatch):
+    first = credential.get_token(SCOPE).token
+    monkeypatch.setenv("AZURE_CLIENT_ID", "client-b")
+    second = credential.get_token(SCOPE).token
+    assert second != first
+    assert credential.get_token(SCOPE, tenant_id="tenant-b").token not in (first, second)
+    monkeypatch.setenv("AZURE_CLIENT_ID", "client-a")
+    assert credential.get_token(SCOPE).token == first
+
+
+def _response(status, token):
+    return SimpleNamespace(http_response=SimpleNamespace(status_code=status),
+                           http_request=SimpleNamespace(headers={"Authorization": f"Bearer {token}"}))
+
+
+def test_401_drops_the_rejected_token(credential, tmp_path):
+    first = credential.get_token(SCOPE).token
+    credential.on_response(_response(200, first))
+    assert credential.get_token(SCOPE).token == first
+    credential.on_response(_response(401, first))
+    assert credential.get_token(SCOPE).token != first
+    assert credential.token_requests == 2
+    assert first not in (tmp_path / "credential.json").read_text()
+
+
+def test_concurrent_callers_share_one_fetch_without_blocking_other_scopes(credential, monkeypatch):
+    import threading
+
+    release = threading.Event()
+    calls = []
+
+    class _Slow(_Source):
+        def get_token(self, *scopes, **kwargs):
+            calls.append(scopes)
+            if scopes == (SCOPE,):
+                assert release.wait(5)
+            return super().get_token(*scopes, **kwargs)
+
+    monkeypatch.setattr(credentials, "_build_source", lambda name: _Slow())
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(credential.get_token(SCOPE).token)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    # A different scope is fetched while the first fetch is still in flight.
+    assert credential.get_token("https://storage.azure.com/.default").token
+    release.set()
+    for worker in workers:
+        worker.join(5)
+    assert len(set(results)) == 1 and len(results) == 3
+    assert calls.count((SCOPE,)) == 1
@@ -0,0 +1,19 @@
+import socket
+import subprocess
+import sys
+
+from sharepoint_agent.address import parse_address
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:8765") == (socket.AF_INET, ("127.0.0.1", 8765))
+    assert parse_address(":9000") == (socket.AF_INET, ("127.0.0.1", 9000))
+    assert parse_address("/tmp/daemon.sock")[1] == "/tmp/daemon.sock"
+
+
+def test_client_imports_only_the_standard_library():
+    code = ("import sys, sharepoint_agent.daemon_client; "
+            "print(sorted(m for m in sys.modules if m.startswith('sharepoint_agent') or "
+            "m.split('.')[0] in ('azure', 'opentelemetry', 'dotenv', 'requests')))")
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert loaded.strip() == "['sharepoint_agent', 'sharepoint_agent.address', 'sharepoint_agent.daemon_client']"
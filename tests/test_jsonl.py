@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+from sharepoint_agent import FakeAgentsClient
+from sharepoint_agent.jsonl import InvalidLine, parse_line, read_queries, run_jsonl
+
+
+def test_parse_line_forms():
+    assert parse_line('{"id": "a", "query": "first"}', 1) == ("a", "first")
+    assert parse_line('"quoted"', 2) == (2, "quoted")
+    assert parse_line("plain text", 3) == (3, "plain text")
+    assert parse_line("   ", 4) is None
+
+
+def test_object_without_query_is_invalid():
+    with pytest.raises(InvalidLine) as excinfo:
+        parse_line('{"id": "b", "question": "oops"}', 2)
+    assert excinfo.value.query_id == "b"
+
+
+def test_read_queries_skips_invalid_lines_with_on_error():
+    errors = []
+    lines = ['{"query": "one"}', '{"id": "x"}', "two"]
+    assert list(read_queries(lines, on_error=errors.append)) == [(1, "one"), (3, "two")]
+    assert [e.query_id for e in errors] == ["x"]
+
+
+def test_batch_writes_error_for_invalid_line_and_keeps_going():
+    fake = FakeAgentsClient(latency=0.01)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    lines = ['{"id": "a", "query": "first"}', '{"id": "b", "question": "oops"}', '{"id": "c", "query": "third"}']
+    out = io.StringIO()
+
+    counts = run_jsonl(fake, agent.id, lines, out, max_concurrency=2)
+
+    records = {record["id"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert sorted(records) == ["a", "b", "c"]
+    assert records["b"]["status"] == "error" and '"query"' in records["b"]["error"]
+    assert records["a"]["status"] == records["c"]["status"] == "completed"
+    assert counts == {"error": 1, "completed": 2}
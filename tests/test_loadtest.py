@@ -0,0 +1,46 @@
+import itertools
+
+from sharepoint_agent import AgentPool, FakeAgentsClient, LimitedAgentsClient, PollPolicy, RateLimiter
+from sharepoint_agent.loadtest import StepResult, percentile, ramp, run_step
+
+POLICY = PollPolicy(initial_interval=0.01)
+
+
+def _client(**kwargs):
+    fake = FakeAgentsClient(latency=0.02, **kwargs)
+    client = LimitedAgentsClient(fake, RateLimiter(1000.0, max_concurrent_runs=None))
+    return fake, client
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5, 1, 3], 100) == 5
+
+
+def test_step_accounting_and_no_threads_left_behind():
+    fake, client = _client()
+    with AgentPool(client) as pool, pool.agent("fake-model", "Be brief.") as agent:
+        step = run_step(client, agent.id, itertools.cycle(["a", "b"]), concurrency=2, duration=0.2, policy=POLICY)
+    assert step.queries >= 2 and step.completed == step.queries == sum(step.statuses.values())
+    assert step.error_rate == 0.0 and 0 < step.p50 <= step.p95 <= step.p99
+    assert step.tokens > 0 and step.requests > 0 and step.throttled == 0
+    assert fake.calls["threads.delete"] == fake.calls["threads.create"] == step.queries
+    assert list(fake.threads.list()) == []
+
+
+def test_ramp_stops_once_the_error_rate_is_exceeded():
+    fake, client = _client(failure_rate=1.0)
+    seen = []
+    with AgentPool(client) as pool, pool.agent("fake-model", "Be brief.") as agent:
+        steps = ramp(client, agent.id, ["q"], steps=[1, 2, 4], duration=0.1, policy=POLICY,
+                     max_error_rate=0.5, on_step=seen.append)
+    assert [step.concurrency for step in steps] == [1] and seen == steps
+    assert steps[0].completed == 0 and steps[0].error_rate == 1.0
+    assert list(fake.threads.list()) == []
+
+
+def test_step_result_rates():
+    step = StepResult(2, elapsed=10.0, queries=20, completed=15, requests=100, throttled=5, tokens=3000)
+    assert (step.throughput, step.per_minute, step.error_rate, step.throttle_rate) == (1.5, 90.0, 0.25, 0.05)
+    assert step.to_dict()["tokens_per_query"] == 150
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from sharepoint_agent import FakeAgentsClient, PollPolicy, create_and_poll, run_query
+from sharepoint_agent.polling import TIMED_OUT, TimedOutRun, wait_for_run
+
+
+class FakeTime:
+    """Clock and sleep in one: sleeping advances the clock instead of blocking."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _started_run(fake, latency):
+    fake.latency = latency
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    thread = fake.threads.create()
+    fake.messages.create(thread_id=thread.id, role="user", content="What documents are available?")
+    return thread.id, agent.id, fake.runs.create(thread_id=thread.id, agent_id=agent.id)
+
+
+def test_fast_polls_then_exponential_backoff_to_the_cap():
+    policy = PollPolicy(initial_interval=0.25, fast_polls=3, multiplier=2.0, max_interval=1.5, jitter=0.0)
+    intervals = policy.intervals()
+    assert [next(intervals) for _ in range(7)] == [0.25, 0.25, 0.25, 0.5, 1.0, 1.5, 1.5]
+
+
+def test_jitter_stays_within_bounds():
+    policy = PollPolicy(initial_interval=1.0, fast_polls=1000, jitter=0.2)
+    intervals = policy.intervals(random.Random(7))
+    samples = [next(intervals) for _ in range(500)]
+    assert all(0.8 <= sample <= 1.2 for sample in samples)
+    assert max(samples) - min(samples) > 0.2
+
+
+def test_deadline_cancels_and_reports_timed_out():
+    fake, now = FakeAgentsClient(), FakeTime()
+    thread_id, _, run = _started_run(fake, latency=3600)
+    policy = PollPolicy(initial_interval=1.0, fast_polls=2, multiplier=2.0, max_interval=4.0, jitter=0.0, deadline=10.0)
+
+    final = wait_for_run(fake, thread_id, run, policy=policy, sleep=now.sleep, clock=now.clock)
+
+    assert isinstance(final, TimedOutRun) and final.status == TIMED_OUT and final.id == run.id
+    assert final.last_error["code"] == TIMED_OUT
+    assert fake.calls["runs.cancel"] == 1
+    # The last sleep is trimmed so the deadline is not overshot.
+    assert now.sleeps == [1.0, 1.0, 2.0, 4.0, 2.0] and now.now == pytest.approx(10.0)
+
+
+def test_finished_run_is_returned_without_cancel():
+    fake, now = FakeAgentsClient(), FakeTime()
+    thread_id, _, run = _started_run(fake, latency=0.0)
+    final = wait_for_run(fake, thread_id, run, policy=PollPolicy(jitter=0.0), sleep=now.sleep, clock=now.clock)
+    assert final.status == "completed" and "runs.cancel" not in fake.calls
+
+
+def test_run_query_reports_timed_out():
+    fake = FakeAgentsClient(latency=3600)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    result = run_query(fake, agent.id, "What documents are available?",
+                       policy=PollPolicy(initial_interval=0.01, deadline=0.05))
+    assert result.status == TIMED_OUT and not result.ok
+    assert fake.calls["runs.cancel"] == 1
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_run_slot_is_released_whatever_happens(fails):
+    fake = FakeAgentsClient()
+    released = []
+    fake.runs.release = released.append
+    if fails:
+        def broken_get(**kwargs):
+            raise RuntimeError("service unavailable")
+        fake.runs.get = broken_get
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    thread = fake.threads.create()
+    fake.messages.create(thread_id=thread.id, role="user", content="hello")
+    fake.latency = 3600 if fails else 0.0
+    policy = PollPolicy(initial_interval=0.01)
+    if fails:
+        with pytest.raises(RuntimeError):
+            create_and_poll(fake, thread.id, agent.id, policy=policy)
+    else:
+        assert create_and_poll(fake, thread.id, agent.id, policy=policy).status == "completed"
+    assert len(released) == 1 and released[0].startswith("run")
@@ -0,0 +1,58 @@
+import threading
+
+from sharepoint_agent import AgentPool, FakeAgentsClient
+
+
+def test_same_configuration_shares_one_agent():
+    fake = FakeAgentsClient()
+    with AgentPool(fake) as pool:
+        first = pool.acquire("fake-model", "Be brief.")
+        second = pool.acquire("fake-model", "Be brief.")
+        other = pool.acquire("fake-model", "Be thorough.")
+        assert first.id == second.id != other.id
+        assert pool.created == 2 and len(pool) == 2
+        for agent in (first, second, other):
+            pool.release(agent)
+    assert pool.retired == 2 and len(pool) == 0
+    assert list(fake.list_agents()) == []
+
+
+def test_concurrent_acquire_creates_a_single_agent():
+    fake = FakeAgentsClient(latency=0.05)
+    pool = AgentPool(fake)
+    ids = []
+
+    def use():
+        with pool.agent("fake-model", "Be brief.") as agent:
+            ids.append(agent.id)
+
+    workers = [threading.Thread(target=use) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(5)
+    assert len(set(ids)) == 1 and len(ids) == 8 and pool.created == 1
+    pool.close()
+
+
+def test_idle_agents_are_reaped_but_busy_ones_kept():
+    fake = FakeAgentsClient()
+    pool = AgentPool(fake, idle_timeout=0.0)
+    busy = pool.acquire("fake-model", "busy")
+    with pool.agent("fake-model", "idle"):
+        pass
+    assert pool.reap() == 1
+    assert len(pool) == 1 and [agent.id for agent in fake.list_agents()] == [busy.id]
+    pool.release(busy)
+    pool.close()
+
+
+def test_failed_creation_leaves_no_entry():
+    fake = FakeAgentsClient()
+    pool = AgentPool(fake)
+    fake.create_agent = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("quota exceeded"))
+    try:
+        pool.acquire("fake-model", "Be brief.")
+    except RuntimeError:
+        pass
+    assert len(pool) == 0 and pool._entries == {}
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from sharepoint_agent import FakeAgentsClient, LimitedAgentsClient, PollPolicy, RateLimiter, run_query
+from sharepoint_agent.ratelimit import RunSlotTimeout
+
+
+def _limited(fake, runs=2, timeout=5.0):
+    limiter = RateLimiter(1000, max_concurrent_runs=runs, run_slot_timeout=timeout)
+    return LimitedAgentsClient(fake, limiter), limiter
+
+
+def _broken(*args, **kwargs):
+    raise RuntimeError("service unavailable")
+
+
+def _ask(client, agent_id, query="What documents are available?", policy=PollPolicy(initial_interval=0.01)):
+    """run_query on a helper thread, failing the test instead of hanging it."""
+    results = []
+    worker = threading.Thread(target=lambda: results.append(run_query(client, agent_id, query, policy=policy)))
+    worker.start()
+    worker.join(10)
+    assert not worker.is_alive(), "run_query blocked waiting for a run slot"
+    return results[0]
+
+
+def test_slot_released_when_runs_get_fails():
+    fake = FakeAgentsClient(latency=0.05)
+    client, limiter = _limited(fake)
+    agent = fake.create_agent(model="m")
+    fake.runs.get = _broken
+    for _ in range(2):
+        assert _ask(client, agent.id).status == "error"
+    assert limiter.stats()["active_runs"] == 0
+
+    del fake.runs.get
+    assert _ask(client, agent.id).ok
+
+
+def test_slot_released_when_cancel_fails_after_deadline():
+    fake = FakeAgentsClient(latency=5.0)
+    client, limiter = _limited(fake)
+    agent = fake.create_agent(model="m")
+    fake.runs.cancel = _broken
+    policy = PollPolicy(initial_interval=0.01, deadline=0.05)
+    for _ in range(2):
+        assert _ask(client, agent.id, policy=policy).status == "timed_out"
+    assert limiter.stats()["active_runs"] == 0
+
+
+def test_completed_runs_give_back_their_slot_once():
+    fake = FakeAgentsClient(latency=0.02)
+    client, limiter = _limited(fake, runs=1)
+    agent = fake.create_agent(model="m")
+    for _ in range(3):
+        assert _ask(client, agent.id).ok
+    assert limiter.stats()["active_runs"] == 0
+
+
+def test_acquire_run_times_out():
+    limiter = RateLimiter(1000, max_concurrent_runs=1, run_slot_timeout=0.05)
+    limiter.acquire_run()
+    with pytest.raises(RunSlotTimeout):
+        limiter.acquire_run()
+    limiter.release_run()
+    limiter.acquire_run()
+
+
+def _pipeline_response(status, headers=None):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(http_response=SimpleNamespace(status_code=status, headers=headers or {}),
+                           http_request=SimpleNamespace(method="GET"))
+
+
+def test_core_retry_policy_leaves_throttles_to_the_limiter():
+    from types import SimpleNamespace
+
+    from azure.core.pipeline.policies import RetryPolicy
+
+    from sharepoint_agent.ratelimit import disable_throttle_retries
+
+    policy = RetryPolicy()
+    sdk_client = SimpleNamespace(_config=SimpleNamespace(retry_policy=policy), threads=None, messages=None,
+                                 runs=None)
+    settings = policy.configure_retries({})
+    assert policy.is_retry(settings, _pipeline_response(429, {"Retry-After": "1"}))
+
+    LimitedAgentsClient(sdk_client, RateLimiter(1000))
+    assert not policy.is_retry(settings, _pipeline_response(429, {"Retry-After": "1"}))
+    assert not policy.is_retry(settings, _pipeline_response(429))
+    assert policy.is_retry(settings, _pipeline_response(503))
+    # Wrapping twice does not stack wrappers.
+    assert disable_throttle_retries(sdk_client) and not disable_throttle_retries(FakeAgentsClient())
@@ -0,0 +1,90 @@
+from collections import Counter
+
+from sharepoint_agent import AgentPool, Backend, FakeAgentsClient, PollPolicy, Router, routed_run_query
+from sharepoint_agent.router import WEIGHTED_ROUND_ROBIN
+
+POLICY = PollPolicy(initial_interval=0.01)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _backends(*names, weights=None):
+    return [Backend(name, f"conn-{name}", (weights or {}).get(name, 1.0)) for name in names]
+
+
+def test_least_outstanding_respects_weights():
+    router = Router(_backends("big", "small", weights={"big": 3}))
+    picked = Counter(router.acquire().name for _ in range(8))
+    assert picked == {"big": 6, "small": 2}
+
+
+def test_weighted_round_robin_spreads_smoothly():
+    router = Router(_backends("a", "b", weights={"a": 2}), strategy=WEIGHTED_ROUND_ROBIN)
+    picks = []
+    for _ in range(6):
+        backend = router.acquire()
+        router.release(backend, ok=True)
+        picks.append(backend.name)
+    assert picks == ["a", "b", "a", "a", "b", "a"]
+
+
+def test_exclude_skips_backends_unless_none_are_left():
+    router = Router(_backends("a", "b"))
+    assert router.acquire(exclude=["a"]).name == "b"
+    assert router.acquire(exclude=["a", "b"]).name in ("a", "b")
+
+
+def test_failing_backend_is_ejected_and_readmitted():
+    clock = Clock()
+    router = Router(_backends("a", "b"), failure_threshold=2, ejection_time=30, clock=clock)
+    a = router.backends[0]
+    for _ in range(2):
+        router.acquire()
+        router.release(a, ok=False)
+    assert router.stats()["a"]["ejected"] and router.stats()["a"]["ejections"] == 1
+    assert {router.acquire().name for _ in range(3)} == {"b"}
+    clock.now = 31
+    assert not router.stats()["a"]["ejected"]
+
+
+def _route(fake, router, query="What documents are available?"):
+    with AgentPool(fake) as pool:
+        return routed_run_query(router, pool, fake, query, "Be brief.", policy=POLICY)
+
+
+def test_failed_runs_fail_over_to_the_next_backend():
+    fake = FakeAgentsClient(latency=0.01, model_failure_rates={"broken": 1.0})
+    router = Router(_backends("broken", "healthy"))
+    for _ in range(3):
+        result = _route(fake, router)
+        assert result.ok and result.timings["attributes"]["backend"] == "healthy"
+    stats = router.stats()
+    assert stats["broken"]["failures"] >= 1 and stats["healthy"]["failures"] == 0
+    assert all(state["outstanding"] == 0 for state in stats.values())
+
+
+def test_agent_creation_error_fails_over_instead_of_raising():
+    fake = FakeAgentsClient(latency=0.01)
+    create_agent = fake.create_agent
+
+    def create_or_fail(model, **kwargs):
+        if model == "missing":
+            raise RuntimeError("DeploymentNotFound")
+        return create_agent(model, **kwargs)
+
+    fake.create_agent = create_or_fail
+    router = Router(_backends("missing", "healthy"))
+    results = [_route(fake, router) for _ in range(3)]
+    assert all(result.ok for result in results)
+    assert router.stats()["missing"]["failures"] >= 1
+
+    only_missing = Router(_backends("missing"))
+    result = _route(fake, only_missing)
+    assert result.status == "error" and "DeploymentNotFound" in result.error
+    assert only_missing.stats()["missing"]["outstanding"] == 0
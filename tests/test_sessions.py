@@ -0,0 +1,75 @@
+from sharepoint_agent import FakeAgentsClient, PollPolicy, SessionManager
+
+POLICY = PollPolicy(initial_interval=0.01)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _live_threads(fake):
+    return {thread.id for thread in fake.threads.list()}
+
+
+def _open(manager, key):
+    with manager.session(key) as session:
+        return session.thread_id
+
+
+def test_follow_ups_reuse_the_conversation_thread():
+    fake = FakeAgentsClient(latency=0.01)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    with SessionManager(fake) as manager:
+        first = manager.ask("report", agent.id, "Summarize 'Doc to test.docx'", policy=POLICY)
+        second = manager.ask("report", agent.id, "Who is the author?", policy=POLICY)
+        assert first.ok and second.ok and first.thread_id == second.thread_id
+        assert manager.stats()["created"] == 1 and manager.stats()["reused"] == 1
+    assert fake.calls["threads.delete"] == 1 and _live_threads(fake) == set()
+
+
+def test_cap_evicts_least_recently_used_and_deletes_its_thread():
+    fake = FakeAgentsClient()
+    manager = SessionManager(fake, max_sessions=2, clock=Clock())
+    a, b = _open(manager, "a"), _open(manager, "b")
+    _open(manager, "a")  # "b" is now least recently used
+    c = _open(manager, "c")
+
+    assert "b" not in manager and len(manager) == 2
+    assert fake.calls["threads.delete"] == 1
+    assert _live_threads(fake) == {a, c} and b not in _live_threads(fake)
+    assert manager.stats()["evicted"] == 1
+
+
+def test_busy_sessions_are_not_evicted():
+    fake = FakeAgentsClient()
+    manager = SessionManager(fake, max_sessions=1, clock=Clock())
+    with manager.session("busy") as busy:
+        other = _open(manager, "other")
+        assert "busy" in manager and busy.thread_id in _live_threads(fake)
+    assert other in _live_threads(fake)
+
+
+def test_idle_sessions_expire():
+    clock, fake = Clock(), FakeAgentsClient()
+    manager = SessionManager(fake, idle_timeout=60, clock=clock)
+    old = _open(manager, "old")
+    clock.now = 45
+    recent = _open(manager, "recent")
+    clock.now = 61
+    assert manager.reap() == 1
+    assert "old" not in manager and "recent" in manager
+    assert _live_threads(fake) == {recent} and old not in _live_threads(fake)
+    assert fake.calls["threads.delete"] == 1
+
+
+def test_end_deletes_the_thread():
+    fake = FakeAgentsClient()
+    manager = SessionManager(fake)
+    thread_id = _open(manager, "chat")
+    assert manager.thread_id("chat") == thread_id
+    assert manager.end("chat") and not manager.end("chat")
+    assert _live_threads(fake) == set() and fake.calls["threads.delete"] == 1
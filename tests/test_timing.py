@@ -0,0 +1,25 @@
+import re
+
+from sharepoint_agent.timing import parent_phase, print_summary
+
+
+def _record(total, **phases):
+    return {"total": total, "phases": [{"name": name.replace("__", "."), "duration": d} for name, d in phases.items()]}
+
+
+def test_parent_phase():
+    names = {"run", "run.step", "threads.create"}
+    assert parent_phase("run.queued", names) == "run"
+    assert parent_phase("run.step.sharepoint_grounding", names) == "run.step"
+    assert parent_phase("threads.create", names) is None
+    assert parent_phase("run", names) is None
+
+
+def test_shares_cover_top_level_phases_only(capsys):
+    record = _record(1.0, threads__create=0.1, run=0.8, run__queued=0.2, run__in_progress=0.6,
+                     run__step__sharepoint_grounding=0.5, messages__list=0.1)
+    print_summary([record, record])
+    rows = capsys.readouterr().out.splitlines()[3:]
+    shares = {row.split()[0]: re.search(r"(\d+)%$", row) for row in rows}
+    assert {name for name, share in shares.items() if share} == {"threads.create", "run", "messages.list"}
+    assert sum(int(share.group(1)) for share in shares.values() if share) == 100
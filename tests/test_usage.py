@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+from sharepoint_agent import FakeAgentsClient, QueryResult
+from sharepoint_agent.query import run_usage
+from sharepoint_agent.streaming import stream_query
+from sharepoint_agent.usage import TokenBudget, UsageTracker, metered, query_template, tokens_used
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _result(query, total, agent="asst_1", backend="gpt-4o", **kwargs):
+    usage = {"prompt_tokens": total - 10, "completion_tokens": 10, "total_tokens": total}
+    return QueryResult(query=query, status="completed", usage=usage, elapsed=2.0,
+                       timings={"attributes": {"agent_id": agent, "backend": backend}}, **kwargs)
+
+
+def test_run_usage_from_models_dicts_and_missing_usage():
+    model = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1500, completion_tokens=40, total_tokens=None))
+    assert run_usage(model) == {"prompt_tokens": 1500, "completion_tokens": 40, "total_tokens": 1540}
+    assert run_usage(SimpleNamespace(usage={"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6})) == \
+        {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+    assert run_usage(SimpleNamespace(usage=None)) is None
+    assert run_usage(SimpleNamespace()) is None
+
+
+def test_query_template_masks_specifics():
+    assert query_template("Summarize 'Q3 report.docx' for 2025") == "Summarize '…' for #"
+    assert query_template('Summarize "Budget 2024.xlsx"') == query_template("Summarize 'Plan.docx'")
+
+
+def test_tracker_aggregates_by_template_agent_and_deployment():
+    now = FakeTime()
+    tracker = UsageTracker(clock=now.clock)
+    tracker.record(_result("Summarize 'a.docx'", 1000))
+    tracker.record(_result("Summarize 'b.docx'", 3000, agent="asst_2", backend="gpt-4o-eu"))
+    tracker.record(_result("What documents are available?", 500))
+    tracker.record(QueryResult(query="cached", status="completed", answer="x", cached=True))
+    tracker.record(QueryResult(query="no usage", status="completed", answer="x"))
+    now.now = 60.0
+
+    report = tracker.report()
+    total = report["total"]
+    assert (total["queries"], total["total_tokens"], total["cached"], total["unreported"]) == (3, 4500, 1, 1)
+    assert list(report["by_template"]) == ["Summarize '…'", "What documents are available?"]
+    assert report["by_template"]["Summarize '…'"]["tokens_per_query"] == 2000
+    assert report["by_agent"]["asst_1"]["total_tokens"] == 1500
+    assert report["by_deployment"]["gpt-4o-eu"]["total_tokens"] == 3000
+    assert total["tokens_per_second"] == 4500 / 6.0
+    assert total["wall_time"] == 62.0
+
+
+def test_tokens_used_ignores_cached_and_missing_usage():
+    assert tokens_used(_result("q", 700)) == 700
+    assert tokens_used(_result("q", 700, cached=True)) == 0
+    assert tokens_used(QueryResult(query="q", status="error")) == 0
+    assert tokens_used(None) == 0
+
+
+def test_budget_defers_once_exhausted_and_recovers_as_the_window_slides():
+    now = FakeTime()
+    budget = TokenBudget(5000, estimate=2000, clock=now.clock, sleep=now.sleep)
+    first, second = budget.acquire(), budget.acquire()
+    assert budget.stats()["reserved"] == 4000
+    budget.settle(first, 2000)
+    budget.settle(second, 2000)
+    assert budget.stats()["used"] == 4000
+
+    budget.acquire()  # 4000 spent + 2000 expected > 5000: waits for the window to slide
+    stats = budget.stats()
+    assert stats["deferred"] == 1 and now.now >= 60.0 and stats["used"] == 0
+    assert stats["wait_time"] == now.now
+
+
+def test_budget_admits_an_oversized_question_when_idle():
+    now = FakeTime()
+    budget = TokenBudget(1000, estimate=5000, clock=now.clock, sleep=now.sleep)
+    reservation = budget.acquire()
+    assert reservation == 5000 and now.now == 0.0
+    budget.settle(reservation, 0)
+    assert budget.stats()["estimate"] == 5000  # runs without usage do not move the estimate
+
+
+def test_metered_records_and_settles_even_without_usage():
+    now = FakeTime()
+    tracker = UsageTracker(clock=None)
+    budget = TokenBudget(10_000, estimate=1000, clock=now.clock, sleep=now.sleep)
+    results = iter([_result("q", 1200), QueryResult(query="q", status="error", error="boom")])
+    run = metered(lambda query, **kwargs: next(results), tracker, budget)
+    run("q")
+    run("q")
+    assert tracker.report()["total"]["queries"] == 1 and tracker.unreported == 1
+    assert budget.stats()["reserved"] == 0 and budget.stats()["used"] == 1200
+
+
+def test_streamed_runs_report_usage():
+    fake = FakeAgentsClient(latency=0.01)
+    agent = fake.create_agent(model="fake-model", name="test", instructions="")
+    thread = fake.threads.create()
+    fake.messages.create(thread_id=thread.id, role="user", content="What documents are available?")
+    result = stream_query(fake, agent.id, thread.id, on_text=None, on_tool_call=None)
+    assert result.status == "completed"
+    assert result.usage and result.usage["total_tokens"] == result.usage["prompt_tokens"] + \
+        result.usage["completion_tokens"] > 0